@@ -1,9 +1,14 @@
 import os
-import uuid
 import hashlib
 import json
-from datetime import datetime
-from flask import Flask, jsonify, send_from_directory, request
+import mmap
+import shutil
+import ssl
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from flask import Flask, Request, jsonify, redirect, send_from_directory, request
 from werkzeug.utils import secure_filename
 from dotenv import load_dotenv
 
@@ -19,12 +24,22 @@ if 'FPCALC' not in os.environ:
         print(f"[APP] Set FPCALC path: {fpcalc_path}")
 
 from flask_cors import CORS
+from flask_compress import Compress
+from sqlalchemy import and_, delete, func, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import load_only, selectinload, undefer
 from config import settings
-from database import engine, SessionLocal
-from models import Base, Track, Analysis, Artifact
+from database import engine, SessionLocal, BackgroundSession, init_db
+from models import Track, Analysis, Artifact
+from uuid import UUID
+from uuid6 import uuid7
+from json_provider import OrjsonProvider
+from conditional_requests import etag_matches
 from services.music_identifier import identify_music
 from services.audio_analyzer import AudioAnalyzer
-from services.similarity_comparator import SimilarityComparator
+from services.similarity_comparator import FEATURES_VERSION, get_comparator
+from services.object_storage import ObjectStorage
+from services.progress_store import ProgressStore
 # Use lightweight visualization to save memory
 import os
 if os.getenv("USE_LITE_VIZ", "true").lower() == "true":
@@ -32,10 +47,112 @@ if os.getenv("USE_LITE_VIZ", "true").lower() == "true":
 else:
     from services.visualization_generator import VisualizationGenerator
 
+class DiskSpooledRequest(Request):
+    """
+    Request that always spools uploaded files to an anonymous temp file.
+    Werkzeug keeps uploads under 500 KB in a BytesIO; a real file lets
+    create_track mmap and hash every upload without Python-level copies.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return tempfile.TemporaryFile("rb+")
+
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
+app.request_class = DiskSpooledRequest
+app.config["MAX_CONTENT_LENGTH"] = settings.max_upload_mb * 1024 * 1024
+# br/gzip for JSON responses (analysis results, segment lists); audio and PNGs are left alone
+Compress(app)
+
+# Audio goes to S3-compatible storage when a bucket is configured, else into tracks.audio_blob
+object_storage = (
+    ObjectStorage(settings.audio_bucket, settings.s3_endpoint_url or None, settings.audio_url_ttl)
+    if settings.audio_bucket else None
+)
+
+AUDIO_CONTENT_TYPES = {
+    '.mp3': 'audio/mpeg',
+    '.wav': 'audio/wav',
+    '.ogg': 'audio/ogg',
+    '.m4a': 'audio/mp4',
+    '.flac': 'audio/flac'
+}
+
+# Slice size when streaming audio_blob out of Postgres for /media
+MEDIA_CHUNK_SIZE = 1 << 20
+
+# Bytes hashed for the (content_length, prefix_sha256) dedup probe
+PREFIX_PROBE_SIZE = 64 * 1024
+
+# Dedup checksums only need collision resistance, so BLAKE3 can be opted into
+# with CHECKSUM_ALGORITHM=blake3. Its values are stored with a "blake3:" prefix to keep them apart from
+# existing bare SHA-256 hex digests in the same column.
+if settings.checksum_algorithm == "blake3":
+    from blake3 import blake3
+# hashlib.sha256 is backed by OpenSSL; SHA-NI is only autodetected from 1.1.1 on
+elif ssl.OPENSSL_VERSION_INFO < (1, 1, 1):
+    print(f"[APP] Warning: {ssl.OPENSSL_VERSION} has no SHA-NI support, upload hashing will be slower")
+
+# Global progress tracking; shared through Redis across workers when REDIS_URL is set
+progress_store = ProgressStore(settings.redis_url or None)
+
+# Background analyses (identification, comparison) run on a bounded pool so
+# concurrent requests queue up instead of each loading audio into memory at once
+analysis_pool = ThreadPoolExecutor(max_workers=settings.analysis_workers, thread_name_prefix="analysis")
+
+# In-memory filesystem for the temp audio files handed to fpcalc/librosa
+SHM_DIR = "/dev/shm"
+
+# How long a completed music identification is reused for the same audio
+IDENTIFICATION_CACHE_DAYS = 30
+
+# Housekeeping pool so file removal never blocks a request
+cleanup_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="cleanup")
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except Exception as cleanup_error:
+        print(f"Error cleaning up temp file {path}: {cleanup_error}")
+
+
+def _remove_file_later(path):
+    cleanup_pool.submit(_remove_file, path)
+
+
+# Cached track count for /api/library/stats; reset whenever tracks are added or removed
+# (other workers pick up changes when their entry expires)
+LIBRARY_STATS_TTL_SECONDS = 30
+# Above this many rows the planner's estimate is used instead of an exact COUNT(*)
+EXACT_COUNT_LIMIT = 100_000
+library_stats_cache = {"total_tracks": None, "expires_at": 0.0}
+
+
+def _invalidate_library_stats():
+    library_stats_cache["total_tracks"] = None
+
+
+# The feature cache lives in 'other' analyses holding a track_features
+# artifact; they are internal and left out of track responses
+FEATURE_CACHE_ARTIFACT = "track_features"
+USER_VISIBLE_ANALYSIS = ~Analysis.artifacts.any(Artifact.artifact_type == FEATURE_CACHE_ARTIFACT)
+
+
+# Serialized GET /tracks/<id> bodies keyed by (track_id, analyses version);
+# oldest entries are evicted first once the cache is full
+TRACK_RESPONSE_CACHE_SIZE = 1024
+track_response_cache = {}
+
+
+def _cache_track_response(key, body):
+    if len(track_response_cache) >= TRACK_RESPONSE_CACHE_SIZE:
+        track_response_cache.pop(next(iter(track_response_cache)), None)
+    track_response_cache[key] = body
 
-# Global progress tracking (in production, use Redis or similar)
-progress_store = {}
 
 # CORS configuration - allow localhost for dev and Netlify for production
 allowed_origins = [
@@ -49,14 +166,17 @@ if os.getenv("FRONTEND_URL"):
     if frontend_url not in allowed_origins:
         allowed_origins.append(frontend_url)
 
-CORS(app, resources={r"/*": {"origins": allowed_origins if settings.flask_env == "production" else "*"}})
+# Resolve the final origins once at import: an immutable tuple in production, "*" otherwise
+cors_origins = tuple(allowed_origins) if settings.flask_env == "production" else "*"
+CORS(app, resources={r"/*": {"origins": cors_origins}})
 
 # Ensure upload dir exists
 os.makedirs(settings.upload_dir, exist_ok=True)
 
-# Initialize database schema (for bootstrap; later we can switch to Alembic)
-with engine.begin() as conn:
-    Base.metadata.create_all(bind=conn)
+# Schema bootstrap runs once per deploy (`python database.py`), not in every
+# worker; set DB_BOOTSTRAP=1 to also run it on import (e.g. local development)
+if settings.db_bootstrap:
+    init_db()
 
 
 @app.get("/health")
@@ -66,56 +186,194 @@ def health():
 
 @app.get("/api/library/stats")
 def library_stats():
-    db = SessionLocal()
-    try:
-        total_tracks = db.query(Track).count()
-        # For now, return simple stats. Later we can add genre/artist extraction
-        return jsonify({
-            "totalTracks": total_tracks,
-            "genres": [],  # Placeholder until we add genre metadata
-            "artists": 0   # Placeholder until we add artist metadata
-        })
-    finally:
-        db.close()
+    total_tracks = library_stats_cache["total_tracks"]
+    if total_tracks is None or time.monotonic() >= library_stats_cache["expires_at"]:
+        db = SessionLocal()
+        try:
+            # reltuples is kept up to date by autovacuum/ANALYZE; -1 means never analyzed
+            total_tracks = db.execute(
+                text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'tracks'::regclass")
+            ).scalar()
+            if total_tracks is None or total_tracks < EXACT_COUNT_LIMIT:
+                total_tracks = db.execute(select(func.count()).select_from(Track)).scalar()
+        finally:
+            db.close()
+        library_stats_cache["total_tracks"] = total_tracks
+        library_stats_cache["expires_at"] = time.monotonic() + LIBRARY_STATS_TTL_SECONDS
+
+    # For now, return simple stats. Later we can add genre/artist extraction
+    return jsonify({
+        "totalTracks": total_tracks,
+        "genres": [],  # Placeholder until we add genre metadata
+        "artists": 0   # Placeholder until we add artist metadata
+    })
 
 
 @app.get("/media/<path:filename>")
 def serve_media(filename):
     """
     Serve audio files from database blob storage.
+    The blob is streamed out of Postgres in MEDIA_CHUNK_SIZE slices and
+    single byte ranges are honoured, so players can seek without the whole
+    file being loaded into memory.
     """
     # Extract UUID from filename
-    file_id = os.path.splitext(filename)[0]
+    try:
+        file_id = UUID(os.path.splitext(filename)[0])
+    except ValueError:
+        return jsonify({"error": "File not found"}), 404
     
     db = SessionLocal()
     try:
-        # Find track by audio_url pattern
-        track = db.query(Track).filter(Track.audio_url.like(f"%{file_id}%")).first()
-        if not track or not track.audio_blob:
-            return jsonify({"error": "File not found"}), 404
-        
-        from flask import Response
-        # Determine content type based on extension
-        ext = os.path.splitext(filename)[1].lower()
-        content_type = {
-            '.mp3': 'audio/mpeg',
-            '.wav': 'audio/wav',
-            '.ogg': 'audio/ogg',
-            '.m4a': 'audio/mp4',
-            '.flac': 'audio/flac'
-        }.get(ext, 'application/octet-stream')
-        
-        return Response(track.audio_blob, mimetype=content_type)
+        # Indexed lookup by the UUID embedded in audio_url; only metadata here
+        track = db.query(
+            Track.id,
+            Track.checksum_sha256,
+            Track.storage_key,
+            func.octet_length(Track.audio_blob).label("size"),
+        ).filter(Track.file_id == file_id).first()
     finally:
         db.close()
+    if track and track.storage_key and object_storage:
+        # Object storage serves the bytes (and ranges) itself
+        return redirect(object_storage.presigned_url(track.storage_key), code=302)
+    if not track or not track.size:
+        return jsonify({"error": "File not found"}), 404
+    
+    from flask import Response
+    # Determine content type based on extension
+    ext = os.path.splitext(filename)[1].lower()
+    content_type = AUDIO_CONTENT_TYPES.get(ext, 'application/octet-stream')
+    
+    # Uploaded audio never changes, so let clients and proxies cache it
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "public, max-age=31536000",
+    }
+    if track.checksum_sha256:
+        headers["ETag"] = f'"{track.checksum_sha256}"'
+        if etag_matches(track.checksum_sha256):
+            return Response(status=304, headers=headers)
+    
+    size = track.size
+    start, stop, status = 0, size, 200
+    byte_range = request.range
+    if byte_range is not None and len(byte_range.ranges) == 1:
+        span = byte_range.range_for_length(size)
+        if span is None:
+            headers["Content-Range"] = f"bytes */{size}"
+            return Response(status=416, headers=headers)
+        start, stop = span
+        status = 206
+        headers["Content-Range"] = f"bytes {start}-{stop - 1}/{size}"
+    headers["Content-Length"] = str(stop - start)
+    
+    return Response(
+        _stream_audio_blob(track.id, start, stop),
+        status=status,
+        mimetype=content_type,
+        headers=headers,
+    )
+
+
+def _stream_audio_blob(track_id, start, stop):
+    """
+    Yield audio_blob[start:stop] in MEDIA_CHUNK_SIZE pieces using substr(),
+    which Postgres serves by reading only the TOAST chunks it needs.
+    Each slice checks a connection out and returns it (transaction ended)
+    before yielding, so a slow client never holds a pooled connection or
+    an idle-in-transaction session while it downloads.
+    """
+    offset = start
+    while offset < stop:
+        length = min(MEDIA_CHUNK_SIZE, stop - offset)
+        with engine.connect() as conn:
+            chunk = conn.execute(
+                select(func.substr(Track.audio_blob, offset + 1, length)).where(Track.id == track_id)
+            ).scalar()
+            conn.commit()
+        if not chunk:
+            break
+        yield bytes(chunk)
+        offset += len(chunk)
+
+
+def _new_hasher():
+    if settings.checksum_algorithm == "blake3":
+        return blake3(max_threads=blake3.AUTO)
+    return hashlib.sha256()
+
+
+def _format_checksum(hasher) -> str:
+    if settings.checksum_algorithm == "blake3":
+        return f"blake3:{hasher.hexdigest()}"
+    return hasher.hexdigest()
+
+
+def _probe_upload(stream):
+    """
+    Get the upload size and a short hash of its first PREFIX_PROBE_SIZE bytes
+    without reading the whole stream. Rewinds the stream afterwards.
+    Returns (content_length, prefix_sha256).
+    """
+    stream.seek(0, os.SEEK_END)
+    content_length = stream.tell()
+    stream.seek(0)
+    prefix_sha256 = hashlib.sha256(stream.read(PREFIX_PROBE_SIZE)).hexdigest()[:16]
+    stream.seek(0)
+    return content_length, prefix_sha256
+
+
+def _map_upload(stream):
+    """
+    Memory-map an upload Werkzeug has spooled to a temporary file.
+    Returns None for in-memory (BytesIO) or empty uploads.
+    """
+    try:
+        fileno = stream.fileno()
+    except (AttributeError, OSError):
+        return None
+    try:
+        return mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+
+def _read_upload(stream):
+    """
+    Read an upload stream and hash it with the configured checksum algorithm.
+
+    DiskSpooledRequest spools every upload to a temporary file, which is
+    memory-mapped and hashed in a single zero-copy update; only empty
+    uploads (which can't be mapped) are read as bytes.
+    Returns (data, checksum) with data the mmap or the bytes read.
+    """
+    checksum = _new_hasher()
+    data = _map_upload(stream)
+    if data is None:
+        data = stream.read()
+    checksum.update(data)
+    return data, _format_checksum(checksum)
+
+
+def _upload_blob(data):
+    """
+    Build the audio_blob value for an insert. A memory-mapped upload is
+    passed as a memoryview so the driver reads the spooled file's pages directly
+    and no full-size bytes copy is made in Python.
+    """
+    if isinstance(data, mmap.mmap):
+        return memoryview(data)
+    return data
 
 
 def _track_to_dict(t: Track, include_children: bool = False):
+    # UUIDs and datetimes are passed through as-is; OrjsonProvider serializes them
     base = {
-        "id": str(t.id),
+        "id": t.id,
         "title": t.title,
         "audio_url": t.audio_url,
-        "uploaded_at": t.uploaded_at.isoformat() if t.uploaded_at else None,
+        "uploaded_at": t.uploaded_at,
         "duration_seconds": t.duration_seconds,
         "sample_rate": t.sample_rate,
     }
@@ -126,18 +384,18 @@ def _track_to_dict(t: Track, include_children: bool = False):
         artifacts = []
         for r in a.artifacts:
             artifacts.append({
-                "id": str(r.id),
+                "id": r.id,
                 "artifact_type": r.artifact_type,
                 "content_type": r.content_type,
                 "data_json": r.data_json,
                 "data_url": r.data_url,
             })
         analyses.append({
-            "id": str(a.id),
+            "id": a.id,
             "method": a.method,
             "status": a.status,
-            "created_at": a.created_at.isoformat() if a.created_at else None,
-            "completed_at": a.completed_at.isoformat() if a.completed_at else None,
+            "created_at": a.created_at,
+            "completed_at": a.completed_at,
             "summary": a.summary,
             "artifacts": artifacts,
         })
@@ -156,57 +414,165 @@ def create_track():
     title = request.form.get("title") or file.filename
     original_name = secure_filename(file.filename)
     ext = os.path.splitext(original_name)[1]
-    file_id = str(uuid.uuid4())
-
-    # Read entire file into memory and compute checksum
-    file_data = file.read()
-    sha256 = hashlib.sha256(file_data)
-    checksum = sha256.hexdigest()
+    # The track id doubles as the media file id; UUIDv7 keeps inserts index-local
+    track_id = uuid7()
+    file_id = str(track_id)
 
     # Generate audio URL for database-stored blob
     audio_url = f"{settings.base_url.rstrip('/')}/media/{file_id}{ext}"
 
+    # Read and hash the upload before opening a session, so no pooled
+    # connection is held while the file streams in
+    content_length, prefix_sha256 = _probe_upload(file.stream)
+    data, checksum = _read_upload(file.stream)
+
+    audio_blob = None
     db = SessionLocal()
     try:
-        existing = db.query(Track).filter(Track.checksum_sha256 == checksum).first()
-        if existing:
+        # Only tracks with the same size and prefix hash can be duplicates
+        candidates = db.query(Track.id, Track.checksum_sha256).filter(
+            Track.content_length == content_length,
+            Track.prefix_sha256 == prefix_sha256,
+        ).all()
+
+        existing_id = next((c.id for c in candidates if c.checksum_sha256 == checksum), None)
+        if existing_id:
+            existing = db.query(Track).filter(Track.id == existing_id).first()
             return jsonify({"track": _track_to_dict(existing)}), 200
 
-        # Store audio in database blob instead of filesystem
-        track = Track(
-            title=title,
-            audio_url=audio_url,
-            audio_blob=file_data,
-            duration_seconds=None,
-            sample_rate=None,
-            checksum_sha256=checksum,
-        )
-        db.add(track)
+        storage_key = None
+        if object_storage:
+            # End the read transaction so no pooled connection is held during the upload
+            db.rollback()
+            storage_key = f"{file_id}{ext}"
+            file.stream.seek(0)
+            object_storage.upload(
+                file.stream, storage_key,
+                AUDIO_CONTENT_TYPES.get(ext.lower(), 'application/octet-stream')
+            )
+        else:
+            # Store audio in database blob instead of filesystem
+            audio_blob = _upload_blob(data)
+
+        # A concurrent upload of the same file can pass the probe above; the
+        # UNIQUE checksum makes the insert a no-op then, and RETURNING saves
+        # the refresh round trip on the normal path
+        row = db.execute(
+            pg_insert(Track).values(
+                id=track_id,
+                file_id=track_id,
+                title=title,
+                audio_url=audio_url,
+                audio_blob=audio_blob,
+                storage_key=storage_key,
+                duration_seconds=None,
+                sample_rate=None,
+                checksum_sha256=checksum,
+                content_length=content_length,
+                prefix_sha256=prefix_sha256,
+            ).on_conflict_do_nothing(
+                index_elements=[Track.checksum_sha256]
+            ).returning(
+                Track.id, Track.title, Track.audio_url, Track.uploaded_at,
+                Track.duration_seconds, Track.sample_rate,
+            )
+        ).first()
         db.commit()
-        db.refresh(track)
-        return jsonify({"track": _track_to_dict(track)}), 201
+        if row is None:
+            if storage_key:
+                cleanup_pool.submit(object_storage.delete, storage_key)
+            existing = db.query(Track).filter(Track.checksum_sha256 == checksum).first()
+            return jsonify({"track": _track_to_dict(existing)}), 200
+        _invalidate_library_stats()
+        return jsonify({"track": _track_to_dict(row)}), 201
     finally:
         db.close()
+        # Unmap the spooled upload now rather than at garbage collection; the
+        # view handed to the insert has to be released first
+        if isinstance(audio_blob, memoryview):
+            audio_blob.release()
+        if isinstance(data, mmap.mmap):
+            data.close()
 
 
 @app.get("/tracks")
 def list_tracks():
     db = SessionLocal()
     try:
-        rows = db.query(Track).order_by(Track.uploaded_at.desc()).limit(100).all()
+        # Plain column rows skip ORM instance construction; _track_to_dict
+        # only reads these attributes when include_children is False
+        rows = db.execute(
+            select(
+                Track.id, Track.title, Track.audio_url, Track.uploaded_at,
+                Track.duration_seconds, Track.sample_rate,
+            ).order_by(Track.uploaded_at.desc()).limit(100)
+        ).all()
         return jsonify({"tracks": [_track_to_dict(t) for t in rows]})
     finally:
         db.close()
 
 
+@app.get("/tracks/by-checksum/<checksum>")
+def get_track_by_checksum(checksum):
+    """
+    Look up a track by its upload checksum so clients can hash a file locally
+    and skip uploading it when the server already has it. The checksum must be
+    in the stored format: hex SHA-256 with CHECKSUM_ALGORITHM=sha256, or
+    "blake3:<hex>" with blake3. Flask answers HEAD from this route as well.
+    """
+    db = SessionLocal()
+    try:
+        row = db.execute(
+            select(
+                Track.id, Track.title, Track.audio_url, Track.uploaded_at,
+                Track.duration_seconds, Track.sample_rate,
+            ).where(Track.checksum_sha256 == checksum.lower())
+        ).first()
+        if not row:
+            return jsonify({
+                "error": "track not found",
+                "checksum_algorithm": settings.checksum_algorithm,
+            }), 404
+        return jsonify({"track": _track_to_dict(row)}), 200
+    finally:
+        db.close()
+
+
 @app.get("/tracks/<uuid:track_id>")
 def get_track(track_id):
     db = SessionLocal()
     try:
-        t = db.query(Track).filter(Track.id == track_id).first()
-        if not t:
+        # Cheap version probe: one row per analysis (or a single NULL row).
+        # Artifacts and summaries are written together with the status change,
+        # so (id, status, completed_at) per analysis identifies the response.
+        version_rows = db.execute(
+            select(Analysis.id, Analysis.status, Analysis.completed_at)
+            .select_from(Track)
+            .outerjoin(Analysis, and_(Analysis.track_id == Track.id, USER_VISIBLE_ANALYSIS))
+            .where(Track.id == track_id)
+            .order_by(Analysis.created_at)
+        ).all()
+        if not version_rows:
             return jsonify({"error": "not found"}), 404
-        return jsonify({"track": _track_to_dict(t, include_children=True)})
+
+        cache_key = (track_id, tuple(tuple(r) for r in version_rows))
+        body = track_response_cache.get(cache_key)
+        if body is None:
+            # Eager-load analyses and their artifacts: 3 queries instead of 1 + N.
+            # load_only keeps the audio_blob BYTEA out of the track row.
+            t = db.query(Track).options(
+                load_only(
+                    Track.id, Track.title, Track.audio_url, Track.uploaded_at,
+                    Track.duration_seconds, Track.sample_rate,
+                ),
+                selectinload(Track.analyses.and_(USER_VISIBLE_ANALYSIS))
+                .selectinload(Analysis.artifacts),
+            ).filter(Track.id == track_id).first()
+            if not t:
+                return jsonify({"error": "not found"}), 404
+            body = app.json.dumps({"track": _track_to_dict(t, include_children=True)})
+            _cache_track_response(cache_key, body)
+        return app.response_class(body, mimetype="application/json")
     finally:
         db.close()
 
@@ -215,13 +581,19 @@ def get_track(track_id):
 def delete_track(track_id):
     db = SessionLocal()
     try:
-        t = db.query(Track).filter(Track.id == track_id).first()
-        if not t:
+        # Bulk DELETE: no need to load the track (and its audio blob) or walk
+        # analyses/artifacts in Python - the foreign keys cascade ON DELETE
+        deleted = db.execute(
+            delete(Track).where(Track.id == track_id).returning(Track.storage_key)
+        ).first()
+        if not deleted:
             return jsonify({"error": "not found"}), 404
         
-        # No need to remove files - stored in database
-        db.delete(t)
         db.commit()
+        _invalidate_library_stats()
+        # Blob-stored audio went with the row; remove bucket objects off the request path
+        if deleted.storage_key and object_storage:
+            cleanup_pool.submit(object_storage.delete, deleted.storage_key)
         return jsonify({"message": "deleted"}), 200
     finally:
         db.close()
@@ -232,12 +604,53 @@ def analyze_track(track_id):
     """
     Trigger music identification analysis for a track.
     Uses Acoustid/MusicBrainz to identify the song.
+    Returns analysis_id immediately and processes in background.
     """
     db = SessionLocal()
     try:
-        track = db.query(Track).filter(Track.id == track_id).first()
+        # audio_blob is deferred on the model; fetch it with the row since the job needs it
+        track = db.query(Track).options(undefer(Track.audio_blob)).filter(Track.id == track_id).first()
         if not track:
             return jsonify({"error": "track not found"}), 404
+        if not track.audio_blob and not track.storage_key:
+            return jsonify({"error": "audio data not found"}), 404
+        
+        # Same audio identified recently? Reuse those matches instead of
+        # fingerprinting and calling AcoustID again
+        cached = _find_cached_identification(db, track.checksum_sha256)
+        if cached:
+            analysis = Analysis(
+                track_id=track_id,
+                method="music_identification",
+                status="completed",
+                completed_at=func.now(),
+                summary=cached.summary
+            )
+            db.add(analysis)
+            db.flush()
+            db.add(Artifact(
+                analysis_id=analysis.id,
+                artifact_type="music_matches",
+                content_type="application/json",
+                data_json=cached.data_json
+            ))
+            db.commit()
+            db.refresh(analysis)
+            
+            return jsonify({
+                "message": "Analysis completed successfully",
+                "analysis_id": str(analysis.id),
+                "status": analysis.status,
+                "analysis": {
+                    "id": str(analysis.id),
+                    "track_id": str(track_id),
+                    "status": analysis.status,
+                    "summary": analysis.summary,
+                    "matches": cached.data_json,
+                    "created_at": analysis.created_at.isoformat() if analysis.created_at else None,
+                    "completed_at": analysis.completed_at.isoformat() if analysis.completed_at else None
+                }
+            }), 200
         
         # Create Analysis record with processing status
         analysis = Analysis(
@@ -250,97 +663,181 @@ def analyze_track(track_id):
         db.commit()
         db.refresh(analysis)
         
-        # Create temporary file from audio blob
-        import tempfile
-        temp_file = None
+        analysis_id = analysis.id
+        progress_store[str(analysis_id)] = {
+            "status": "processing",
+            "progress": 5,
+            "message": "Identifying music..."
+        }
+        
+        # Fingerprinting + the AcoustID round-trip take seconds; run them in
+        # the background instead of holding this worker
+        analysis_pool.submit(
+            _process_identification_async,
+            str(track_id), str(analysis_id), track.title, _audio_source(track)
+        )
+        
+        return jsonify({
+            "analysis_id": str(analysis_id),
+            "status": "processing",
+            "message": "Analysis started",
+            "analysis": {
+                "id": str(analysis_id),
+                "track_id": str(track_id),
+                "status": analysis.status,
+                "summary": analysis.summary,
+            }
+        }), 202
+    except Exception as e:
+        print(f"Error starting analysis: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+    finally:
+        db.close()
+
+
+def _audio_source(track):
+    """
+    What background jobs need to get a track's audio: the object storage key
+    when it lives in a bucket, otherwise the blob itself.
+    """
+    if track.storage_key and object_storage:
+        return track.storage_key
+    return track.audio_blob
+
+
+def _write_temp_audio(audio, suffix='.mp3'):
+    """
+    Write a track's audio (blob bytes, or an object storage key from
+    _audio_source) to a temporary file for fpcalc/librosa, which need a path.
+    Blobs go to tmpfs (/dev/shm) when it has room so the bytes never hit the
+    disk; Docker's default /dev/shm is only 64 MB, so large blobs fall back to
+    the regular temp dir.
+    """
+    if isinstance(audio, str):
+        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
+            object_storage.download_to(audio, temp_file)
+        return temp_file.name
+
+    temp_dir = None
+    if os.path.isdir(SHM_DIR):
         try:
-            if not track.audio_blob:
-                analysis.status = "failed"
-                analysis.summary = "Audio data not found"
-                db.commit()
-                return jsonify({"error": "audio data not found"}), 404
+            if shutil.disk_usage(SHM_DIR).free > 2 * len(audio):
+                temp_dir = SHM_DIR
+        except OSError:
+            pass
+    with tempfile.NamedTemporaryFile(dir=temp_dir, delete=False, suffix=suffix) as temp_file:
+        temp_file.write(audio)
+    return temp_file.name
+
+
+def _find_cached_identification(db, checksum):
+    """
+    Find the newest completed identification for audio with this checksum
+    within IDENTIFICATION_CACHE_DAYS. Returns a (data_json, summary) row or None.
+    """
+    if not checksum:
+        return None
+    cutoff = func.now() - timedelta(days=IDENTIFICATION_CACHE_DAYS)
+    return db.query(Artifact.data_json, Analysis.summary).join(
+        Analysis, Artifact.analysis_id == Analysis.id
+    ).join(
+        Track, Analysis.track_id == Track.id
+    ).filter(
+        Track.checksum_sha256 == checksum,
+        Analysis.method == "music_identification",
+        Analysis.status == "completed",
+        Analysis.completed_at >= cutoff,
+        Artifact.artifact_type == "music_matches",
+    ).order_by(Analysis.completed_at.desc()).first()
+
+
+def _process_identification_async(track_id, analysis_id, track_title, audio):
+    """
+    Background task for music identification.
+    """
+    db = BackgroundSession()
+    progress_key = analysis_id
+    temp_file = None
+    analysis = None
+    
+    try:
+        analysis = db.query(Analysis).filter(Analysis.id == UUID(analysis_id)).first()
+        if not analysis:
+            print(f"Analysis {analysis_id} not found")
+            return
+        
+        # Write blob to temporary file
+        audio_path = _write_temp_audio(audio)
+        temp_file = audio_path
+        
+        progress_store[progress_key] = {
+            "status": "processing",
+            "progress": 30,
+            "message": "Fingerprinting audio..."
+        }
+        
+        # Perform music identification
+        print(f"[ASYNC] Identifying music for track: {track_title}")
+        result = identify_music(audio_path, max_results=5)
+        
+        if result["success"]:
+            # Save identification results
+            analysis.status = "completed"
+            analysis.completed_at = func.now()
             
-            # Write blob to temporary file
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.mp3')
-            temp_file.write(track.audio_blob)
-            temp_file.close()
-            audio_path = temp_file.name
+            # Create summary
+            if result["matches"]:
+                best_match = result["matches"][0]
+                analysis.summary = f"Identified as: {best_match['artist']} - {best_match['title']} ({best_match['score']}% match)"
+            else:
+                analysis.summary = "No matches found for this audio"
+            
+            # Save matches as artifacts (even if empty)
+            artifact = Artifact(
+                analysis_id=analysis.id,
+                artifact_type="music_matches",
+                content_type="application/json",
+                data_json=result["matches"]
+            )
+            db.add(artifact)
+            db.commit()
             
-            # Perform music identification
-            print(f"Identifying music for track: {track.title}")
-            result = identify_music(audio_path, max_results=5)
+            progress_store[progress_key] = {
+                "status": "completed",
+                "progress": 100,
+                "message": "Analysis complete!"
+            }
+        else:
+            # Identification failed
+            analysis.status = "failed"
+            analysis.summary = result["error"]
+            db.commit()
             
-            if result["success"]:
-                # Save identification results
-                analysis.status = "completed"
-                analysis.completed_at = datetime.utcnow()
-                
-                # Create summary
-                if result["matches"]:
-                    best_match = result["matches"][0]
-                    analysis.summary = f"Identified as: {best_match['artist']} - {best_match['title']} ({best_match['score']}% match)"
-                else:
-                    analysis.summary = "No matches found for this audio"
-                
-                # Save matches as artifacts (even if empty)
-                artifact = Artifact(
-                    analysis_id=analysis.id,
-                    artifact_type="music_matches",
-                    content_type="application/json",
-                    data_json=result["matches"]
-                )
-                db.add(artifact)
-                
-                db.commit()
-                db.refresh(analysis)
-                
-                return jsonify({
-                    "message": "Analysis completed successfully",
-                    "analysis": {
-                        "id": str(analysis.id),
-                        "track_id": str(track_id),
-                        "status": analysis.status,
-                        "summary": analysis.summary,
-                        "matches": result["matches"],
-                        "created_at": analysis.created_at.isoformat() if analysis.created_at else None,
-                        "completed_at": analysis.completed_at.isoformat() if analysis.completed_at else None
-                    }
-                }), 200
-            else:
-                # Identification failed
-                analysis.status = "failed"
-                analysis.summary = result["error"]
-                db.commit()
-                
-                return jsonify({
-                    "message": "Analysis failed",
-                    "analysis": {
-                        "id": str(analysis.id),
-                        "track_id": str(track_id),
-                        "status": analysis.status,
-                        "summary": analysis.summary,
-                        "error": result["error"]
-                    }
-                }), 200
-                
-        except Exception as e:
+            progress_store[progress_key] = {
+                "status": "failed",
+                "progress": 0,
+                "message": result["error"]
+            }
+    
+    except Exception as e:
+        print(f"Analysis error: {str(e)}")
+        
+        try:
             analysis.status = "failed"
             analysis.summary = f"Error during analysis: {str(e)}"
             db.commit()
-            print(f"Analysis error: {str(e)}")
-            
-            return jsonify({
-                "error": "Analysis failed",
-                "message": str(e)
-            }), 500
-        finally:
-            # Clean up temporary file
-            if temp_file and os.path.exists(temp_file.name):
-                try:
-                    os.remove(temp_file.name)
-                except Exception as cleanup_error:
-                    print(f"Error cleaning up temp file: {cleanup_error}")
+        except:
+            pass
+        
+        progress_store[progress_key] = {
+            "status": "failed",
+            "progress": 0,
+            "message": f"Error: {str(e)}"
+        }
     finally:
+        # Clean up temporary file
+        if temp_file:
+            _remove_file(temp_file)
         db.close()
 
 
@@ -354,8 +851,8 @@ def compare_tracks(track_id, compare_track_id):
     db = SessionLocal()
     try:
         # Get both tracks
-        track1 = db.query(Track).filter(Track.id == track_id).first()
-        track2 = db.query(Track).filter(Track.id == compare_track_id).first()
+        track1 = db.query(Track).options(undefer(Track.audio_blob)).filter(Track.id == track_id).first()
+        track2 = db.query(Track).options(undefer(Track.audio_blob)).filter(Track.id == compare_track_id).first()
         
         if not track1:
             return jsonify({"error": "Track 1 not found"}), 404
@@ -384,14 +881,11 @@ def compare_tracks(track_id, compare_track_id):
         }
         
         # Start background processing
-        import threading
-        thread = threading.Thread(
-            target=_process_comparison_async,
-            args=(str(track_id), str(compare_track_id), str(analysis_id), 
-                  track1.title, track2.title, track1.audio_blob, track2.audio_blob)
+        analysis_pool.submit(
+            _process_comparison_async,
+            str(track_id), str(compare_track_id), str(analysis_id),
+            track1.title, track2.title, _audio_source(track1), _audio_source(track2)
         )
-        thread.daemon = True
-        thread.start()
         
         # Return immediately with analysis_id
         return jsonify({
@@ -407,98 +901,124 @@ def compare_tracks(track_id, compare_track_id):
         db.close()
 
 
+def _feature_params(comparator):
+    """Extraction settings cached features are keyed by (stored in data_json)."""
+    return {
+        "version": FEATURES_VERSION,
+        "sample_rate": comparator.sample_rate,
+        "melody": comparator.enable_melody,
+    }
+
+
+def _cached_track_features(db, comparator, track_id):
+    """
+    Return the cached npz comparison features of a track for these
+    extraction settings, or None if it has never been extracted.
+    """
+    cached = db.execute(
+        select(Artifact.data_blob).join(
+            Analysis, Artifact.analysis_id == Analysis.id
+        ).where(
+            Analysis.track_id == UUID(track_id),
+            Artifact.artifact_type == FEATURE_CACHE_ARTIFACT,
+            Artifact.data_json == _feature_params(comparator),
+        ).limit(1)
+    ).scalar()
+    if cached is None:
+        return None
+    print(f"[ASYNC] Using cached features for track {track_id}")
+    return comparator.deserialize_features(cached)
+
+
+def _save_track_features(db, comparator, track_id, features):
+    """
+    Cache extracted features as an npz artifact under a completed 'other'
+    analysis of the track (removed with the track by the cascade).
+    Best effort: a failed write (e.g. a database whose artifacts_type_check
+    predates track_features) is logged and never fails the comparison.
+    """
+    try:
+        analysis = Analysis(
+            track_id=UUID(track_id),
+            method="other",
+            status="completed",
+            completed_at=func.now(),
+            summary={"message": "Cached similarity features"}
+        )
+        db.add(analysis)
+        db.flush()
+        db.add(Artifact(
+            analysis_id=analysis.id,
+            artifact_type=FEATURE_CACHE_ARTIFACT,
+            content_type="application/x-npz",
+            data_json=_feature_params(comparator),
+            data_blob=comparator.serialize_features(features)
+        ))
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"[ASYNC] Could not cache features for track {track_id}: {e}")
+
+
 def _process_comparison_async(track_id, compare_track_id, analysis_id, 
-                               track1_title, track2_title, audio_blob1, audio_blob2):
+                               track1_title, track2_title, audio1, audio2):
     """
     Background task for processing track comparison.
     """
-    import tempfile
-    db = SessionLocal()
+    db = BackgroundSession()
     progress_key = analysis_id
     temp_files = []
     
     try:
         # Get analysis object
-        from uuid import UUID
         analysis = db.query(Analysis).filter(Analysis.id == UUID(analysis_id)).first()
         if not analysis:
             print(f"Analysis {analysis_id} not found")
             return
         
-        progress_store[progress_key] = {
-            "status": "processing",
-            "progress": 10,
-            "message": f"Extracting features from {track1_title}..."
-        }
-        
-        # Write audio blobs to temporary files for processing
-        temp_file1 = tempfile.NamedTemporaryFile(delete=False, suffix='.mp3')
-        temp_file1.write(audio_blob1)
-        temp_file1.close()
-        audio_path1 = temp_file1.name
-        temp_files.append(audio_path1)
-        
-        temp_file2 = tempfile.NamedTemporaryFile(delete=False, suffix='.mp3')
-        temp_file2.write(audio_blob2)
-        temp_file2.close()
-        audio_path2 = temp_file2.name
-        temp_files.append(audio_path2)
-        
-        if not os.path.exists(audio_path1):
-            analysis.status = "failed"
-            analysis.summary = {"error": "Failed to create temporary file for Track 1"}
-            db.commit()
-            progress_store[progress_key] = {
-                "status": "failed",
-                "progress": 0,
-                "message": "Track 1 audio file not found"
-            }
-            return
-        
-        if not os.path.exists(audio_path2):
-            analysis.status = "failed"
-            analysis.summary = {"error": "Track 2 audio file not found on server"}
-            db.commit()
-            progress_store[progress_key] = {
-                "status": "failed",
-                "progress": 0,
-                "message": "Track 2 audio file not found"
-            }
-            return
-        
         # Perform comparison with progress updates
         print(f"[ASYNC] Comparing tracks: {track1_title} vs {track2_title}")
         
-        progress_store[progress_key] = {
-            "status": "processing",
-            "progress": 20,
-            "message": f"Loading audio files..."
-        }
-        
         print(f"[ASYNC] Creating comparator...")
         # Disable melody analysis in production to save memory (Render free tier has 512MB RAM limit)
         enable_melody = os.getenv("ENABLE_MELODY_ANALYSIS", "false").lower() == "true"
         print(f"[ASYNC] Melody analysis: {'enabled' if enable_melody else 'disabled (memory saving mode)'}")
         # Use lower sample rate to reduce memory usage (16000 instead of 22050)
-        comparator = SimilarityComparator(sample_rate=16000, enable_melody=enable_melody)
-        
-        print(f"[ASYNC] Extracting features from track 1: {audio_path1}")
-        progress_store[progress_key] = {
-            "status": "processing",
-            "progress": 30,
-            "message": f"Analyzing {track1_title}..."
-        }
+        comparator = get_comparator(sample_rate=16000, enable_melody=enable_melody)
         
-        print(f"[ASYNC] Extracting features from track 2: {audio_path2}")
-        progress_store[progress_key] = {
-            "status": "processing",
-            "progress": 50,
-            "message": f"Analyzing {track2_title}..."
-        }
+        # Features are cached per track, so only tracks never compared before
+        # are decoded and run through the STFT/CQT
+        sources = {track_id: audio1, compare_track_id: audio2}
+        features = {tid: _cached_track_features(db, comparator, tid) for tid in sources}
+        missing = [tid for tid, cached in features.items() if cached is None]
+        if missing:
+            titles = {track_id: track1_title, compare_track_id: track2_title}
+            progress_store[progress_key] = {
+                "status": "processing",
+                "progress": 30,
+                "message": f"Analyzing {' and '.join(str(titles[tid]) for tid in missing)}..."
+            }
+            paths = []
+            for tid in missing:
+                paths.append(_write_temp_audio(sources[tid]))
+                temp_files.append(paths[-1])
+            # The extractions are independent and spend most of their time in
+            # numpy/scipy code that releases the GIL, so they can run side by
+            # side; that doubles peak memory, hence opt-in via EXTRACT_WORKERS
+            extract_workers = min(len(paths), max(1, settings.extract_workers))
+            if extract_workers > 1:
+                with ThreadPoolExecutor(max_workers=extract_workers) as extract_pool:
+                    extracted = list(extract_pool.map(comparator.load_and_extract_features, paths))
+            else:
+                extracted = [comparator.load_and_extract_features(path) for path in paths]
+            for tid, track_features in zip(missing, extracted):
+                features[tid] = track_features
+                _save_track_features(db, comparator, tid, track_features)
+        features1, features2 = features[track_id], features[compare_track_id]
         
         print(f"[ASYNC] Starting comparison computation...")
-        comparison_result = comparator.compare_tracks(
-            audio_path1, audio_path2,
+        comparison_result = comparator.compare_features(
+            features1, features2,
             track1_title=track1_title or "Track 1",
             track2_title=track2_title or "Track 2"
         )
@@ -519,7 +1039,9 @@ def _process_comparison_async(track_id, compare_track_id, analysis_id,
         }
         
         viz_generator = VisualizationGenerator()
-        visualizations = viz_generator.generate_all_visualizations(comparison_result)
+        # Artifacts store the PNG bytes only
+        visualizations = viz_generator.generate_all_visualizations(comparison_result,
+                                                                   include_base64=False)
         
         progress_store[progress_key] = {
             "status": "processing",
@@ -555,7 +1077,7 @@ def _process_comparison_async(track_id, compare_track_id, analysis_id,
         
         # Update analysis status
         analysis.status = "completed"
-        analysis.completed_at = datetime.utcnow()
+        analysis.completed_at = func.now()
         analysis.summary = comparison_result['overall_similarity']
         db.commit()
         
@@ -608,9 +1130,28 @@ def get_analysis(analysis_id):
         if not analysis:
             return jsonify({"error": "Analysis not found"}), 404
         
+        # Results and artifacts are written together with the final status,
+        # so (id, status, completed_at) identifies the response body
+        etag = hashlib.blake2b(
+            f"{analysis.id}:{analysis.status}:{analysis.completed_at}".encode(),
+            digest_size=8
+        ).hexdigest()
+        if etag_matches(etag):
+            return app.response_class(status=304, headers={"ETag": f'"{etag}"'})
+        
+        # Column rows only: the blobs are served by get_visualization, here
+        # we just need to know whether one exists
+        artifact_rows = db.execute(
+            select(
+                Artifact.id, Artifact.artifact_type, Artifact.content_type,
+                Artifact.data_json, Artifact.data_url,
+                Artifact.data_blob.isnot(None).label("has_blob"),
+            ).where(Artifact.analysis_id == analysis_id)
+        ).all()
+        
         # Build artifacts list
         artifacts = []
-        for artifact in analysis.artifacts:
+        for artifact in artifact_rows:
             artifact_data = {
                 "id": str(artifact.id),
                 "artifact_type": artifact.artifact_type,
@@ -622,13 +1163,13 @@ def get_analysis(analysis_id):
             
             # Don't include base64 inline to avoid slow response
             # Frontend should fetch images separately via /analyses/{id}/visualizations/{type}
-            if artifact.data_blob and artifact.content_type == "image/png":
+            if artifact.has_blob and artifact.content_type == "image/png":
                 artifact_data["has_image"] = True
                 artifact_data["image_url"] = f"/analyses/{analysis_id}/visualizations/{artifact.artifact_type}"
             
             artifacts.append(artifact_data)
         
-        return jsonify({
+        response = jsonify({
             "analysis": {
                 "id": str(analysis.id),
                 "track_id": str(analysis.track_id),
@@ -639,47 +1180,73 @@ def get_analysis(analysis_id):
                 "summary": analysis.summary,
                 "artifacts": artifacts
             }
-        }), 200
+        })
+        response.set_etag(etag)
+        return response
     finally:
         db.close()
 
 
+def _progress_from_db(analysis_id):
+    """
+    Progress entry derived from the analysis row, for when the progress store
+    has nothing (expired, or written by another process). None if the
+    analysis doesn't exist.
+    """
+    db = SessionLocal()
+    try:
+        status = db.execute(
+            select(Analysis.status).where(Analysis.id == analysis_id)
+        ).scalar()
+    finally:
+        db.close()
+    if status is None:
+        return None
+    if status == "completed":
+        return {"status": "completed", "progress": 100, "message": "Comparison complete!"}
+    if status == "failed":
+        return {"status": "failed", "progress": 0, "message": "Analysis failed"}
+    return {"status": "processing", "progress": 0, "message": "Processing..."}
+
+
 @app.get("/analyses/<uuid:analysis_id>/progress")
 def get_analysis_progress(analysis_id):
     """
     Get the current progress of an analysis/comparison.
     """
+    progress = progress_store.get(str(analysis_id))
+    if progress is None:
+        progress = _progress_from_db(analysis_id)
+        if progress is None:
+            return jsonify({"error": "Analysis not found"}), 404
+    return jsonify(progress), 200
+
+
+@app.get("/analyses/<uuid:analysis_id>/progress/stream")
+def stream_analysis_progress(analysis_id):
+    """
+    Server-Sent Events stream of progress updates, ending once the analysis
+    completes or fails. Replaces polling /progress: updates are pushed from
+    the progress store and the database is only read if it has no entry.
+    """
     progress_key = str(analysis_id)
-    if progress_key in progress_store:
-        return jsonify(progress_store[progress_key]), 200
+    if progress_store.get(progress_key) is None:
+        progress = _progress_from_db(analysis_id)
+        if progress is None:
+            return jsonify({"error": "Analysis not found"}), 404
+        updates = iter([progress])
     else:
-        # Check if analysis exists and is completed
-        db = SessionLocal()
-        try:
-            analysis = db.query(Analysis).filter(Analysis.id == analysis_id).first()
-            if not analysis:
-                return jsonify({"error": "Analysis not found"}), 404
-            
-            if analysis.status == "completed":
-                return jsonify({
-                    "status": "completed",
-                    "progress": 100,
-                    "message": "Comparison complete!"
-                }), 200
-            elif analysis.status == "failed":
-                return jsonify({
-                    "status": "failed",
-                    "progress": 0,
-                    "message": "Analysis failed"
-                }), 200
-            else:
-                return jsonify({
-                    "status": "processing",
-                    "progress": 0,
-                    "message": "Processing..."
-                }), 200
-        finally:
-            db.close()
+        updates = progress_store.watch(progress_key)
+
+    def generate():
+        for progress in updates:
+            yield f"data: {json.dumps(progress)}\n\n"
+
+    return app.response_class(
+        generate(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.get("/analyses/<uuid:analysis_id>/visualizations/<artifact_type>")
@@ -689,9 +1256,11 @@ def get_visualization(analysis_id, artifact_type):
     """
     db = SessionLocal()
     try:
-        artifact = db.query(Artifact).filter(
-            Artifact.analysis_id == analysis_id,
-            Artifact.artifact_type == artifact_type
+        artifact = db.execute(
+            select(Artifact.id, Artifact.data_blob).where(
+                Artifact.analysis_id == analysis_id,
+                Artifact.artifact_type == artifact_type
+            ).limit(1)
         ).first()
         
         if not artifact:
@@ -699,7 +1268,11 @@ def get_visualization(analysis_id, artifact_type):
         
         if artifact.data_blob:
             from flask import Response
-            return Response(artifact.data_blob, mimetype='image/png')
+            # Artifacts are written once and never updated, so the browser can keep them
+            response = Response(artifact.data_blob, mimetype='image/png')
+            response.set_etag(str(artifact.id))
+            response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+            return response.make_conditional(request)
         else:
             return jsonify({"error": "No image data available"}), 404
     finally:
@@ -713,14 +1286,15 @@ def clear_old_tracks():
     """
     db = SessionLocal()
     try:
-        # Find tracks without audio_blob
-        old_tracks = db.query(Track).filter(Track.audio_blob == None).all()
+        # Find tracks without audio_blob (or an object storage key)
+        old_tracks = db.query(Track).filter(Track.audio_blob == None, Track.storage_key == None).all()
         count = len(old_tracks)
         
         # Delete them
         for track in old_tracks:
             db.delete(track)
         db.commit()
+        _invalidate_library_stats()
         
         return jsonify({
             "status": "success",
@@ -736,50 +1310,6 @@ def clear_old_tracks():
         db.close()
 
 
-@app.route("/admin/fix-database-constraint", methods=["GET", "POST"])
-def fix_database_constraint():
-    """
-    Temporary endpoint to update the database constraint.
-    DELETE THIS AFTER RUNNING ONCE!
-    """
-    try:
-        from sqlalchemy import text
-        with engine.begin() as conn:
-            # Drop old constraint
-            conn.execute(text("""
-                ALTER TABLE analyses DROP CONSTRAINT IF EXISTS analyses_method_check;
-            """))
-            
-            # Add updated constraint
-            conn.execute(text("""
-                ALTER TABLE analyses ADD CONSTRAINT analyses_method_check 
-                CHECK (method IN (
-                    'chromaprint','hpcp','dtw','lyrics','music_identification',
-                    'similarity_detection','melody_similarity','cover_detection',
-                    'similarity_comparison','other'
-                ));
-            """))
-            
-            # Verify
-            result = conn.execute(text("""
-                SELECT pg_get_constraintdef(oid) 
-                FROM pg_constraint 
-                WHERE conname = 'analyses_method_check';
-            """))
-            constraint_def = result.fetchone()
-        
-        return jsonify({
-            "status": "success",
-            "message": "Database constraint updated successfully",
-            "constraint": constraint_def[0] if constraint_def else None
-        }), 200
-    except Exception as e:
-        return jsonify({
-            "status": "error",
-            "message": str(e)
-        }), 500
-
-
 if __name__ == "__main__":
     # Use PORT from environment (Render sets this) or fall back to settings
     port = int(os.environ.get("PORT", settings.port))
@@ -0,0 +1,20 @@
+from flask import request
+
+# Flask-Compress appends the coding to the ETag of a compressed response
+# ("<tag>:gzip"), and browsers send that value back in If-None-Match
+COMPRESSED_ETAG_SUFFIXES = (":gzip", ":br", ":deflate")
+
+
+def etag_matches(etag):
+    """True if If-None-Match names etag, with or without a compression suffix."""
+    if_none_match = request.if_none_match
+    if if_none_match.star_tag:
+        return True
+    for tag in if_none_match.as_set(include_weak=True):
+        for suffix in COMPRESSED_ETAG_SUFFIXES:
+            if tag.endswith(suffix):
+                tag = tag[:-len(suffix)]
+                break
+        if tag == etag:
+            return True
+    return False
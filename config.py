@@ -11,6 +11,30 @@ class Settings:
     port: int = int(os.getenv("PORT", "8000"))
     upload_dir: str = os.getenv("UPLOAD_DIR", "uploads")
     base_url: str = os.getenv("BASE_URL", "http://localhost:8000")
+    # SQLAlchemy pool for request handlers (background jobs use unpooled connections)
+    db_pool_size: int = int(os.getenv("DB_POOL_SIZE", "20"))
+    db_max_overflow: int = int(os.getenv("DB_MAX_OVERFLOW", "40"))
+    # Recycle pooled connections after this many seconds (providers drop idle ones)
+    db_pool_recycle: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    # Run create_all when the app is imported; normally done once per deploy instead
+    db_bootstrap: bool = os.getenv("DB_BOOTSTRAP", "0") == "1"
+    # S3-compatible bucket for uploaded audio; empty keeps audio in Postgres
+    audio_bucket: str = os.getenv("AUDIO_S3_BUCKET", "")
+    # Custom S3 endpoint (e.g. MinIO); empty uses AWS
+    s3_endpoint_url: str = os.getenv("S3_ENDPOINT_URL", "")
+    # Lifetime of presigned audio URLs in seconds
+    audio_url_ttl: int = int(os.getenv("AUDIO_URL_TTL", "3600"))
+    # Redis for analysis progress shared across workers; empty keeps it in process memory
+    redis_url: str = os.getenv("REDIS_URL", "")
+    # Concurrent background analyses per process (each holds decoded audio in memory)
+    analysis_workers: int = int(os.getenv("ANALYSIS_WORKERS", "1"))
+    # Tracks of one comparison extracted concurrently; each holds its decoded
+    # audio and spectrograms, so keep 1 on small (512 MB) instances
+    extract_workers: int = int(os.getenv("EXTRACT_WORKERS", "1"))
+    # Largest accepted upload (request body) in megabytes
+    max_upload_mb: int = int(os.getenv("MAX_UPLOAD_MB", "100"))
+    # Hash used for upload dedup: "sha256" (default) or "blake3" (faster, opt-in)
+    checksum_algorithm: str = os.getenv("CHECKSUM_ALGORITHM", "sha256").lower()
     
     @property
     def database_url(self) -> str:
@@ -1,24 +1,58 @@
-from sqlalchemy import create_engine, event, text
+import os
+
+from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from sqlalchemy.exc import OperationalError
 from config import settings
 
 engine = create_engine(
     settings.database_url,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_recycle=settings.db_pool_recycle,
     pool_pre_ping=True,
     connect_args={"options": "-c client_encoding=UTF8"},
 )
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
-# Ensure uuid extension exists in Postgres
-@event.listens_for(engine, "connect")
-def ensure_extensions(dbapi_connection, connection_record):
-    try:
-        with dbapi_connection.cursor() as cur:
-            cur.execute('CREATE EXTENSION IF NOT EXISTS "uuid-ossp";')
-    except Exception:
-        # If not Postgres, ignore.
-        pass
+# Background analyses hold a session for the whole job; give them their own
+# unpooled connections so they never take checkouts from request handlers
+background_engine = create_engine(
+    settings.database_url,
+    poolclass=NullPool,
+    connect_args={"options": "-c client_encoding=UTF8"},
+)
+BackgroundSession = sessionmaker(bind=background_engine, autoflush=False, autocommit=False)
+
+# Columns, indexes and backfills for databases created before they were
+# added to models.py; create_all never alters existing tables
+SCHEMA_UPDATE_SQL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "update_db_schema.sql")
+
+
+def init_db():
+    """Create the uuid extension and any missing tables. Run once per deploy, not in every worker."""
+    from models import Base
+    with engine.begin() as conn:
+        # Needed by the uuid_generate_v4() server defaults; used to run on every new connection
+        conn.execute(text('CREATE EXTENSION IF NOT EXISTS "uuid-ossp";'))
+        Base.metadata.create_all(bind=conn)
+
+
+def migrate_db():
+    """
+    Bring the database up to models.py: create missing tables, apply
+    update_db_schema.sql and sync the check constraints. Every step is
+    idempotent; run once per deploy, before the workers start.
+    """
+    init_db()
+    with open(SCHEMA_UPDATE_SQL, encoding="utf-8") as f:
+        script = f.read()
+    with engine.begin() as conn:
+        conn.exec_driver_sql(script)
+    # Imported here: update_constraints imports this module
+    from update_constraints import update_constraints
+    update_constraints()
 
 
 def get_db():
@@ -27,3 +61,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+if __name__ == "__main__":
+    migrate_db()
+    print("✅ Database schema initialized")
@@ -2,6 +2,7 @@ from sqlalchemy import (
     Column,
     String,
     Integer,
+    BigInteger,
     Text,
     TIMESTAMP,
     ForeignKey,
@@ -10,7 +11,8 @@ from sqlalchemy import (
     text,
 )
 from sqlalchemy.dialects.postgresql import UUID, JSONB, BYTEA
-from sqlalchemy.orm import declarative_base, relationship
+from sqlalchemy.orm import declarative_base, deferred, relationship
+from uuid6 import uuid7
 
 Base = declarative_base()
 
@@ -18,20 +20,38 @@ Base = declarative_base()
 class Track(Base):
     __tablename__ = "tracks"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("uuid_generate_v4()"))
+    # UUIDv7 (time-ordered) so new rows land at the tail of the primary key index
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7, server_default=text("uuid_generate_v4()"))
     title = Column(Text, nullable=True)
     audio_url = Column(Text, nullable=True)
-    audio_blob = Column(BYTEA, nullable=True)
+    # UUID in the /media/<file_id><ext> audio_url (same as id for new tracks)
+    file_id = Column(UUID(as_uuid=True), nullable=True)
+    # Deferred: only loaded when accessed, so row queries don't drag the audio along
+    audio_blob = deferred(Column(BYTEA, nullable=True))
+    # Object key when the audio lives in S3-compatible storage instead of audio_blob
+    storage_key = Column(Text, nullable=True)
     uploaded_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text("now()"))
     duration_seconds = Column(Integer, nullable=True)
     sample_rate = Column(Integer, nullable=True)
     checksum_sha256 = Column(Text, nullable=True, unique=True)
+    # Cheap dedup probe: upload size plus first 16 hex chars of SHA-256 over the first 64 KiB
+    content_length = Column(BigInteger, nullable=True)
+    prefix_sha256 = Column(Text, nullable=True)
 
     __table_args__ = (
         CheckConstraint(
             "(audio_url IS NOT NULL) OR (audio_blob IS NOT NULL)",
             name="tracks_audio_presence",
         ),
+        # INCLUDE checksum so the duplicate probe is answered by an index-only scan
+        Index(
+            "idx_tracks_size_prefix", "content_length", "prefix_sha256",
+            postgresql_include=["checksum_sha256"],
+        ),
+        # Serves ORDER BY uploaded_at DESC LIMIT n (B-tree is scanned backwards)
+        Index("idx_tracks_uploaded_at", "uploaded_at"),
+        # Media lookup by file_id; same name as update_db_schema.sql creates
+        Index("idx_tracks_file_id", "file_id", unique=True),
     )
 
     analyses = relationship("Analysis", back_populates="track", cascade="all, delete-orphan")
@@ -73,13 +93,14 @@ class Artifact(Base):
     artifact_type = Column(Text, nullable=False)
     content_type = Column(Text, nullable=True)
     data_json = Column(JSONB, nullable=True)
-    data_blob = Column(BYTEA, nullable=True)
+    # Deferred like tracks.audio_blob: PNGs and feature archives are fetched on their own
+    data_blob = deferred(Column(BYTEA, nullable=True))
     data_url = Column(Text, nullable=True)
     created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text("now()"))
 
     __table_args__ = (
         CheckConstraint(
-            "artifact_type IN ('chromaprint','hpcp','dtw_matrix','dtw_path','plot_image','feature_json','music_matches','chroma_heatmap','dtw_heatmap','melody_contours','segments_timeline','summary_dashboard','similarity_report','other')",
+            "artifact_type IN ('chromaprint','hpcp','dtw_matrix','dtw_path','plot_image','feature_json','music_matches','chroma_heatmap','dtw_heatmap','melody_contours','segments_timeline','summary_dashboard','similarity_report','track_features','other')",
             name="artifacts_type_check",
         ),
         CheckConstraint(
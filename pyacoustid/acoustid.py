@@ -173,6 +173,23 @@ class _rate_limit(object):  # noqa: N801
             return self.fun(*args, **kwargs)
 
 
+_session = None
+
+
+def _get_session():
+    """Return the shared HTTP session, creating it on first use. Reusing
+    one session keeps the connection to the server alive between
+    requests instead of reconnecting each time. Requests are serialized
+    by ``_rate_limit``, so the session is never used concurrently.
+    """
+    global _session
+    if _session is None:
+        _session = requests.Session()
+        _session.mount('http://', CompressedHTTPAdapter())
+        _session.mount('https://', CompressedHTTPAdapter())
+    return _session
+
+
 @_rate_limit
 def _api_request(url, params, timeout=None):
     """Makes a POST request for the URL with the given form parameters,
@@ -185,21 +202,20 @@ def _api_request(url, params, timeout=None):
         "Content-Type": "application/x-www-form-urlencoded"
     }
 
-    with requests.Session() as session:
-        session.mount('http://', CompressedHTTPAdapter())
-        try:
-            if isinstance(params.get('meta'), list):
-                params['meta'] = ' '.join(params['meta'])
-            response = session.post(url,
-                                    data=params,
-                                    headers=headers,
-                                    timeout=timeout)
-        except requests.exceptions.RequestException as exc:
-            raise WebServiceError("HTTP request failed: {0}".format(exc))
-        except requests.exceptions.ReadTimeout:
-            raise WebServiceError(
-                "HTTP request timed out ({0}s)".format(timeout)
-            )
+    session = _get_session()
+    try:
+        if isinstance(params.get('meta'), list):
+            params['meta'] = ' '.join(params['meta'])
+        response = session.post(url,
+                                data=params,
+                                headers=headers,
+                                timeout=timeout)
+    except requests.exceptions.RequestException as exc:
+        raise WebServiceError("HTTP request failed: {0}".format(exc))
+    except requests.exceptions.ReadTimeout:
+        raise WebServiceError(
+            "HTTP request timed out ({0}s)".format(timeout)
+        )
 
     try:
         return response.json()
@@ -1,6 +1,6 @@
 """
 Audio Analysis Services
 """
-from .audio_analyzer import AudioAnalyzer, analyze_audio
+from .audio_analyzer import AudioAnalyzer, analyze_audio, analyze_audio_batch
 
-__all__ = ['AudioAnalyzer', 'analyze_audio']
+__all__ = ['AudioAnalyzer', 'analyze_audio', 'analyze_audio_batch']
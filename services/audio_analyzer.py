@@ -2,15 +2,62 @@
 Audio Analysis Service
 Extracts audio features for similarity detection and plagiarism analysis.
 """
+import functools
 import os
+import threading
 import numpy as np
 import librosa
-import librosa.display
-from typing import Dict, Optional, Tuple
-from pydub import AudioSegment
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from .audio_loader import load_mono, probe_duration
+from .feature_cache import FeatureCache
+from .spectral_kernels import SPECTRAL_KERNELS_AVAILABLE, spectral_shape
 import warnings
 
-warnings.filterwarnings('ignore')
+# Part of every feature cache key; bump whenever extract_all_features output
+# changes (algorithms, dtypes, fingerprint packing) so stale entries are missed
+FEATURE_VERSION = 2
+
+# Shared pool for independent feature transforms; created on first use
+_feature_pool = None
+_feature_pool_lock = threading.Lock()
+
+# Set in analyze_audio_batch worker processes, which hold one analyzer each
+# and already use every core, so they skip the per-file thread pool
+_batch_analyzer = None
+
+
+def _get_feature_pool() -> Optional[ThreadPoolExecutor]:
+    """Return the feature thread pool, or None on single-core hosts."""
+    global _feature_pool
+    if (os.cpu_count() or 1) < 2 or _batch_analyzer is not None:
+        return None
+    with _feature_pool_lock:
+        if _feature_pool is None:
+            _feature_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="features")
+    return _feature_pool
+
+
+def _row_stats(A: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Per-row mean, std, min and max of a (features x frames) matrix.
+    Mean and std come from one sum and one sum of squares (einsum, no
+    squared temporary) instead of np.std's centred copy, which roughly
+    halves the passes over long feature matrices.
+    
+    Args:
+        A: 2-D feature matrix, or a 1-D series (treated as one row)
+        
+    Returns:
+        Tuple of (mean, std, min, max), each with one value per row
+    """
+    A = np.atleast_2d(A)
+    n = A.shape[1]
+    mean = np.add.reduce(A, axis=1, dtype=np.float64) / n
+    mean_sq = np.einsum('ij,ij->i', A, A, dtype=np.float64) / n
+    # Clamp tiny negative variances from rounding
+    std = np.sqrt(np.maximum(mean_sq - mean ** 2, 0.0))
+    return mean, std, A.min(axis=1), A.max(axis=1)
 
 
 class AudioAnalyzer:
@@ -18,25 +65,34 @@ class AudioAnalyzer:
     Analyzes audio files and extracts features for similarity detection.
     """
     
-    def __init__(self, sample_rate: int = 22050, n_mfcc: int = 13):
+    def __init__(self, sample_rate: int = 22050, n_mfcc: int = 13,
+                 cache_dir: Optional[str] = None):
         """
         Initialize the AudioAnalyzer.
         
         Args:
             sample_rate: Target sample rate for audio processing
             n_mfcc: Number of MFCC coefficients to extract
+            cache_dir: Directory for cached extract_all_features results
+                (keyed by audio content); None disables caching
         """
         self.sample_rate = sample_rate
         self.n_mfcc = n_mfcc
         self.hop_length = 512
         self.n_fft = 2048
+        self.feature_cache = FeatureCache(
+            cache_dir, f"AudioAnalyzer:v{FEATURE_VERSION}:sr={sample_rate}:n_mfcc={n_mfcc}"
+        ) if cache_dir else None
     
-    def load_audio(self, audio_path: str) -> Tuple[np.ndarray, int]:
+    def load_audio(self, audio_path: str, offset: float = 0.0,
+                   max_seconds: Optional[float] = None) -> Tuple[np.ndarray, int]:
         """
         Load audio file and convert to mono at target sample rate.
         
         Args:
             audio_path: Path to audio file
+            offset: Start of the window to load, in seconds
+            max_seconds: Length of the window; None loads to the end
             
         Returns:
             Tuple of (audio_data, sample_rate)
@@ -49,27 +105,47 @@ class AudioAnalyzer:
             raise FileNotFoundError(f"Audio file not found: {audio_path}")
         
         try:
-            # Load audio with librosa (automatically converts to mono)
-            y, sr = librosa.load(audio_path, sr=self.sample_rate, mono=True)
-            return y, sr
+            # Decode block by block, downmixing and resampling as we go
+            y = load_mono(audio_path, self.sample_rate, offset=offset, max_seconds=max_seconds)
+            return y, self.sample_rate
         except Exception as e:
             raise Exception(f"Failed to load audio: {str(e)}")
     
     def normalize_audio(self, y: np.ndarray) -> np.ndarray:
         """
-        Normalize audio to [-1, 1] range.
+        Normalize audio to [-1, 1] range, in place for float32 input.
         
         Args:
-            y: Audio time series
+            y: Audio time series (modified in place unless a cast is needed)
             
         Returns:
             Normalized audio
         """
-        if np.max(np.abs(y)) == 0:
+        y = y.astype(np.float32, copy=False)
+        if y.size == 0:
+            return y
+        # Peak from max/min avoids allocating np.abs(y), and it is computed once
+        peak = max(float(y.max()), -float(y.min()))
+        if peak == 0:
             return y
-        return y / np.max(np.abs(y))
+        np.multiply(y, 1.0 / peak, out=y)
+        return y
+    
+    def _shared_spectrogram(self, y: np.ndarray) -> np.ndarray:
+        """
+        Compute the STFT magnitude once so every STFT-based feature can reuse it.
+        Square it for the power spectrogram.
+        
+        Args:
+            y: Audio time series
+            
+        Returns:
+            Magnitude spectrogram (1 + n_fft/2 x time_frames)
+        """
+        return np.abs(librosa.stft(y, n_fft=self.n_fft, hop_length=self.hop_length))
     
-    def extract_mfcc(self, y: np.ndarray, sr: int) -> np.ndarray:
+    def extract_mfcc(self, y: np.ndarray, sr: int,
+                     log_mel: Optional[np.ndarray] = None) -> np.ndarray:
         """
         Extract Mel-frequency cepstral coefficients (MFCCs).
         Captures timbral texture of audio.
@@ -77,10 +153,13 @@ class AudioAnalyzer:
         Args:
             y: Audio time series
             sr: Sample rate
+            log_mel: Precomputed log-power mel spectrogram (skips the STFT)
             
         Returns:
             MFCC features (n_mfcc x time_frames)
         """
+        if log_mel is not None:
+            return librosa.feature.mfcc(S=log_mel, n_mfcc=self.n_mfcc)
         mfcc = librosa.feature.mfcc(
             y=y, 
             sr=sr, 
@@ -90,7 +169,8 @@ class AudioAnalyzer:
         )
         return mfcc
     
-    def extract_chroma(self, y: np.ndarray, sr: int) -> np.ndarray:
+    def extract_chroma(self, y: np.ndarray, sr: int,
+                       S_power: Optional[np.ndarray] = None) -> np.ndarray:
         """
         Extract chroma features (pitch class profile).
         Captures harmonic and melodic characteristics.
@@ -98,40 +178,57 @@ class AudioAnalyzer:
         Args:
             y: Audio time series
             sr: Sample rate
+            S_power: Precomputed power spectrogram (skips the STFT)
             
         Returns:
             Chroma features (12 x time_frames)
         """
         chroma = librosa.feature.chroma_stft(
-            y=y,
+            y=None if S_power is not None else y,
+            S=S_power,
             sr=sr,
             hop_length=self.hop_length,
-            n_fft=self.n_fft
+            n_fft=self.n_fft,
+            # Assume A440 instead of estimating tuning, which runs piptrack
+            # over the whole spectrogram; 12-bin summary chroma doesn't
+            # resolve the few cents it would correct
+            tuning=0.0
         )
         return chroma
     
-    def extract_spectral_features(self, y: np.ndarray, sr: int) -> Dict[str, np.ndarray]:
+    def extract_spectral_features(self, y: np.ndarray, sr: int,
+                                  S: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
         """
         Extract spectral features (centroid, rolloff, bandwidth).
         
         Args:
             y: Audio time series
             sr: Sample rate
+            S: Precomputed magnitude spectrogram (skips three STFTs)
             
         Returns:
             Dictionary of spectral features
         """
-        spectral_centroids = librosa.feature.spectral_centroid(
-            y=y, sr=sr, hop_length=self.hop_length
-        )[0]
+        if S is None:
+            S = self._shared_spectrogram(y)
         
-        spectral_rolloff = librosa.feature.spectral_rolloff(
-            y=y, sr=sr, hop_length=self.hop_length
-        )[0]
-        
-        spectral_bandwidth = librosa.feature.spectral_bandwidth(
-            y=y, sr=sr, hop_length=self.hop_length
-        )[0]
+        if SPECTRAL_KERNELS_AVAILABLE:
+            # One fused pass over S for all three
+            spectral_centroids, spectral_bandwidth, spectral_rolloff = spectral_shape(
+                S, librosa.fft_frequencies(sr=sr, n_fft=self.n_fft)
+            )
+        else:
+            spectral_centroids = librosa.feature.spectral_centroid(
+                S=S, sr=sr, n_fft=self.n_fft, hop_length=self.hop_length
+            )[0]
+            
+            spectral_rolloff = librosa.feature.spectral_rolloff(
+                S=S, sr=sr, n_fft=self.n_fft, hop_length=self.hop_length
+            )[0]
+            
+            spectral_bandwidth = librosa.feature.spectral_bandwidth(
+                S=S, sr=sr, n_fft=self.n_fft, hop_length=self.hop_length
+            )[0]
         
         zero_crossing_rate = librosa.feature.zero_crossing_rate(
             y, hop_length=self.hop_length
@@ -144,18 +241,22 @@ class AudioAnalyzer:
             "zero_crossing_rate": zero_crossing_rate
         }
     
-    def extract_tempo(self, y: np.ndarray, sr: int) -> Tuple[float, np.ndarray]:
+    def extract_tempo(self, y: np.ndarray, sr: int,
+                      onset_envelope: Optional[np.ndarray] = None) -> Tuple[float, np.ndarray]:
         """
         Extract tempo (BPM) and beat frames.
         
         Args:
             y: Audio time series
             sr: Sample rate
+            onset_envelope: Precomputed onset strength (skips the mel spectrogram)
             
         Returns:
             Tuple of (tempo, beat_frames)
         """
-        tempo, beat_frames = librosa.beat.beat_track(y=y, sr=sr)
+        tempo, beat_frames = librosa.beat.beat_track(
+            y=y, sr=sr, onset_envelope=onset_envelope, hop_length=self.hop_length
+        )
         # tempo is returned as numpy array in newer versions
         if isinstance(tempo, np.ndarray):
             tempo = float(tempo)
@@ -175,7 +276,54 @@ class AudioAnalyzer:
         rms = librosa.feature.rms(y=y, hop_length=self.hop_length)[0]
         return rms
     
-    def compute_fingerprint(self, y: np.ndarray, sr: int) -> np.ndarray:
+    @staticmethod
+    def _pack_fingerprint(mfcc_mean: np.ndarray, mfcc_std: np.ndarray,
+                          chroma_mean: np.ndarray, chroma_std: np.ndarray) -> np.ndarray:
+        """
+        Write fingerprint statistics into one preallocated float16 vector.
+        Half precision is plenty for a summary vector and halves its size
+        for storage (tobytes()) and pairwise comparison.
+        
+        Args:
+            mfcc_mean: Per-coefficient MFCC mean
+            mfcc_std: Per-coefficient MFCC std
+            chroma_mean: Per-pitch-class chroma mean
+            chroma_std: Per-pitch-class chroma std
+            
+        Returns:
+            Fingerprint vector (float16)
+        """
+        n_mfcc, n_chroma = len(mfcc_mean), len(chroma_mean)
+        out = np.empty(2 * n_mfcc + 2 * n_chroma, dtype=np.float16)
+        out[:n_mfcc] = mfcc_mean
+        out[n_mfcc:2 * n_mfcc] = mfcc_std
+        out[2 * n_mfcc:2 * n_mfcc + n_chroma] = chroma_mean
+        out[2 * n_mfcc + n_chroma:] = chroma_std
+        return out
+    
+    @staticmethod
+    def fingerprint_similarity(query: np.ndarray, fingerprints: np.ndarray) -> np.ndarray:
+        """
+        Cosine similarity of one fingerprint against many in a single matmul.
+        
+        Args:
+            query: Fingerprint vector
+            fingerprints: Fingerprints stacked as rows (n_tracks x dim)
+            
+        Returns:
+            Similarity per row of fingerprints
+        """
+        # float16 has no BLAS path; normalise and multiply in float32
+        q = np.asarray(query, dtype=np.float32)
+        F = np.atleast_2d(np.asarray(fingerprints, dtype=np.float32))
+        q_norm = np.linalg.norm(q)
+        F_norms = np.linalg.norm(F, axis=1)
+        F_norms[F_norms == 0] = 1.0
+        return (F @ (q / (q_norm or 1.0))) / F_norms
+    
+    def compute_fingerprint(self, y: np.ndarray, sr: int,
+                            mfcc: Optional[np.ndarray] = None,
+                            chroma: Optional[np.ndarray] = None) -> np.ndarray:
         """
         Compute a compact audio fingerprint for fast similarity matching.
         Uses averaged MFCC and chroma features.
@@ -183,29 +331,23 @@ class AudioAnalyzer:
         Args:
             y: Audio time series
             sr: Sample rate
+            mfcc: Already extracted MFCCs, if available
+            chroma: Already extracted chroma, if available
             
         Returns:
-            Feature vector (fingerprint)
+            Feature vector (fingerprint, float16)
         """
         # Extract features
-        mfcc = self.extract_mfcc(y, sr)
-        chroma = self.extract_chroma(y, sr)
+        if mfcc is None:
+            mfcc = self.extract_mfcc(y, sr)
+        if chroma is None:
+            chroma = self.extract_chroma(y, sr)
         
         # Compute statistics (mean and std) across time
-        mfcc_mean = np.mean(mfcc, axis=1)
-        mfcc_std = np.std(mfcc, axis=1)
-        chroma_mean = np.mean(chroma, axis=1)
-        chroma_std = np.std(chroma, axis=1)
-        
-        # Concatenate into single feature vector
-        fingerprint = np.concatenate([
-            mfcc_mean,
-            mfcc_std,
-            chroma_mean,
-            chroma_std
-        ])
-        
-        return fingerprint
+        mfcc_mean, mfcc_std, _, _ = _row_stats(mfcc)
+        chroma_mean, chroma_std, _, _ = _row_stats(chroma)
+        
+        return self._pack_fingerprint(mfcc_mean, mfcc_std, chroma_mean, chroma_std)
     
     def extract_all_features(self, audio_path: str) -> Dict:
         """
@@ -221,65 +363,136 @@ class AudioAnalyzer:
         Raises:
             Exception: If feature extraction fails
         """
+        # librosa warns about things like audioread fallbacks and short
+        # signals; silence them for this call only, not process-wide
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            if self.feature_cache is not None:
+                return self.feature_cache.get_or_compute(audio_path, self._extract_all_features)
+            return self._extract_all_features(audio_path)
+    
+    def extract_features_from_signal(self, y: np.ndarray, sr: int) -> Dict:
+        """
+        Extract the same features as extract_all_features from an
+        already-decoded signal, e.g. a window loaded with load_audio.
+        Results are not cached, since there is no file to key them on.
+        
+        Args:
+            y: Mono audio time series at self.sample_rate
+            sr: Sample rate of y
+            
+        Returns:
+            Dictionary containing all extracted features
+            
+        Raises:
+            Exception: If feature extraction fails
+        """
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            try:
+                return self._features_from_signal(y, sr)
+            except Exception as e:
+                raise Exception(f"Feature extraction failed: {str(e)}")
+    
+    def _extract_all_features(self, audio_path: str) -> Dict:
         try:
-            # Load audio
             y, sr = self.load_audio(audio_path)
-            y = self.normalize_audio(y)
+            return self._features_from_signal(y, sr)
+        except Exception as e:
+            raise Exception(f"Feature extraction failed: {str(e)}")
+    
+    def _features_from_signal(self, y: np.ndarray, sr: int) -> Dict:
+        y = self.normalize_audio(y)
+        
+        # Get audio duration
+        duration = librosa.get_duration(y=y, sr=sr)
+        
+        # One STFT feeds MFCC, chroma, the spectral features and the onset
+        # envelope for beat tracking, instead of each recomputing it
+        S = self._shared_spectrogram(y)
+        S_power = S ** 2
+        log_mel = librosa.power_to_db(
+            librosa.feature.melspectrogram(S=S_power, sr=sr)
+        )
+        
+        # Extract all features; they are independent and spend most of
+        # their time in numpy code that releases the GIL, so run them
+        # side by side when there is more than one core
+        # partial binds the spectrograms now, so deleting the local names
+        # below drops only this frame's references
+        tasks = {
+            "chroma": functools.partial(self.extract_chroma, y, sr, S_power=S_power),
+            "mfcc": functools.partial(self.extract_mfcc, y, sr, log_mel=log_mel),
+            "spectral": functools.partial(self.extract_spectral_features, y, sr, S=S),
+            "tempo": lambda: self.extract_tempo(
+                y, sr, onset_envelope=librosa.onset.onset_strength(S=log_mel, sr=sr)
+            ),
+            "rms": functools.partial(self.extract_rms_energy, y),
+        }
+        pool = _get_feature_pool()
+        if pool is None:
+            results = {name: task() for name, task in tasks.items()}
+        else:
+            futures = {name: pool.submit(task) for name, task in tasks.items()}
+            results = {name: future.result() for name, future in futures.items()}
+        del tasks, S, S_power
+        
+        chroma = results["chroma"]
+        mfcc = results["mfcc"]
+        spectral_features = results["spectral"]
+        tempo, beat_frames = results["tempo"]
+        rms = results["rms"]
+        
+        # Each statistic set is computed once and shared with the fingerprint
+        mfcc_mean, mfcc_std, mfcc_min, mfcc_max = _row_stats(mfcc)
+        chroma_mean, chroma_std, _, _ = _row_stats(chroma)
+        fingerprint = self._pack_fingerprint(mfcc_mean, mfcc_std, chroma_mean, chroma_std)
+        spectral_stats = {
+            name: _row_stats(series)[:2] for name, series in spectral_features.items()
+        }
+        rms_mean, rms_std, _, _ = _row_stats(rms)
+        
+        # Compute feature statistics
+        features = {
+            "duration": float(duration),
+            "sample_rate": int(sr),
+            "tempo": float(tempo),
+            "n_beats": int(len(beat_frames)),
             
-            # Get audio duration
-            duration = librosa.get_duration(y=y, sr=sr)
+            # MFCC statistics
+            "mfcc_mean": mfcc_mean.tolist(),
+            "mfcc_std": mfcc_std.tolist(),
+            "mfcc_min": mfcc_min.tolist(),
+            "mfcc_max": mfcc_max.tolist(),
             
-            # Extract all features
-            mfcc = self.extract_mfcc(y, sr)
-            chroma = self.extract_chroma(y, sr)
-            spectral_features = self.extract_spectral_features(y, sr)
-            tempo, beat_frames = self.extract_tempo(y, sr)
-            rms = self.extract_rms_energy(y)
-            fingerprint = self.compute_fingerprint(y, sr)
+            # Chroma statistics
+            "chroma_mean": chroma_mean.tolist(),
+            "chroma_std": chroma_std.tolist(),
             
-            # Compute feature statistics
-            features = {
-                "duration": float(duration),
-                "sample_rate": int(sr),
-                "tempo": float(tempo),
-                "n_beats": int(len(beat_frames)),
-                
-                # MFCC statistics
-                "mfcc_mean": mfcc.mean(axis=1).tolist(),
-                "mfcc_std": mfcc.std(axis=1).tolist(),
-                "mfcc_min": mfcc.min(axis=1).tolist(),
-                "mfcc_max": mfcc.max(axis=1).tolist(),
-                
-                # Chroma statistics
-                "chroma_mean": chroma.mean(axis=1).tolist(),
-                "chroma_std": chroma.std(axis=1).tolist(),
-                
-                # Spectral feature statistics
-                "spectral_centroid_mean": float(spectral_features["spectral_centroid"].mean()),
-                "spectral_centroid_std": float(spectral_features["spectral_centroid"].std()),
-                "spectral_rolloff_mean": float(spectral_features["spectral_rolloff"].mean()),
-                "spectral_rolloff_std": float(spectral_features["spectral_rolloff"].std()),
-                "spectral_bandwidth_mean": float(spectral_features["spectral_bandwidth"].mean()),
-                "spectral_bandwidth_std": float(spectral_features["spectral_bandwidth"].std()),
-                "zero_crossing_rate_mean": float(spectral_features["zero_crossing_rate"].mean()),
-                "zero_crossing_rate_std": float(spectral_features["zero_crossing_rate"].std()),
-                
-                # Energy statistics
-                "rms_mean": float(rms.mean()),
-                "rms_std": float(rms.std()),
-                
-                # Compact fingerprint for fast matching
-                "fingerprint": fingerprint.tolist(),
-                
-                # Raw time-series features (for detailed comparison)
-                "mfcc_full": mfcc.tolist(),
-                "chroma_full": chroma.tolist(),
-            }
+            # Spectral feature statistics
+            "spectral_centroid_mean": float(spectral_stats["spectral_centroid"][0][0]),
+            "spectral_centroid_std": float(spectral_stats["spectral_centroid"][1][0]),
+            "spectral_rolloff_mean": float(spectral_stats["spectral_rolloff"][0][0]),
+            "spectral_rolloff_std": float(spectral_stats["spectral_rolloff"][1][0]),
+            "spectral_bandwidth_mean": float(spectral_stats["spectral_bandwidth"][0][0]),
+            "spectral_bandwidth_std": float(spectral_stats["spectral_bandwidth"][1][0]),
+            "zero_crossing_rate_mean": float(spectral_stats["zero_crossing_rate"][0][0]),
+            "zero_crossing_rate_std": float(spectral_stats["zero_crossing_rate"][1][0]),
             
-            return features
+            # Energy statistics
+            "rms_mean": float(rms_mean[0]),
+            "rms_std": float(rms_std[0]),
             
-        except Exception as e:
-            raise Exception(f"Feature extraction failed: {str(e)}")
+            # Compact fingerprint for fast matching
+            "fingerprint": fingerprint,
+            
+            # Raw time-series features (for detailed comparison); kept as
+            # ndarrays, since tolist() on thousands of frames dominated the call
+            "mfcc_full": mfcc,
+            "chroma_full": chroma,
+        }
+        
+        return features
     
     def get_audio_info(self, audio_path: str) -> Dict:
         """
@@ -293,13 +506,16 @@ class AudioAnalyzer:
             Dictionary with basic audio info
         """
         try:
-            y, sr = self.load_audio(audio_path)
-            duration = librosa.get_duration(y=y, sr=sr)
+            # Header-only for libsndfile formats; decode the rest as before
+            duration = probe_duration(audio_path)
+            if duration is None:
+                y, sr = self.load_audio(audio_path)
+                duration = librosa.get_duration(y=y, sr=sr)
             
             return {
                 "duration_seconds": float(duration),
-                "sample_rate": int(sr),
-                "n_samples": int(len(y)),
+                "sample_rate": int(self.sample_rate),
+                "n_samples": int(round(duration * self.sample_rate)),
                 "channels": 1,  # Mono after loading
             }
         except Exception as e:
@@ -307,16 +523,56 @@ class AudioAnalyzer:
 
 
 # Utility function for easy import
-def analyze_audio(audio_path: str, sample_rate: int = 22050) -> Dict:
+def analyze_audio(audio_path: str, sample_rate: int = 22050,
+                  cache_dir: Optional[str] = None) -> Dict:
     """
     Convenience function to analyze an audio file.
     
     Args:
         audio_path: Path to audio file
         sample_rate: Target sample rate (default: 22050 Hz)
+        cache_dir: Optional feature cache directory
         
     Returns:
         Dictionary of extracted features
     """
-    analyzer = AudioAnalyzer(sample_rate=sample_rate)
+    analyzer = AudioAnalyzer(sample_rate=sample_rate, cache_dir=cache_dir)
     return analyzer.extract_all_features(audio_path)
+
+
+def _init_batch_worker(sample_rate: int, cache_dir: Optional[str]) -> None:
+    """Create the worker's analyzer and warm librosa's numba kernels."""
+    global _batch_analyzer
+    _batch_analyzer = AudioAnalyzer(sample_rate=sample_rate, cache_dir=cache_dir)
+    # First calls JIT-compile librosa's numba code; pay that before real work
+    librosa.feature.mfcc(y=np.zeros(sample_rate, dtype=np.float32), sr=sample_rate)
+
+
+def _analyze_in_worker(audio_path: str) -> Dict:
+    return _batch_analyzer.extract_all_features(audio_path)
+
+
+def analyze_audio_batch(audio_paths: List[str], sample_rate: int = 22050,
+                        workers: Optional[int] = None,
+                        cache_dir: Optional[str] = None) -> List[Dict]:
+    """
+    Analyze many audio files across a process pool, one analyzer per process.
+    
+    Args:
+        audio_paths: Paths to audio files
+        sample_rate: Target sample rate (default: 22050 Hz)
+        workers: Number of worker processes (default: CPU count)
+        cache_dir: Optional feature cache directory
+        
+    Returns:
+        List of feature dictionaries, in the order of audio_paths
+        
+    Raises:
+        Exception: If feature extraction fails for any file
+    """
+    workers = workers or os.cpu_count() or 1
+    # A few chunks per worker balances load while keeping pickling overhead low
+    chunksize = max(1, len(audio_paths) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker,
+                             initargs=(sample_rate, cache_dir)) as pool:
+        return list(pool.map(_analyze_in_worker, audio_paths, chunksize=chunksize))
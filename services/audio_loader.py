@@ -0,0 +1,84 @@
+"""
+Audio Loading Service
+Decodes audio to mono at a target sample rate block by block, so only one
+block at the native rate is in memory at a time instead of the whole
+decoded file (librosa.load decodes everything, then downmixes and
+resamples). soundfile and soxr are installed with librosa.
+"""
+from typing import Optional
+
+import numpy as np
+import librosa
+import soundfile as sf
+import soxr
+
+# Decode window; ~30 s blocks keep libsndfile reads efficient while bounding memory
+BLOCK_SECONDS = 30
+
+# soxr medium quality: roughly half the resampling time of librosa's default
+# soxr_hq; its passband is ample for chroma/MFCC/pitch features
+RESAMPLE_QUALITY = "MQ"
+
+
+def load_mono(audio_path: str, sample_rate: int, offset: float = 0.0,
+              max_seconds: Optional[float] = None) -> np.ndarray:
+    """
+    Load an audio file as a mono float32 signal at sample_rate.
+
+    Args:
+        audio_path: Path to audio file
+        sample_rate: Target sample rate
+        offset: Start of the window to decode, in seconds
+        max_seconds: Length of the window; None decodes to the end
+
+    Returns:
+        Audio time series
+    """
+    try:
+        audio_file = sf.SoundFile(audio_path)
+    except RuntimeError:
+        # Formats libsndfile can't read (e.g. AAC/M4A) go through librosa/audioread
+        y, _ = librosa.load(audio_path, sr=sample_rate, mono=True, offset=offset,
+                            duration=max_seconds,
+                            res_type=f"soxr_{RESAMPLE_QUALITY.lower()}")
+        return y
+
+    with audio_file:
+        # Seeking is cheap in libsndfile, so a window only decodes its own frames
+        start = min(int(offset * audio_file.samplerate), audio_file.frames)
+        frames = -1 if max_seconds is None else int(max_seconds * audio_file.samplerate)
+        audio_file.seek(start)
+        # Files already at the target rate skip resampling entirely
+        resampler = None
+        if audio_file.samplerate != sample_rate:
+            resampler = soxr.ResampleStream(
+                audio_file.samplerate, sample_rate, 1, dtype="float32", quality=RESAMPLE_QUALITY
+            )
+        parts = []
+        for block in audio_file.blocks(blocksize=BLOCK_SECONDS * audio_file.samplerate,
+                                       frames=frames, dtype="float32", always_2d=True):
+            mono = block.mean(axis=1)
+            parts.append(resampler.resample_chunk(mono) if resampler else mono)
+        if resampler:
+            parts.append(resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True))
+
+    if not parts:
+        return np.zeros(0, dtype=np.float32)
+    return np.concatenate(parts)
+
+
+def probe_duration(audio_path: str) -> Optional[float]:
+    """
+    Duration in seconds from the file header alone, without decoding.
+
+    Args:
+        audio_path: Path to audio file
+
+    Returns:
+        Duration, or None for formats libsndfile can't read
+    """
+    try:
+        info = sf.info(audio_path)
+    except RuntimeError:
+        return None
+    return info.frames / info.samplerate
@@ -0,0 +1,252 @@
+"""
+DTW Kernels
+Accumulated-cost recurrence for distance-only DTW, advanced one block of
+cost rows at a time and optionally restricted to a Sakoe-Chiba band, plus
+a FastDTW-style multi-resolution alignment for long sequences. Compiled
+with numba when available (librosa already depends on it); otherwise a
+vectorized numpy version is used and fast_dtw is unavailable.
+"""
+from typing import Optional, Tuple
+
+import numpy as np
+from scipy.ndimage import maximum_filter1d, minimum_filter1d
+
+try:
+    from numba import njit
+except ImportError:  # pragma: no cover - numba ships with librosa
+    njit = None
+
+
+def band_bounds(n_rows: int, n_cols: int, window_ratio: Optional[float]) -> np.ndarray:
+    """
+    Inclusive column range of a Sakoe-Chiba band for every row.
+    Same band as librosa.sequence.dtw(global_constraints=True,
+    band_rad=window_ratio): the radius is a fraction of the shorter
+    sequence, widened by the length difference on the longer side.
+
+    Args:
+        n_rows: Frames in the first sequence
+        n_cols: Frames in the second sequence
+        window_ratio: Band radius as a fraction of min(n_rows, n_cols); None for no band
+
+    Returns:
+        Array (n_rows x 2) of [first_col, last_col] per row
+    """
+    rows = np.arange(n_rows)
+    if window_ratio is None:
+        return np.stack([np.zeros(n_rows, dtype=np.int64),
+                         np.full(n_rows, n_cols - 1, dtype=np.int64)], axis=1)
+    radius = max(1, int(np.round(window_ratio * min(n_rows, n_cols))))
+    offset = abs(n_rows - n_cols)
+    if n_rows <= n_cols:
+        lo_off, hi_off = -(radius - 1), radius + offset - 1
+    else:
+        lo_off, hi_off = -(radius + offset - 1), radius - 1
+    return np.stack([np.clip(rows + lo_off, 0, n_cols - 1),
+                     np.clip(rows + hi_off, 0, n_cols - 1)], axis=1).astype(np.int64)
+
+
+def _accumulate_rows_numpy(C: np.ndarray, prev: np.ndarray, prev_len: np.ndarray,
+                           bounds: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    for c_row, (lo, hi) in zip(C, bounds):
+        c = c_row[lo:hi + 1]
+        cols = np.arange(len(c))
+        S = np.cumsum(c, dtype=np.float64)
+        # Best of the vertical and diagonal predecessors for each column
+        up, up_len = prev[lo:hi + 1], prev_len[lo:hi + 1]
+        diag = np.concatenate(([prev[lo - 1] if lo > 0 else np.inf], prev[lo:hi]))
+        diag_len = np.concatenate(([prev_len[lo - 1] if lo > 0 else 0], prev_len[lo:hi]))
+        use_diag = diag <= up
+        b = np.where(use_diag, diag, up)
+        b_len = np.where(use_diag, diag_len, up_len)
+        # The horizontal recurrence curr[j] = c[j] + min(b[j], curr[j-1])
+        # unrolls to S[j] + min over k <= j of (b[k] - S[k-1]), a running minimum
+        vals = b - (S - c)
+        running = np.minimum.accumulate(vals)
+        # Column where each running minimum was entered from the row above
+        k = np.maximum.accumulate(np.where(vals == running, cols, 0))
+        prev = np.full_like(prev, np.inf)
+        prev[lo:hi + 1] = S + running
+        prev_len = np.zeros_like(prev_len)
+        prev_len[lo:hi + 1] = b_len[k] + (cols - k + 1)
+    return prev, prev_len
+
+
+def _accumulate_rows_loop(C, prev, prev_len, bounds):
+    n, m = C.shape
+    curr = np.empty(m, dtype=np.float64)
+    curr_len = np.empty(m, dtype=np.int64)
+    for i in range(n):
+        lo = bounds[i, 0]
+        hi = bounds[i, 1]
+        curr[:] = np.inf
+        for j in range(lo, hi + 1):
+            # Ties prefer diagonal, then vertical, then horizontal
+            best = np.inf
+            best_len = 0
+            if j > 0:
+                best = prev[j - 1]
+                best_len = prev_len[j - 1]
+            if prev[j] < best:
+                best = prev[j]
+                best_len = prev_len[j]
+            if j > lo and curr[j - 1] < best:
+                best = curr[j - 1]
+                best_len = curr_len[j - 1]
+            curr[j] = C[i, j] + best
+            curr_len[j] = best_len + 1
+        prev, curr = curr, prev
+        prev_len, curr_len = curr_len, prev_len
+    return prev, prev_len
+
+
+# nogil: distance-only DTWs for different transpositions run on threads
+_accumulate_rows_jit = njit(cache=True, nogil=True)(_accumulate_rows_loop) if njit else None
+
+
+def accumulate_rows(C: np.ndarray, bounds: np.ndarray,
+                    prev: Optional[np.ndarray] = None,
+                    prev_len: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Advance the DTW accumulated cost over a block of cost-matrix rows.
+    Steps are diagonal, vertical and horizontal with unit weights, as in
+    librosa.sequence.dtw's defaults.
+
+    Args:
+        C: Block of local costs (rows x n_frames2); only in-band entries are read
+        bounds: [first_col, last_col] of each row's band (rows x 2), from band_bounds
+        prev: Accumulated cost of the row before the block (inf outside
+            its band); None for the first block
+        prev_len: Path length (cells) behind each entry of prev
+
+    Returns:
+        Tuple of (accumulated_cost, path_length) for the block's last row
+    """
+    if prev is None:
+        # First row: horizontal steps only
+        hi = bounds[0, 1]
+        prev = np.full(C.shape[1], np.inf)
+        prev[:hi + 1] = np.cumsum(C[0, :hi + 1], dtype=np.float64)
+        prev_len = np.zeros(C.shape[1], dtype=np.int64)
+        prev_len[:hi + 1] = np.arange(1, hi + 2)
+        C, bounds = C[1:], bounds[1:]
+    if len(C) == 0:
+        return prev, prev_len
+    if _accumulate_rows_jit is not None:
+        # C stays in its own dtype (float32 halves the bytes streamed);
+        # accumulation is float64 regardless
+        return _accumulate_rows_jit(np.ascontiguousarray(C),
+                                    prev.copy(), prev_len.copy(),
+                                    np.ascontiguousarray(bounds, dtype=np.int64))
+    return _accumulate_rows_numpy(C, prev, prev_len, bounds)
+
+
+def _windowed_dtw_loop(C, bounds):
+    n, m = C.shape
+    # Step taken into each in-window cell (0 diagonal, 1 vertical, 2
+    # horizontal), stored row by row for the window only
+    widths = bounds[:, 1] - bounds[:, 0] + 1
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    for i in range(n):
+        offsets[i + 1] = offsets[i] + widths[i]
+    steps = np.zeros(offsets[n], dtype=np.int8)
+    prev = np.full(m, np.inf)
+    curr = np.full(m, np.inf)
+    for i in range(n):
+        lo = bounds[i, 0]
+        hi = bounds[i, 1]
+        curr[:] = np.inf
+        for j in range(lo, hi + 1):
+            if i == 0 and j == 0:
+                curr[0] = C[0, 0]
+                continue
+            best = np.inf
+            step = 0
+            if i > 0 and j > 0:
+                best = prev[j - 1]
+            if i > 0 and prev[j] < best:
+                best = prev[j]
+                step = 1
+            if j > lo and curr[j - 1] < best:
+                best = curr[j - 1]
+                step = 2
+            curr[j] = C[i, j] + best
+            steps[offsets[i] + j - lo] = step
+        prev, curr = curr, prev
+    
+    # Backtrack from the end, like librosa's path (end first)
+    path = np.empty((n + m, 2), dtype=np.int64)
+    k = 0
+    i = n - 1
+    j = m - 1
+    while True:
+        path[k, 0] = i
+        path[k, 1] = j
+        k += 1
+        if i == 0 and j == 0:
+            break
+        step = steps[offsets[i] + j - bounds[i, 0]]
+        if step == 0:
+            i -= 1
+            j -= 1
+        elif step == 1:
+            i -= 1
+        else:
+            j -= 1
+    return prev[m - 1], path[:k]
+
+
+_windowed_dtw_jit = njit(cache=True, nogil=True)(_windowed_dtw_loop) if njit else None
+# The windowed DP is only practical compiled
+FAST_DTW_AVAILABLE = _windowed_dtw_jit is not None
+
+
+def _coarsen(C: np.ndarray) -> np.ndarray:
+    """Halve both axes of a cost matrix by averaging 2x2 cells (odd edges average fewer)."""
+    rows = np.arange(0, C.shape[0], 2)
+    cols = np.arange(0, C.shape[1], 2)
+    sums = np.add.reduceat(np.add.reduceat(C, rows, axis=0), cols, axis=1)
+    row_counts = np.diff(np.append(rows, C.shape[0]))
+    col_counts = np.diff(np.append(cols, C.shape[1]))
+    return sums / np.outer(row_counts, col_counts)
+
+
+def _project_path(path: np.ndarray, n_rows: int, n_cols: int, radius: int) -> np.ndarray:
+    """Per-row column window on the finer grid around a coarse path, widened by radius."""
+    lo = np.full(n_rows, n_cols - 1, dtype=np.int64)
+    hi = np.zeros(n_rows, dtype=np.int64)
+    for row_offset in (0, 1):
+        rows = np.minimum(2 * path[:, 0] + row_offset, n_rows - 1)
+        np.minimum.at(lo, rows, 2 * path[:, 1])
+        np.maximum.at(hi, rows, np.minimum(2 * path[:, 1] + 1, n_cols - 1))
+    lo = minimum_filter1d(lo, 2 * radius + 1, mode='nearest') - radius
+    hi = maximum_filter1d(hi, 2 * radius + 1, mode='nearest') + radius
+    return np.stack([np.clip(lo, 0, n_cols - 1), np.clip(hi, 0, n_cols - 1)], axis=1)
+
+
+def fast_dtw(C: np.ndarray, radius: int = 10, window_ratio: Optional[float] = None,
+             min_size: int = 64) -> Tuple[float, np.ndarray]:
+    """
+    Approximate DTW over a cost matrix in the manner of FastDTW: solve a
+    2x-coarsened problem recursively, project its path back, and run the
+    DP only in a window of the given radius around it. Accumulated cost is
+    kept for two rows and steps only inside the window, so time and extra
+    memory are O((N + M) * radius) rather than O(N * M).
+
+    Args:
+        C: Local cost matrix (n_frames1 x n_frames2)
+        radius: Window radius around the projected path, in cells
+        window_ratio: Sakoe-Chiba band applied at the coarsest level (None = none)
+        min_size: Side length below which the problem is solved exactly
+
+    Returns:
+        Tuple of (total_cost, path) where path lists (i, j) cells from the
+        end back to (0, 0), as librosa.sequence.dtw returns it
+    """
+    n, m = C.shape
+    if min(n, m) <= min_size:
+        bounds = band_bounds(n, m, window_ratio)
+    else:
+        _, coarse_path = fast_dtw(_coarsen(C), radius, window_ratio, min_size)
+        bounds = _project_path(coarse_path, n, m, radius)
+    return _windowed_dtw_jit(np.ascontiguousarray(C), np.ascontiguousarray(bounds))
@@ -0,0 +1,97 @@
+"""
+Feature Cache Service
+Stores extracted audio features on disk as .npz files keyed by the SHA-256
+of the audio file, so analyzing the same audio again skips decoding and
+the STFT/CQT work entirely.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+from typing import Callable, Dict, Tuple
+
+import numpy as np
+
+HASH_CHUNK_SIZE = 1 << 20
+
+
+class FeatureCache:
+    """
+    Directory of cached feature dictionaries, one .npz file per audio + settings.
+    """
+
+    def __init__(self, cache_dir: str, namespace: str):
+        """
+        Initialize the FeatureCache.
+
+        Args:
+            cache_dir: Directory holding the .npz files (created if missing)
+            namespace: Extractor name, feature version and settings; part of
+                every key so different analyzers, parameters or extraction
+                code never share an entry
+        """
+        self.cache_dir = cache_dir
+        self.namespace = namespace
+        # Cache file per (path, mtime, size): a file compared against many
+        # others is hashed once, and any rewrite of it changes the key
+        self._paths: Dict[Tuple[str, int, int], str] = {}
+        self._paths_lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, audio_path: str) -> str:
+        stat = os.stat(audio_path)
+        file_key = (os.path.realpath(audio_path), stat.st_mtime_ns, stat.st_size)
+        with self._paths_lock:
+            path = self._paths.get(file_key)
+        if path is not None:
+            return path
+
+        hasher = hashlib.sha256(self.namespace.encode())
+        with open(audio_path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                hasher.update(chunk)
+        path = os.path.join(self.cache_dir, f"{hasher.hexdigest()}.npz")
+        with self._paths_lock:
+            self._paths[file_key] = path
+        return path
+
+    def get_or_compute(self, audio_path: str, compute: Callable[[str], Dict]) -> Dict:
+        """
+        Return cached features for an audio file, computing and storing them on a miss.
+
+        Args:
+            audio_path: Path to audio file
+            compute: Extractor called with audio_path on a cache miss
+
+        Returns:
+            Feature dictionary (arrays as ndarrays, scalars as Python numbers)
+        """
+        path = self._path(audio_path)
+        if os.path.exists(path):
+            try:
+                with np.load(path) as archive:
+                    return {k: archive[k].item() if archive[k].ndim == 0 else archive[k]
+                            for k in archive.files}
+            except Exception as e:
+                # Corrupt or truncated entry: recompute it, the write below replaces it
+                print(f"⚠️ Ignoring unreadable feature cache entry {path}: {e}")
+
+        features = compute(audio_path)
+        # The cache is optional: a failed write (full or read-only cache
+        # directory) must not fail the analysis that produced the features
+        try:
+            self._store(path, features)
+        except Exception as e:
+            print(f"⚠️ Could not write feature cache entry {path}: {e}")
+        return features
+
+    def _store(self, path: str, features: Dict):
+        # Write then rename so concurrent readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez_compressed(f, **{k: np.asarray(v) for k, v in features.items()})
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
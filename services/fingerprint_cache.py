@@ -0,0 +1,71 @@
+"""
+Fingerprint Cache Service
+Stores Chromaprint fingerprints in a SQLite file keyed by (path, mtime, size),
+so identifying the same file again skips fpcalc and goes straight to the
+AcoustID lookup.
+"""
+import os
+import sqlite3
+from typing import Callable, Tuple
+
+DEFAULT_FINGERPRINT_CACHE = os.path.join(
+    os.path.expanduser("~"), ".cache", "musication", "fingerprints.sqlite"
+)
+
+
+class FingerprintCache:
+    """
+    SQLite table of (duration, fingerprint) per audio file version.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_FINGERPRINT_CACHE):
+        """
+        Initialize the FingerprintCache.
+
+        Args:
+            db_path: SQLite file holding the fingerprints (directory created if missing)
+        """
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS fingerprints ("
+                "path TEXT, mtime_ns INTEGER, size INTEGER, "
+                "duration REAL, fingerprint BLOB, "
+                "PRIMARY KEY (path, mtime_ns, size))"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # One short-lived connection per call, so worker threads never share one
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def get_or_compute(self, audio_path: str,
+                       compute: Callable[[str], Tuple[float, bytes]]) -> Tuple[float, bytes]:
+        """
+        Return the cached fingerprint of an audio file, computing and storing it on a miss.
+
+        Args:
+            audio_path: Path to audio file
+            compute: Fingerprinter called with audio_path on a cache miss
+
+        Returns:
+            Tuple of (duration, fingerprint)
+        """
+        stat = os.stat(audio_path)
+        # Any rewrite of the file changes mtime or size, and with it the key
+        key = (os.path.realpath(audio_path), stat.st_mtime_ns, stat.st_size)
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT duration, fingerprint FROM fingerprints "
+                "WHERE path = ? AND mtime_ns = ? AND size = ?", key
+            ).fetchone()
+        if row is not None:
+            return row[0], bytes(row[1])
+
+        duration, fingerprint = compute(audio_path)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO fingerprints VALUES (?, ?, ?, ?, ?)",
+                key + (float(duration), sqlite3.Binary(fingerprint)),
+            )
+        return duration, fingerprint
@@ -3,15 +3,32 @@ Melody and Harmony Analysis Service
 Extracts melody contours, HPCP features, and performs DTW-based similarity analysis.
 This module implements cover song identification techniques.
 """
+import os
 import numpy as np
 import librosa
-import librosa.display
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Tuple, Optional, List
 from scipy.spatial.distance import cdist
-from scipy.ndimage import median_filter
+from scipy.ndimage import maximum_filter, median_filter
+from .audio_loader import load_mono
+from .dtw_kernels import FAST_DTW_AVAILABLE, accumulate_rows, band_bounds, fast_dtw
+from .feature_cache import FeatureCache
 import warnings
 
-warnings.filterwarnings('ignore')
+# Part of every feature cache key; bump whenever extract_all_melody_features
+# output changes (pitch tracking, intervals, dtypes) so stale entries are missed
+FEATURE_VERSION = 2
+
+# pYIN frame: 1024 samples still spans >2 periods of C2 at 22.05 kHz and
+# halves the autocorrelation work of librosa's 2048 default
+PYIN_FRAME_LENGTH = 1024
+# Regions quieter than this (dB below peak) are unvoiced and skip pYIN
+SILENCE_TOP_DB = 60
+
+# Approximate (FastDTW) alignment kicks in above this many frames per side;
+# the projected path is refined within this many cells
+FAST_DTW_MIN_FRAMES = 2000
+FAST_DTW_RADIUS = 10
 
 
 class MelodyAnalyzer:
@@ -20,7 +37,8 @@ class MelodyAnalyzer:
     Implements techniques from music information retrieval research.
     """
     
-    def __init__(self, sample_rate: int = 22050, hop_length: int = 512, enable_melody: bool = True):
+    def __init__(self, sample_rate: int = 22050, hop_length: int = 512, enable_melody: bool = True,
+                 cache_dir: Optional[str] = None, cache_tag: str = ""):
         """
         Initialize the MelodyAnalyzer.
         
@@ -28,12 +46,21 @@ class MelodyAnalyzer:
             sample_rate: Target sample rate for audio processing
             hop_length: Number of samples between successive frames
             enable_melody: Whether to enable CREPE melody analysis (memory intensive)
+            cache_dir: Directory for cached extract_all_melody_features results
+                (keyed by audio content); None disables caching
+            cache_tag: Caller's own feature version, appended to the cache
+                namespace so a wrapping extractor's changes also miss the cache
         """
         self.sample_rate = sample_rate
         self.hop_length = hop_length
         # Reduce FFT size to save memory (1024 instead of 2048)
         self.n_fft = 1024
         self.enable_melody = enable_melody
+        self.feature_cache = FeatureCache(
+            cache_dir,
+            f"MelodyAnalyzer:v{FEATURE_VERSION}:sr={sample_rate}:hop={hop_length}:melody={enable_melody}"
+            + (f":{cache_tag}" if cache_tag else "")
+        ) if cache_dir else None
         
     def load_audio(self, audio_path: str) -> Tuple[np.ndarray, int]:
         """
@@ -45,10 +72,32 @@ class MelodyAnalyzer:
         Returns:
             Tuple of (audio_data, sample_rate)
         """
-        y, sr = librosa.load(audio_path, sr=self.sample_rate, mono=True)
-        return y, sr
+        return load_mono(audio_path, self.sample_rate), self.sample_rate
     
-    def extract_hpcp(self, y: np.ndarray, sr: int, n_bins: int = 36) -> np.ndarray:
+    def compute_cqt(self, y: np.ndarray, sr: int, bins_per_octave: int = 36) -> np.ndarray:
+        """
+        Compute the 7-octave CQT magnitude both chroma variants fold from.
+        Tuning is estimated once, as librosa.feature.chroma_cqt does internally.
+        
+        Args:
+            y: Audio time series
+            sr: Sample rate
+            bins_per_octave: CQT resolution (36 = 3 bins per semitone)
+            
+        Returns:
+            CQT magnitude (bins_per_octave * 7 x time_frames)
+        """
+        return np.abs(librosa.cqt(
+            y=y,
+            sr=sr,
+            hop_length=self.hop_length,
+            n_bins=bins_per_octave * 7,  # 7 octaves
+            bins_per_octave=bins_per_octave,
+            tuning=librosa.estimate_tuning(y=y, sr=sr, bins_per_octave=bins_per_octave)
+        ))
+    
+    def extract_hpcp(self, y: np.ndarray, sr: int, n_bins: int = 36,
+                     C: Optional[np.ndarray] = None) -> np.ndarray:
         """
         Extract Harmonic Pitch Class Profile (HPCP) features.
         HPCP is a refined version of chroma that better captures harmonic content.
@@ -58,18 +107,14 @@ class MelodyAnalyzer:
             y: Audio time series
             sr: Sample rate
             n_bins: Number of bins per octave (default 36 for 3 bins/semitone)
+            C: Precomputed CQT magnitude from compute_cqt with n_bins per octave
             
         Returns:
             HPCP features (n_bins x time_frames)
         """
         # Use CQT (Constant-Q Transform) for better pitch resolution
-        C = np.abs(librosa.cqt(
-            y=y,
-            sr=sr,
-            hop_length=self.hop_length,
-            n_bins=n_bins * 7,  # 7 octaves
-            bins_per_octave=n_bins
-        ))
+        if C is None:
+            C = self.compute_cqt(y, sr, bins_per_octave=n_bins)
         
         # Fold to single octave (pitch class)
         hpcp = librosa.feature.chroma_cqt(
@@ -82,7 +127,8 @@ class MelodyAnalyzer:
         
         return hpcp
     
-    def extract_chroma_cqt(self, y: np.ndarray, sr: int) -> np.ndarray:
+    def extract_chroma_cqt(self, y: np.ndarray, sr: int,
+                           C: Optional[np.ndarray] = None) -> np.ndarray:
         """
         Extract standard 12-bin chroma features using CQT.
         More robust than STFT-based chroma for pitch tracking.
@@ -90,14 +136,18 @@ class MelodyAnalyzer:
         Args:
             y: Audio time series
             sr: Sample rate
+            C: Precomputed CQT magnitude from compute_cqt (36 bins per octave)
             
         Returns:
             Chroma features (12 x time_frames)
         """
+        if C is None:
+            C = self.compute_cqt(y, sr)
         chroma = librosa.feature.chroma_cqt(
-            y=y,
+            C=C,
             sr=sr,
-            hop_length=self.hop_length
+            hop_length=self.hop_length,
+            bins_per_octave=36
         )
         return chroma
     
@@ -116,16 +166,34 @@ class MelodyAnalyzer:
             and voiced_flag indicates voiced/unvoiced frames
         """
         if method == 'pyin':
-            # pYIN is more robust for melody extraction
-            f0, voiced_flag, voiced_probs = librosa.pyin(
-                y,
-                fmin=librosa.note_to_hz('C2'),  # ~65 Hz
-                fmax=librosa.note_to_hz('C7'),  # ~2093 Hz
-                sr=sr,
-                hop_length=self.hop_length
+            # pYIN is more robust for melody extraction, and by far the most
+            # expensive call here; run it only on the non-silent regions
+            y = y.astype(np.float32, copy=False)
+            n_frames = 1 + len(y) // self.hop_length
+            f0 = np.zeros(n_frames, dtype=np.float32)
+            voiced_flag = np.zeros(n_frames, dtype=bool)
+            
+            intervals = librosa.effects.split(
+                y, top_db=SILENCE_TOP_DB, frame_length=PYIN_FRAME_LENGTH, hop_length=self.hop_length
             )
-            # Replace NaN with 0 for unvoiced frames
-            f0 = np.nan_to_num(f0, nan=0.0)
+            for start, end in intervals:
+                if end - start < PYIN_FRAME_LENGTH:
+                    continue
+                # fill_na=0.0 marks unvoiced frames directly, no NaN pass afterwards
+                seg_f0, seg_voiced, _ = librosa.pyin(
+                    y[start:end],
+                    fmin=librosa.note_to_hz('C2'),  # ~65 Hz
+                    fmax=librosa.note_to_hz('C7'),  # ~2093 Hz
+                    sr=sr,
+                    frame_length=PYIN_FRAME_LENGTH,
+                    hop_length=self.hop_length,
+                    fill_na=0.0
+                )
+                # split() boundaries are hop-aligned, so frames line up with the full signal
+                first = start // self.hop_length
+                count = min(len(seg_f0), n_frames - first)
+                f0[first:first + count] = seg_f0[:count]
+                voiced_flag[first:first + count] = seg_voiced[:count]
             return f0, voiced_flag
         
         else:  # piptrack fallback
@@ -138,13 +206,8 @@ class MelodyAnalyzer:
             )
             
             # Select pitch with highest magnitude in each frame
-            f0 = []
-            for t in range(pitches.shape[1]):
-                index = magnitudes[:, t].argmax()
-                pitch = pitches[index, t]
-                f0.append(pitch)
-            
-            f0 = np.array(f0)
+            index = magnitudes.argmax(axis=0)
+            f0 = pitches[index, np.arange(pitches.shape[1])]
             voiced_flag = f0 > 0
             return f0, voiced_flag
     
@@ -188,7 +251,8 @@ class MelodyAnalyzer:
         return f0_smoothed
     
     def beat_synchronize_features(self, features: np.ndarray, y: np.ndarray, 
-                                  sr: int) -> Tuple[np.ndarray, np.ndarray]:
+                                  sr: int,
+                                  beat_frames: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
         """
         Synchronize features to beat positions for tempo-invariant comparison.
         
@@ -196,27 +260,94 @@ class MelodyAnalyzer:
             features: Time-varying features (n_features x n_frames)
             y: Audio time series
             sr: Sample rate
+            beat_frames: Already tracked beat frames (skips beat tracking)
             
         Returns:
             Tuple of (beat_sync_features, beat_times)
         """
         # Detect beats
-        tempo, beat_frames = librosa.beat.beat_track(
-            y=y,
-            sr=sr,
-            hop_length=self.hop_length
-        )
+        if beat_frames is None:
+            _, beat_frames = librosa.beat.beat_track(
+                y=y,
+                sr=sr,
+                hop_length=self.hop_length
+            )
         
         # Aggregate features at beat positions
-        beat_features = librosa.util.sync(features, beat_frames, aggregate=np.median)
+        beat_features = self._segment_median(features, beat_frames)
         
         # Convert beat frames to time
         beat_times = librosa.frames_to_time(beat_frames, sr=sr, hop_length=self.hop_length)
         
         return beat_features, beat_times
     
+    @staticmethod
+    def _segment_median(features: np.ndarray, boundaries: np.ndarray) -> np.ndarray:
+        """
+        Median of each column segment between boundaries, for all rows at once.
+        Same result as librosa.util.sync(..., aggregate=np.median), which
+        calls np.median once per beat in a Python loop; here one lexsort
+        orders every row within its segment and the medians are gathered
+        by index.
+        
+        Args:
+            features: Time-varying features (n_features x n_frames)
+            boundaries: Segment start frames (e.g. beat frames)
+            
+        Returns:
+            Segment medians (n_features x n_segments)
+        """
+        n_frames = features.shape[1]
+        # Like librosa.util.fix_frames(pad=True): clip, add both ends, dedupe
+        edges = np.unique(np.concatenate([[0], np.clip(boundaries, 0, n_frames), [n_frames]]))
+        starts, lengths = edges[:-1], np.diff(edges)
+        
+        segment_ids = np.repeat(np.arange(len(starts)), lengths)
+        order = np.lexsort((features, np.broadcast_to(segment_ids, features.shape)))
+        ordered = np.take_along_axis(features, order, axis=1)
+        
+        # Odd lengths take the middle value; even lengths average the middle pair
+        upper = ordered[:, starts + lengths // 2]
+        lower = ordered[:, starts + (lengths - 1) // 2]
+        return (upper + lower) / 2
+    
+    @staticmethod
+    def _cosine_distance_matrix(X: np.ndarray, Y: np.ndarray) -> np.ndarray:
+        """
+        Cosine distance between all frame pairs as one float32 matrix product
+        (BLAS GEMM) instead of cdist's float64 pairwise loop. All-zero frames
+        (silence) get distance 1 from everything rather than NaN.
+        
+        Args:
+            X: First frame sequence (n_frames1 x n_features)
+            Y: Second frame sequence (n_frames2 x n_features)
+            
+        Returns:
+            Distance matrix (n_frames1 x n_frames2), float32
+        """
+        return MelodyAnalyzer._unit_cosine_distance(MelodyAnalyzer._unit_frames(X),
+                                                    MelodyAnalyzer._unit_frames(Y))
+    
+    @staticmethod
+    def _unit_frames(X: np.ndarray) -> np.ndarray:
+        """Frames (rows) scaled to unit L2 norm as float32; all-zero frames stay zero."""
+        X = np.asarray(X, dtype=np.float32)
+        norm = np.linalg.norm(X, axis=1, keepdims=True)
+        return X / np.where(norm > 0, norm, 1.0)
+    
+    @staticmethod
+    def _unit_cosine_distance(X: np.ndarray, Y: np.ndarray) -> np.ndarray:
+        """Cosine distance between frames already passed through _unit_frames."""
+        C = X @ Y.T
+        np.subtract(1.0, C, out=C)
+        # Rounding can push identical frames a hair below zero
+        np.clip(C, 0.0, 2.0, out=C)
+        return C
+    
     def compute_dtw_alignment(self, features1: np.ndarray, features2: np.ndarray,
-                             metric: str = 'cosine') -> Tuple[float, np.ndarray, np.ndarray]:
+                             metric: str = 'cosine',
+                             window_ratio: Optional[float] = None,
+                             approximate: bool = False) -> Tuple[float, np.ndarray, np.ndarray]:
         """
         Compute Dynamic Time Warping alignment between two feature sequences.
         
@@ -224,6 +355,10 @@ class MelodyAnalyzer:
             features1: First feature sequence (n_features x n_frames1)
             features2: Second feature sequence (n_features x n_frames2)
             metric: Distance metric ('cosine', 'euclidean', etc.)
+            window_ratio: Sakoe-Chiba band radius as a fraction of the shorter
+                sequence (None = unconstrained warping)
+            approximate: Use multi-resolution FastDTW when a sequence is longer
+                than FAST_DTW_MIN_FRAMES (exact DTW otherwise)
             
         Returns:
             Tuple of (dtw_distance, cost_matrix, alignment_path)
@@ -234,16 +369,88 @@ class MelodyAnalyzer:
         Y = features2.T
         
         # Compute frame-to-frame distance matrix
-        C = cdist(X, Y, metric=metric)
+        C = self._distance_matrix(X, Y, metric)
         
         # Compute DTW
-        D, wp = librosa.sequence.dtw(C=C, backtrack=True)
+        if approximate and FAST_DTW_AVAILABLE and max(C.shape) > FAST_DTW_MIN_FRAMES:
+            total_cost, wp = fast_dtw(C, radius=FAST_DTW_RADIUS, window_ratio=window_ratio)
+            return total_cost / len(wp), C, wp
+        if window_ratio is None:
+            D, wp = librosa.sequence.dtw(C=C, backtrack=True)
+        else:
+            D, wp = librosa.sequence.dtw(C=C, backtrack=True,
+                                         global_constraints=True, band_rad=window_ratio)
         
         # DTW distance (normalized)
         dtw_distance = D[-1, -1] / (len(wp))
         
         return dtw_distance, C, wp
     
+    def _distance_matrix(self, X: np.ndarray, Y: np.ndarray, metric: str) -> np.ndarray:
+        """Frame-to-frame distances between row-wise frames X and Y."""
+        if metric == 'cosine':
+            return self._cosine_distance_matrix(X, Y)
+        if metric == 'euclidean' and X.shape[1] == 1:
+            # 1-D contours: |x - y| via a broadcast subtract, no per-cell sqrt
+            return np.abs(np.subtract.outer(X[:, 0], Y[:, 0]))
+        return cdist(X, Y, metric=metric)
+    
+    def compute_dtw_distance(self, features1: np.ndarray, features2: np.ndarray,
+                             metric: str = 'cosine', block_rows: int = 256,
+                             window_ratio: Optional[float] = None,
+                             abandon_above: float = np.inf) -> float:
+        """
+        DTW distance only, without the cost matrix or alignment path.
+        Keeps two rows of the accumulated cost (plus path lengths) and builds
+        the frame distances a block of rows at a time, so memory is
+        O(block_rows * n_frames2) instead of two full n_frames1 x n_frames2
+        matrices. With a band, only in-band distances are computed and
+        accumulated, O(n_frames1 * band) work. Same steps, band and
+        normalization as compute_dtw_alignment.
+        
+        Args:
+            features1: First feature sequence (n_features x n_frames1)
+            features2: Second feature sequence (n_features x n_frames2)
+            metric: Distance metric ('cosine', 'euclidean', etc.)
+            block_rows: Rows of the distance matrix computed per block
+            window_ratio: Sakoe-Chiba band radius as a fraction of the shorter
+                sequence (None = unconstrained warping)
+            abandon_above: Stop early and return inf once the normalized
+                distance is certain to exceed this (for searches keeping a best)
+            
+        Returns:
+            DTW distance normalized by alignment path length
+        """
+        X = features1.T
+        Y = features2.T
+        if metric == 'cosine':
+            # Normalize every frame once up front; each block is then a
+            # plain matrix product instead of renormalizing both sides
+            X, Y = self._unit_frames(X), self._unit_frames(Y)
+            block_distance = self._unit_cosine_distance
+        else:
+            def block_distance(A, B):
+                return self._distance_matrix(A, B, metric)
+        bounds = band_bounds(len(X), len(Y), window_ratio)
+        prev = prev_len = None
+        # Costs are non-negative and no path is longer than this, so a row
+        # minimum over max_path_len bounds the final normalized distance
+        max_path_len = len(X) + len(Y) - 1
+        
+        for start in range(0, len(X), block_rows):
+            block = bounds[start:start + block_rows]
+            # Bands move right monotonically, so the block needs one column span
+            first, last = block[0, 0], block[-1, 1]
+            C = np.full((len(block), len(Y)), np.inf, dtype=np.float32)
+            C[:, first:last + 1] = block_distance(
+                X[start:start + block_rows], Y[first:last + 1]
+            )
+            prev, prev_len = accumulate_rows(C, block, prev, prev_len)
+            if prev.min() / max_path_len > abandon_above:
+                return np.inf
+        
+        return float(prev[-1] / prev_len[-1])
+    
     def compute_local_alignment(self, C: np.ndarray, 
                                window_size: int = 50) -> List[Dict]:
         """
@@ -259,30 +466,41 @@ class MelodyAnalyzer:
         # Invert cost to similarity (lower cost = higher similarity)
         similarity = 1.0 / (1.0 + C)
         
-        # Find local maxima
-        local_regions = []
-        
         n_frames1, n_frames2 = similarity.shape
         stride = window_size // 2
+        starts1 = np.arange(0, n_frames1 - window_size, stride)
+        starts2 = np.arange(0, n_frames2 - window_size, stride)
+        if len(starts1) == 0 or len(starts2) == 0:
+            return []
+        
+        # Window means from a summed-area table: four lookups per window
+        # instead of summing window_size^2 cells
+        integral = np.zeros((n_frames1 + 1, n_frames2 + 1))
+        integral[1:, 1:] = similarity.cumsum(axis=0).cumsum(axis=1)
+        i0, j0 = starts1[:, None], starts2[None, :]
+        i1, j1 = i0 + window_size, j0 + window_size
+        mean_sim = (integral[i1, j1] - integral[i0, j1] - integral[i1, j0] + integral[i0, j0]) \
+            / (window_size * window_size)
+        
+        # Window maxima: separable max filter anchored at each window's top-left corner
+        max_sim = maximum_filter(similarity, size=window_size, origin=-(window_size // 2))[i0, j0]
+        
+        # Threshold for similarity; argwhere keeps the row-major scan order so
+        # the stable sort orders ties as before
+        hits = np.argwhere(mean_sim > 0.7)
+        order = np.argsort(-mean_sim[hits[:, 0], hits[:, 1]], kind='stable')
         
-        for i in range(0, n_frames1 - window_size, stride):
-            for j in range(0, n_frames2 - window_size, stride):
-                window = similarity[i:i+window_size, j:j+window_size]
-                mean_sim = np.mean(window)
-                max_sim = np.max(window)
-                
-                if mean_sim > 0.7:  # Threshold for similarity
-                    local_regions.append({
-                        'track1_start_frame': i,
-                        'track1_end_frame': i + window_size,
-                        'track2_start_frame': j,
-                        'track2_end_frame': j + window_size,
-                        'similarity_score': float(mean_sim),
-                        'max_similarity': float(max_sim)
-                    })
-        
-        # Sort by similarity score
-        local_regions = sorted(local_regions, key=lambda x: x['similarity_score'], reverse=True)
+        local_regions = []
+        for a, b in hits[order]:
+            i, j = int(starts1[a]), int(starts2[b])
+            local_regions.append({
+                'track1_start_frame': i,
+                'track1_end_frame': i + window_size,
+                'track2_start_frame': j,
+                'track2_end_frame': j + window_size,
+                'similarity_score': float(mean_sim[a, b]),
+                'max_similarity': float(max_sim[a, b])
+            })
         
         return local_regions
     
@@ -301,36 +519,79 @@ class MelodyAnalyzer:
         # Circular shift along pitch class dimension
         return np.roll(chroma, semitones, axis=0)
     
+    def estimate_transposition(self, chroma1: np.ndarray, chroma2: np.ndarray) -> int:
+        """
+        Estimate the key shift between two chroma sequences with the Optimal
+        Transposition Index: the circular shift of track 2's global chroma
+        profile that best matches track 1's, from one FFT cross-correlation
+        instead of 12 DTWs.
+        
+        Args:
+            chroma1: First chroma sequence (12 x n_frames)
+            chroma2: Second chroma sequence (12 x n_frames)
+            
+        Returns:
+            Semitones to shift chroma2 by (0-11, as used by transpose_chroma)
+        """
+        return int(np.argmax(self._transposition_scores(chroma1, chroma2)))
+    
+    @staticmethod
+    def _transposition_scores(chroma1: np.ndarray, chroma2: np.ndarray) -> np.ndarray:
+        """Global chroma profile agreement for each of the 12 shifts of chroma2."""
+        profile1 = chroma1.mean(axis=1)
+        profile2 = chroma2.mean(axis=1)
+        profile1 = profile1 / (profile1.max() or 1.0)
+        profile2 = profile2 / (profile2.max() or 1.0)
+        # Circular cross-correlation via the FFT: entry k equals
+        # np.dot(profile1, np.roll(profile2, k)), all 12 shifts at once
+        spectrum = np.fft.rfft(profile1) * np.conj(np.fft.rfft(profile2))
+        return np.fft.irfft(spectrum, n=len(profile1))
+    
     def find_best_transposition(self, chroma1: np.ndarray, 
-                               chroma2: np.ndarray) -> Tuple[int, float]:
+                               chroma2: np.ndarray,
+                               exhaustive: bool = False) -> Tuple[int, float]:
         """
         Find the best transposition between two chroma sequences.
-        Tests all 12 possible transpositions.
+        By default the shift comes from estimate_transposition and a single
+        DTW scores it; exhaustive=True tests all 12 transpositions with DTW
+        (for validating the estimate).
         
         Args:
             chroma1: First chroma sequence (12 x n_frames)
             chroma2: Second chroma sequence (12 x n_frames)
+            exhaustive: Run DTW for every shift instead of estimating it
             
         Returns:
             Tuple of (best_semitones, best_similarity)
         """
-        best_semitones = 0
-        best_similarity = -np.inf
+        if not exhaustive:
+            shift = self.estimate_transposition(chroma1, chroma2)
+            distance = self.compute_dtw_distance(
+                chroma1, self.transpose_chroma(chroma2, shift), metric='cosine'
+            )
+            return shift, 1.0 / (1.0 + distance)
+        
+        # Score the likeliest key first; its distance lets the other 11
+        # DTWs abandon early, and those run side by side (the DTW kernel
+        # and the distance GEMMs release the GIL)
+        shifts = [int(shift) for shift in self._transposition_scores(chroma1, chroma2).argsort()[::-1]]
+        seed_distance = self.compute_dtw_distance(
+            chroma1, self.transpose_chroma(chroma2, shifts[0]), metric='cosine'
+        )
         
-        for shift in range(12):
-            chroma2_shifted = self.transpose_chroma(chroma2, shift)
-            
-            # Compute DTW distance
-            distance, _, _ = self.compute_dtw_alignment(chroma1, chroma2_shifted, metric='cosine')
-            
-            # Convert to similarity (lower distance = higher similarity)
-            similarity = 1.0 / (1.0 + distance)
-            
-            if similarity > best_similarity:
-                best_similarity = similarity
-                best_semitones = shift
+        def score(shift: int) -> float:
+            return self.compute_dtw_distance(
+                chroma1, self.transpose_chroma(chroma2, shift), metric='cosine',
+                abandon_above=seed_distance
+            )
+        
+        with ThreadPoolExecutor(max_workers=min(11, os.cpu_count() or 1)) as pool:
+            distances = [seed_distance] + list(pool.map(score, shifts[1:]))
         
-        return best_semitones, best_similarity
+        # Convert to similarity (lower distance = higher similarity); ties
+        # keep the likelier key
+        best = int(np.argmin(distances))
+        return shifts[best], 1.0 / (1.0 + distances[best])
     
     def extract_all_melody_features(self, audio_path: str) -> Dict:
         """
@@ -342,12 +603,24 @@ class MelodyAnalyzer:
         Returns:
             Dictionary containing all melody/harmony features
         """
+        # librosa warns about things like audioread fallbacks and short
+        # signals; silence them for this call only, not process-wide
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            if self.feature_cache is not None:
+                return self.feature_cache.get_or_compute(audio_path, self._extract_all_melody_features)
+            return self._extract_all_melody_features(audio_path)
+    
+    def _extract_all_melody_features(self, audio_path: str) -> Dict:
         # Load audio
         y, sr = self.load_audio(audio_path)
         
-        # Extract features
-        chroma_cqt = self.extract_chroma_cqt(y, sr)
-        hpcp = self.extract_hpcp(y, sr)
+        # Extract features; 12-bin chroma and 36-bin HPCP fold the same CQT,
+        # which is the most expensive transform here, so compute it once
+        C = self.compute_cqt(y, sr)
+        chroma_cqt = self.extract_chroma_cqt(y, sr, C=C)
+        hpcp = self.extract_hpcp(y, sr, C=C)
+        del C
         
         # Only extract melody if enabled (memory intensive)
         if self.enable_melody:
@@ -362,23 +635,26 @@ class MelodyAnalyzer:
             midi_notes = np.zeros(n_frames)
             voiced_flag = np.zeros(n_frames, dtype=bool)
         
-        # Beat synchronization
-        chroma_sync, beat_times = self.beat_synchronize_features(chroma_cqt, y, sr)
+        # One beat tracking pass gives both the tempo and the sync positions
+        tempo, beat_frames = librosa.beat.beat_track(y=y, sr=sr, hop_length=self.hop_length)
+        chroma_sync, beat_times = self.beat_synchronize_features(
+            chroma_cqt, y, sr, beat_frames=beat_frames
+        )
         
-        # Get tempo
-        tempo, _ = librosa.beat.beat_track(y=y, sr=sr, hop_length=self.hop_length)
         if isinstance(tempo, np.ndarray):
             tempo = float(tempo)
         
+        # Arrays are returned as ndarrays; converting them to nested lists cost
+        # more than several of the transforms and callers convert them back
         return {
-            'chroma_cqt': chroma_cqt.tolist(),
-            'chroma_beat_sync': chroma_sync.tolist(),
-            'hpcp': hpcp.tolist(),
-            'f0_contour': f0.tolist(),
-            'f0_smoothed': f0_smoothed.tolist(),
-            'midi_notes': midi_notes.tolist(),
-            'voiced_flag': voiced_flag.tolist(),
-            'beat_times': beat_times.tolist(),
+            'chroma_cqt': chroma_cqt,
+            'chroma_beat_sync': chroma_sync,
+            'hpcp': hpcp,
+            'f0_contour': f0,
+            'f0_smoothed': f0_smoothed,
+            'midi_notes': midi_notes,
+            'voiced_flag': voiced_flag,
+            'beat_times': beat_times,
             'tempo': tempo,
             'sample_rate': sr,
             'hop_length': self.hop_length,
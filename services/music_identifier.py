@@ -2,15 +2,34 @@
 Music Identification Service
 Uses Acoustid/MusicBrainz to identify songs from audio fingerprints.
 """
+import functools
+import shutil
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Optional
 
+from .fingerprint_cache import FingerprintCache
+
 # Add parent directory to path to import pyacoustid
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# Set FPCALC path if not already set
-if 'FPCALC' not in os.environ:
+
+@functools.lru_cache(maxsize=None)
+def _discover_fpcalc() -> bool:
+    """
+    Set FPCALC to a known fpcalc location if not already set (runs once).
+    Returns whether an fpcalc binary is available.
+    """
+    if 'FPCALC' in os.environ:
+        env_path = os.environ['FPCALC']
+        if os.path.isfile(env_path) or shutil.which(env_path):
+            print(f"✅ Using FPCALC from environment: {env_path}")
+            return True
+        # e.g. a Windows path from a shared .env; pyacoustid would run it as is
+        print(f"⚠️ Warning: FPCALC={env_path} does not exist, ignoring it")
+        del os.environ['FPCALC']
+    
     # Try different paths based on OS
     import platform
     
@@ -27,21 +46,75 @@ if 'FPCALC' not in os.environ:
             '/usr/local/bin/fpcalc',
         ]
     
-    fpcalc_found = False
     for fpcalc_path in possible_paths:
         if os.path.exists(fpcalc_path):
             os.environ['FPCALC'] = fpcalc_path
             print(f"✅ Using fpcalc from: {fpcalc_path}")
-            fpcalc_found = True
-            break
+            return True
+    
+    if shutil.which('fpcalc'):
+        print("✅ Using fpcalc from PATH")
+        return True
+    
+    print(f"⚠️ Warning: fpcalc not found in any expected location")
+    print(f"   Searched: {possible_paths}")
+    return False
+
+
+def _acoustid():
+    """
+    Import the AcoustID client on first use rather than with this module,
+    locating fpcalc first, so code paths that never identify music pay for
+    neither.
+    """
+    _discover_fpcalc()
+    from pyacoustid import acoustid
+    return acoustid
+
+
+# Audio AcoustID can't usefully match is rejected before fingerprinting
+MIN_DURATION_SECONDS = 5.0
+SILENCE_RMS = 1e-4
+PROBE_SECONDS = 2.0
+
+
+class UnusableAudioError(Exception):
+    """The audio is empty, too short or silent, so it was not fingerprinted."""
+
+
+def _quick_reject(audio_path: str) -> Optional[str]:
+    """
+    Cheap checks from the file header and a short sample, so empty, very
+    short or silent files never reach fpcalc.
+    
+    Args:
+        audio_path: Path to the audio file
+        
+    Returns:
+        Reason the file is unusable, or None if it should be fingerprinted
+    """
+    if os.path.getsize(audio_path) == 0:
+        return "Audio file is empty"
     
-    if not fpcalc_found:
-        print(f"⚠️ Warning: fpcalc not found in any expected location")
-        print(f"   Searched: {possible_paths}")
-else:
-    print(f"✅ Using FPCALC from environment: {os.environ['FPCALC']}")
+    import numpy as np
+    import soundfile as sf
+    try:
+        audio_file = sf.SoundFile(audio_path)
+    except RuntimeError:
+        # Formats libsndfile can't read are left to fpcalc
+        return None
+    with audio_file:
+        duration = audio_file.frames / audio_file.samplerate
+        if duration < MIN_DURATION_SECONDS:
+            return f"Audio is too short to identify ({duration:.1f}s)"
+        # Probe the middle rather than the start, which is often silent intro
+        probe_frames = int(PROBE_SECONDS * audio_file.samplerate)
+        audio_file.seek(max(0, (audio_file.frames - probe_frames) // 2))
+        samples = audio_file.read(probe_frames, dtype='float32')
+    if samples.size and float(np.sqrt(np.mean(np.square(samples)))) < SILENCE_RMS:
+        return "Audio is silent"
+    return None
 
-from pyacoustid import acoustid
 
 # API key for AcoustID (demo key - replace with your own in production)
 # Get your own API key at: http://acoustid.org/
@@ -53,14 +126,32 @@ class MusicIdentifier:
     Identifies music tracks using audio fingerprinting.
     """
     
-    def __init__(self, api_key: str = API_KEY):
+    def __init__(self, api_key: str = API_KEY, fingerprint_cache: Optional[str] = None):
         """
         Initialize the Music Identifier.
         
         Args:
             api_key: AcoustID API key
+            fingerprint_cache: SQLite file for cached fingerprints, keyed by
+                path, mtime and size; None fingerprints every call
         """
         self.api_key = api_key
+        self.fingerprint_cache = FingerprintCache(fingerprint_cache) if fingerprint_cache else None
+    
+    def _fingerprint(self, audio_path: str):
+        """Fingerprint a file with fpcalc, through the cache when one is set."""
+        reason = _quick_reject(audio_path)
+        if reason is not None:
+            raise UnusableAudioError(reason)
+        
+        acoustid = _acoustid()
+        # Prefer the native fpcalc (ffmpeg decode, first 120 s only) over the
+        # chromaprint bindings fed by audioread's Python-level decode loop
+        fingerprint_file = functools.partial(acoustid.fingerprint_file,
+                                             force_fpcalc=_discover_fpcalc())
+        if self.fingerprint_cache is not None:
+            return self.fingerprint_cache.get_or_compute(audio_path, fingerprint_file)
+        return fingerprint_file(audio_path)
     
     def identify(self, audio_path: str, max_results: int = 5) -> Dict:
         """
@@ -84,62 +175,135 @@ class MusicIdentifier:
             }
         
         try:
-            # Use acoustid.match to fingerprint and identify the audio
-            results = acoustid.match(self.api_key, audio_path)
-            
-            matches = []
-            count = 0
-            
-            for score, recording_id, title, artist in results:
-                if count >= max_results:
-                    break
-                
-                matches.append({
-                    "score": round(score * 100, 2),  # Convert to percentage
-                    "title": title or "Unknown",
-                    "artist": artist or "Unknown",
-                    "recording_id": recording_id,
-                    "musicbrainz_url": f"http://musicbrainz.org/recording/{recording_id}"
-                })
-                count += 1
+            # Fingerprint the audio, then look it up on AcoustID
+            duration, fingerprint = self._fingerprint(audio_path)
+            return self._lookup(duration, fingerprint, max_results)
+        except Exception as e:
+            return self._error_result(e)
+    
+    def identify_many(self, audio_paths: List[str], max_results: int = 5,
+                      workers: int = 4) -> List[Dict]:
+        """
+        Identify several audio files, fingerprinting upcoming files while
+        earlier lookups are waiting on the web service.
+        
+        Args:
+            audio_paths: Paths to the audio files
+            max_results: Maximum number of results to return per file
+            workers: Number of files fingerprinted concurrently (fpcalc runs
+                as a subprocess, so these run in parallel)
             
-            if not matches:
-                return {
-                    "success": False,
-                    "matches": [],
-                    "error": "No matches found for this audio"
-                }
+        Returns:
+            List of identify() results, in the order of audio_paths
+        """
+        def fingerprint(audio_path: str):
+            if not os.path.exists(audio_path):
+                return None
+            return self._fingerprint(audio_path)
+        
+        results: List[Optional[Dict]] = [None] * len(audio_paths)
+        # Lookups go one at a time (AcoustID allows 3 requests/second and
+        # the client rate-limits itself), on their own thread so they
+        # overlap with fingerprinting
+        with ThreadPoolExecutor(max_workers=workers) as fingerprint_pool, \
+                ThreadPoolExecutor(max_workers=1) as lookup_pool:
+            fingerprints = [fingerprint_pool.submit(fingerprint, path) for path in audio_paths]
+            lookups = {}
+            for i, (path, future) in enumerate(zip(audio_paths, fingerprints)):
+                try:
+                    fingerprinted = future.result()
+                except Exception as e:
+                    results[i] = self._error_result(e)
+                    continue
+                if fingerprinted is None:
+                    results[i] = {
+                        "success": False,
+                        "matches": [],
+                        "error": f"Audio file not found: {path}"
+                    }
+                    continue
+                duration, fp = fingerprinted
+                lookups[i] = lookup_pool.submit(self._lookup_safely, duration, fp, max_results)
+            for i, lookup in lookups.items():
+                results[i] = lookup.result()
+        return results
+    
+    def _lookup_safely(self, duration: float, fingerprint: bytes, max_results: int) -> Dict:
+        """_lookup, with failures returned as error results (for worker threads)."""
+        try:
+            return self._lookup(duration, fingerprint, max_results)
+        except Exception as e:
+            return self._error_result(e)
+    
+    def _lookup(self, duration: float, fingerprint: bytes, max_results: int) -> Dict:
+        """
+        Look up a fingerprint and format the best matches.
+        
+        Args:
+            duration: Audio duration in seconds
+            fingerprint: Chromaprint fingerprint
+            max_results: Maximum number of results to return
             
-            return {
-                "success": True,
-                "matches": matches,
-                "error": None
-            }
+        Returns:
+            identify() result dictionary
+        """
+        acoustid = _acoustid()
+        response = acoustid.lookup(self.api_key, fingerprint, duration)
+        results = acoustid.parse_lookup_result(response)
+        
+        matches = []
+        count = 0
+        
+        for score, recording_id, title, artist in results:
+            if count >= max_results:
+                break
             
-        except acoustid.NoBackendError:
-            return {
-                "success": False,
-                "matches": [],
-                "error": "Chromaprint library/tool not found. Please install chromaprint."
-            }
-        except acoustid.FingerprintGenerationError:
-            return {
-                "success": False,
-                "matches": [],
-                "error": "Could not generate fingerprint from audio file. File may be corrupted."
-            }
-        except acoustid.WebServiceError as e:
+            matches.append({
+                "score": round(score * 100, 2),  # Convert to percentage
+                "title": title or "Unknown",
+                "artist": artist or "Unknown",
+                "recording_id": recording_id,
+                "musicbrainz_url": f"http://musicbrainz.org/recording/{recording_id}"
+            })
+            count += 1
+        
+        if not matches:
             return {
                 "success": False,
                 "matches": [],
-                "error": f"Web service request failed: {e.message}"
+                "error": "No matches found for this audio"
             }
-        except Exception as e:
+        
+        return {
+            "success": True,
+            "matches": matches,
+            "error": None
+        }
+    
+    @staticmethod
+    def _error_result(error: Exception) -> Dict:
+        """Map a fingerprinting or lookup failure to an identify() result."""
+        if isinstance(error, UnusableAudioError):
             return {
                 "success": False,
                 "matches": [],
-                "error": f"Unexpected error during identification: {str(e)}"
+                "error": str(error)
             }
+        
+        acoustid = _acoustid()
+        if isinstance(error, acoustid.NoBackendError):
+            message = "Chromaprint library/tool not found. Please install chromaprint."
+        elif isinstance(error, acoustid.FingerprintGenerationError):
+            message = "Could not generate fingerprint from audio file. File may be corrupted."
+        elif isinstance(error, acoustid.WebServiceError):
+            message = f"Web service request failed: {error.message}"
+        else:
+            message = f"Unexpected error during identification: {str(error)}"
+        return {
+            "success": False,
+            "matches": [],
+            "error": message
+        }
     
     def get_best_match(self, audio_path: str) -> Optional[Dict]:
         """
@@ -160,7 +324,8 @@ class MusicIdentifier:
 
 
 # Utility function for easy import
-def identify_music(audio_path: str, api_key: str = API_KEY, max_results: int = 5) -> Dict:
+def identify_music(audio_path: str, api_key: str = API_KEY, max_results: int = 5,
+                   fingerprint_cache: Optional[str] = None) -> Dict:
     """
     Convenience function to identify music from an audio file.
     
@@ -168,9 +333,10 @@ def identify_music(audio_path: str, api_key: str = API_KEY, max_results: int = 5
         audio_path: Path to audio file
         api_key: AcoustID API key
         max_results: Maximum number of results to return
+        fingerprint_cache: Optional SQLite file for cached fingerprints
         
     Returns:
         Dictionary containing identification results
     """
-    identifier = MusicIdentifier(api_key=api_key)
+    identifier = MusicIdentifier(api_key=api_key, fingerprint_cache=fingerprint_cache)
     return identifier.identify(audio_path, max_results=max_results)
@@ -0,0 +1,80 @@
+"""
+Object Storage Service
+Stores uploaded audio in S3-compatible storage (AWS S3, MinIO) instead of
+Postgres, and hands out presigned URLs so clients fetch bytes directly.
+"""
+import shutil
+from typing import BinaryIO, Optional
+
+
+class ObjectStorage:
+    """
+    Thin wrapper around a boto3 S3 client bound to one bucket.
+    """
+
+    def __init__(self, bucket: str, endpoint_url: Optional[str] = None,
+                 url_ttl: int = 3600):
+        """
+        Initialize the ObjectStorage.
+
+        Args:
+            bucket: Bucket that holds uploaded audio
+            endpoint_url: Custom endpoint for S3-compatible services (e.g. MinIO)
+            url_ttl: Lifetime of presigned URLs in seconds
+        """
+        # Imported lazily: boto3 is only needed when object storage is configured
+        import boto3
+
+        self.bucket = bucket
+        self.url_ttl = url_ttl
+        self.client = boto3.client("s3", endpoint_url=endpoint_url)
+
+    def upload(self, fileobj: BinaryIO, key: str, content_type: str) -> None:
+        """
+        Upload a file object (streamed in parts by boto3).
+
+        Args:
+            fileobj: Readable binary file object positioned at the start
+            key: Object key
+            content_type: MIME type stored with the object
+        """
+        self.client.upload_fileobj(
+            fileobj, self.bucket, key,
+            ExtraArgs={"ContentType": content_type}
+        )
+
+    def presigned_url(self, key: str) -> str:
+        """
+        Get a time-limited GET URL for an object.
+
+        Args:
+            key: Object key
+
+        Returns:
+            Presigned URL valid for url_ttl seconds
+        """
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": key},
+            ExpiresIn=self.url_ttl,
+        )
+
+    def download_to(self, key: str, fileobj: BinaryIO) -> None:
+        """
+        Stream an object into a writable binary file object.
+
+        Args:
+            key: Object key
+            fileobj: Writable binary file object
+        """
+        body = self.client.get_object(Bucket=self.bucket, Key=key)["Body"]
+        shutil.copyfileobj(body, fileobj, length=1 << 20)
+
+    def delete(self, key: str) -> None:
+        """
+        Delete an object (missing keys are ignored by S3).
+
+        Args:
+            key: Object key
+        """
+        self.client.delete_object(Bucket=self.bucket, Key=key)
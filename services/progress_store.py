@@ -0,0 +1,120 @@
+"""
+Progress Store Service
+Shares analysis progress between the background jobs that write it and the
+request handlers that read it. Uses Redis when configured so every gunicorn
+worker sees the same state; otherwise falls back to a per-process dict.
+Updates are also pushed to watchers (Redis pub/sub, or a condition variable
+locally) so progress can be streamed instead of polled.
+"""
+import json
+import threading
+import time
+from typing import Dict, Iterator, Optional
+
+FINAL_STATUSES = ("completed", "failed")
+
+
+class ProgressStore:
+    """
+    Dict-style progress store keyed by analysis id.
+    """
+
+    def __init__(self, redis_url: Optional[str] = None, ttl: int = 3600,
+                 prefix: str = "progress:"):
+        """
+        Initialize the ProgressStore.
+
+        Args:
+            redis_url: Redis connection URL; None keeps progress in process memory
+            ttl: Seconds a progress entry lives in Redis
+            prefix: Key prefix for Redis entries
+        """
+        self.ttl = ttl
+        self.prefix = prefix
+        self._local: Dict[str, Dict] = {}
+        self._changed = threading.Condition()
+        self._redis = None
+        if redis_url:
+            # Imported lazily: redis is only needed when REDIS_URL is set
+            import redis
+            self._redis = redis.Redis.from_url(redis_url)
+
+    def __setitem__(self, key: str, value: Dict) -> None:
+        if self._redis is None:
+            with self._changed:
+                self._local[key] = value
+                self._changed.notify_all()
+            return
+        payload = json.dumps(value)
+        pipe = self._redis.pipeline()
+        pipe.set(self.prefix + key, payload, ex=self.ttl)
+        pipe.publish(self.prefix + key, payload)
+        pipe.execute()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Get the progress entry for a key.
+
+        Args:
+            key: Analysis id
+
+        Returns:
+            Progress dictionary, or None if nothing has been recorded
+        """
+        if self._redis is None:
+            return self._local.get(key)
+        raw = self._redis.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def watch(self, key: str, timeout: float = 300) -> Iterator[Dict]:
+        """
+        Yield the current progress entry and then every update to it, until
+        the status is completed/failed or timeout seconds pass.
+
+        Args:
+            key: Analysis id
+            timeout: Maximum seconds to wait for updates
+
+        Returns:
+            Iterator of progress dictionaries (empty if nothing is recorded)
+        """
+        deadline = time.monotonic() + timeout
+        if self._redis is None:
+            yield from self._watch_local(key, deadline)
+            return
+
+        pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        # Subscribe before reading the current value so no update falls in between
+        pubsub.subscribe(self.prefix + key)
+        try:
+            current = self.get(key)
+            if current is None:
+                return
+            yield current
+            while current.get("status") not in FINAL_STATUSES:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                message = pubsub.get_message(timeout=remaining)
+                if message is not None:
+                    current = json.loads(message["data"])
+                    yield current
+        finally:
+            pubsub.close()
+
+    def _watch_local(self, key: str, deadline: float) -> Iterator[Dict]:
+        current = self._local.get(key)
+        if current is None:
+            return
+        yield current
+        while current.get("status") not in FINAL_STATUSES:
+            with self._changed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                self._changed.wait_for(lambda: self._local.get(key) is not current, remaining)
+                latest = self._local.get(key)
+            if latest is current:
+                return
+            current = latest
+            yield current
@@ -3,28 +3,57 @@ Similarity Comparison Service
 Compares two audio tracks for melody and harmony similarity.
 Implements transposition search and segment-level analysis.
 """
+import functools
+import io
 import numpy as np
-from typing import Dict, List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 from .melody_analyzer import MelodyAnalyzer
 import librosa
 
+# Bump when SimilarityComparator feature extraction changes; keys both the
+# on-disk feature cache and the features cached in the database
+FEATURES_VERSION = 3
+
+# Beat-synchronous chroma needs at least this many beats to be worth aligning on
+MIN_BEATS_FOR_SYNC = 16
+# Similar-segment window: ~1.6 s of frames, or two 4/4 bars of beats
+SEGMENT_WINDOW_FRAMES = 50
+SEGMENT_WINDOW_BEATS = 8
+# Sakoe-Chiba band radius for DTW, as a fraction of the shorter track
+# (length differences between the tracks are allowed on top of it)
+DTW_WINDOW_RATIO = 0.1
+# Similar segments listed in the text summary
+SUMMARY_SEGMENTS = 5
+
+# Frame-level features stored as float16 in the feature cache: chroma/HPCP
+# lie in [0, 1] and pitch stays within ~1 cent, at half the bytes of float32.
+# Times (beat_times) keep full precision.
+HALF_PRECISION_FEATURES = ('chroma_cqt', 'chroma_beat_sync', 'hpcp',
+                           'f0_contour', 'f0_smoothed', 'midi_notes')
+
 
 class SimilarityComparator:
     """
     Compares two audio tracks to detect plagiarism or cover songs.
     """
     
-    def __init__(self, sample_rate: int = 22050, enable_melody: bool = True):
+    def __init__(self, sample_rate: int = 22050, enable_melody: bool = True,
+                 cache_dir: Optional[str] = None):
         """
         Initialize the SimilarityComparator.
         
         Args:
             sample_rate: Target sample rate for audio processing
             enable_melody: Whether to enable CREPE melody analysis (memory intensive)
+            cache_dir: Directory for on-disk feature caching keyed by audio
+                content (e.g. ~/.cache/musication/features); None disables it
         """
         self.sample_rate = sample_rate
         self.enable_melody = enable_melody
-        self.analyzer = MelodyAnalyzer(sample_rate=sample_rate, enable_melody=enable_melody)
+        self.analyzer = MelodyAnalyzer(sample_rate=sample_rate, enable_melody=enable_melody,
+                                       cache_dir=cache_dir,
+                                       cache_tag=f"SimilarityComparator:v{FEATURES_VERSION}")
         
     def load_and_extract_features(self, audio_path: str) -> Dict:
         """
@@ -38,40 +67,96 @@ class SimilarityComparator:
         """
         return self.analyzer.extract_all_melody_features(audio_path)
     
+    @staticmethod
+    def serialize_features(features: Dict) -> bytes:
+        """
+        Pack extracted features into compressed .npz bytes for caching.
+        Each feature is its own array entry (dtype and shape in its header),
+        with frame-level features in float16.
+        
+        Args:
+            features: Dictionary from load_and_extract_features
+            
+        Returns:
+            npz archive bytes
+        """
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, **{
+            k: np.asarray(v, dtype=np.float16) if k in HALF_PRECISION_FEATURES else np.asarray(v)
+            for k, v in features.items()
+        })
+        return buffer.getvalue()
+    
+    @staticmethod
+    def deserialize_features(data: bytes) -> Dict:
+        """
+        Unpack features cached with serialize_features.
+        
+        Args:
+            data: npz archive bytes
+            
+        Returns:
+            Dictionary of features (arrays stay ndarrays, scalars become Python numbers)
+        """
+        features = {}
+        with np.load(io.BytesIO(data)) as archive:
+            for k in archive.files:
+                value = archive[k]
+                if value.ndim == 0:
+                    features[k] = value.item()
+                elif value.dtype == np.float16:
+                    # Stored at half precision; compute in float32
+                    features[k] = value.astype(np.float32)
+                else:
+                    features[k] = value
+        return features
+    
     def compare_chroma_with_transposition(self, chroma1: np.ndarray, 
-                                         chroma2: np.ndarray) -> Dict:
+                                         chroma2: np.ndarray,
+                                         window_ratio: Optional[float] = DTW_WINDOW_RATIO,
+                                         exact: bool = False) -> Dict:
         """
         Compare two chroma sequences with optimal transposition.
         
         Args:
             chroma1: First chroma sequence (12 x n_frames)
             chroma2: Second chroma sequence (12 x n_frames)
+            window_ratio: DTW band radius as a fraction of the shorter
+                sequence (None = unconstrained)
+            exact: Always run exact DTW; by default long frame-level
+                sequences use the FastDTW approximation
             
         Returns:
             Dictionary with transposition info and similarity
         """
-        # Find best transposition
-        best_shift, best_similarity = self.analyzer.find_best_transposition(chroma1, chroma2)
+        # float32 halves the bytes the distance matrix and DTW stream through
+        chroma1 = np.ascontiguousarray(chroma1, dtype=np.float32)
+        chroma2 = np.ascontiguousarray(chroma2, dtype=np.float32)
+        
+        # Estimate the key shift from the global chroma profiles
+        best_shift = self.analyzer.estimate_transposition(chroma1, chroma2)
         
         # Apply best transposition
         chroma2_aligned = self.analyzer.transpose_chroma(chroma2, best_shift)
         
-        # Compute DTW with aligned chroma
+        # Compute DTW with aligned chroma (the only DTW over the chroma sequences)
         dtw_distance, cost_matrix, dtw_path = self.analyzer.compute_dtw_alignment(
-            chroma1, chroma2_aligned, metric='cosine'
+            chroma1, chroma2_aligned, metric='cosine', window_ratio=window_ratio,
+            approximate=not exact
         )
+        best_similarity = 1.0 / (1.0 + dtw_distance)
         
         return {
             'best_transposition_semitones': int(best_shift),
             'similarity_score': float(best_similarity),
             'dtw_distance': float(dtw_distance),
-            'cost_matrix': cost_matrix.tolist(),
-            'dtw_path': dtw_path.tolist(),
-            'chroma2_aligned': chroma2_aligned.tolist()
+            'cost_matrix': cost_matrix,
+            'dtw_path': dtw_path
         }
     
     def compare_melody_contours(self, f0_1: np.ndarray, f0_2: np.ndarray,
-                               voiced_1: np.ndarray, voiced_2: np.ndarray) -> Dict:
+                               voiced_1: np.ndarray, voiced_2: np.ndarray,
+                               window_ratio: Optional[float] = DTW_WINDOW_RATIO) -> Dict:
         """
         Compare two melody contours (F0 trajectories).
         
@@ -80,6 +165,8 @@ class SimilarityComparator:
             f0_2: Second F0 contour
             voiced_1: Voiced flags for first track
             voiced_2: Voiced flags for second track
+            window_ratio: DTW band radius as a fraction of the shorter
+                contour (None = unconstrained)
             
         Returns:
             Dictionary with melody similarity metrics
@@ -92,23 +179,24 @@ class SimilarityComparator:
         def normalize_melody(midi, voiced):
             voiced_midi = midi[voiced]
             if len(voiced_midi) > 0:
-                # Subtract median to get relative pitch
+                # Subtract median to get relative pitch; silent frames stay 0.
+                # One fused pass straight to float32 for the DTW
                 median_pitch = np.median(voiced_midi)
-                normalized = midi - median_pitch
-                normalized[~voiced] = 0  # Keep silent frames as 0
-                return normalized
-            return midi
+                return np.where(voiced, midi - median_pitch, 0.0).astype(np.float32, copy=False)
+            return midi.astype(np.float32, copy=False)
         
         midi_1_norm = normalize_melody(midi_1, voiced_1)
         midi_2_norm = normalize_melody(midi_2, voiced_2)
         
-        # Reshape for DTW (add feature dimension)
+        # Reshape for DTW (add feature dimension); float32 distances, the
+        # accumulated cost stays float64
         midi_1_features = midi_1_norm.reshape(1, -1)
         midi_2_features = midi_2_norm.reshape(1, -1)
         
-        # Compute DTW on melody contours
-        dtw_distance, cost_matrix, dtw_path = self.analyzer.compute_dtw_alignment(
-            midi_1_features, midi_2_features, metric='euclidean'
+        # Compute DTW on melody contours; only the distance is used, so
+        # skip the frame-rate cost matrix and path
+        dtw_distance = self.analyzer.compute_dtw_distance(
+            midi_1_features, midi_2_features, metric='euclidean', window_ratio=window_ratio
         )
         
         # Calculate melody similarity (0-1 scale)
@@ -116,15 +204,15 @@ class SimilarityComparator:
         
         return {
             'melody_similarity': float(melody_similarity),
-            'melody_dtw_distance': float(dtw_distance),
-            'melody_cost_matrix': cost_matrix.tolist(),
-            'melody_dtw_path': dtw_path.tolist()
+            'melody_dtw_distance': float(dtw_distance)
         }
     
     def find_similar_segments(self, cost_matrix: np.ndarray, 
                              hop_length: int, sample_rate: int,
                              window_frames: int = 50,
-                             threshold: float = 0.7) -> List[Dict]:
+                             threshold: float = 0.7,
+                             time_edges1: Optional[np.ndarray] = None,
+                             time_edges2: Optional[np.ndarray] = None) -> List[Dict]:
         """
         Find locally similar segments between two tracks.
         
@@ -132,43 +220,51 @@ class SimilarityComparator:
             cost_matrix: DTW cost matrix
             hop_length: Hop length used in feature extraction
             sample_rate: Sample rate
-            window_frames: Window size in frames
+            window_frames: Window size in frames (or beats)
             threshold: Similarity threshold (0-1)
+            time_edges1: Start time of each cost matrix row plus the end time,
+                for beat-synchronous input; None means rows are STFT frames
+            time_edges2: Same for the columns
             
         Returns:
             List of similar segments with time ranges
         """
-        # Find local similar regions
+        regions = self._similar_regions(cost_matrix, window_frames, threshold)
+        return self._add_segment_times(regions, hop_length, sample_rate, time_edges1, time_edges2)
+    
+    def _similar_regions(self, cost_matrix: np.ndarray, window_frames: int,
+                         threshold: float) -> List[Dict]:
+        """Locally similar regions (frame indices only) at or above the threshold."""
         local_regions = self.analyzer.compute_local_alignment(cost_matrix, window_size=window_frames)
+        return [r for r in local_regions if r['similarity_score'] >= threshold]
+    
+    @staticmethod
+    def _add_segment_times(regions: List[Dict], hop_length: int, sample_rate: int,
+                           time_edges1: Optional[np.ndarray] = None,
+                           time_edges2: Optional[np.ndarray] = None) -> List[Dict]:
+        """Fill in the start/end times of each region (see find_similar_segments)."""
+        if not regions:
+            return regions
+        
+        frames1 = np.array([[r['track1_start_frame'], r['track1_end_frame']] for r in regions])
+        frames2 = np.array([[r['track2_start_frame'], r['track2_end_frame']] for r in regions])
+        
+        # Convert frame indices to time for all regions at once
+        if time_edges1 is not None and time_edges2 is not None:
+            times1 = np.asarray(time_edges1)[frames1]
+            times2 = np.asarray(time_edges2)[frames2]
+        else:
+            times1 = librosa.frames_to_time(frames1, sr=sample_rate, hop_length=hop_length)
+            times2 = librosa.frames_to_time(frames2, sr=sample_rate, hop_length=hop_length)
         
-        # Convert frame indices to time
-        for region in local_regions:
-            # Track 1 times
-            region['track1_start_time'] = librosa.frames_to_time(
-                region['track1_start_frame'], sr=sample_rate, hop_length=hop_length
-            )
-            region['track1_end_time'] = librosa.frames_to_time(
-                region['track1_end_frame'], sr=sample_rate, hop_length=hop_length
-            )
-            
-            # Track 2 times
-            region['track2_start_time'] = librosa.frames_to_time(
-                region['track2_start_frame'], sr=sample_rate, hop_length=hop_length
-            )
-            region['track2_end_time'] = librosa.frames_to_time(
-                region['track2_end_frame'], sr=sample_rate, hop_length=hop_length
-            )
-            
-            # Convert to float for JSON serialization
-            region['track1_start_time'] = float(region['track1_start_time'])
-            region['track1_end_time'] = float(region['track1_end_time'])
-            region['track2_start_time'] = float(region['track2_start_time'])
-            region['track2_end_time'] = float(region['track2_end_time'])
-        
-        # Filter by threshold
-        filtered_regions = [r for r in local_regions if r['similarity_score'] >= threshold]
+        # Convert to float for JSON serialization
+        for region, (start1, end1), (start2, end2) in zip(regions, times1.tolist(), times2.tolist()):
+            region['track1_start_time'] = start1
+            region['track1_end_time'] = end1
+            region['track2_start_time'] = start2
+            region['track2_end_time'] = end2
         
-        return filtered_regions
+        return regions
     
     def compute_overall_similarity(self, chroma_similarity: float,
                                    melody_similarity: float,
@@ -238,7 +334,8 @@ class SimilarityComparator:
     
     def compare_tracks(self, audio_path1: str, audio_path2: str,
                       track1_title: str = "Track 1",
-                      track2_title: str = "Track 2") -> Dict:
+                      track2_title: str = "Track 2",
+                      include_segments: bool = True) -> Dict:
         """
         Comprehensive comparison of two audio tracks.
         
@@ -247,23 +344,88 @@ class SimilarityComparator:
             audio_path2: Path to second audio file
             track1_title: Title of first track
             track2_title: Title of second track
+            include_segments: Return every similar segment; False keeps only
+                the ones the summary lists
             
         Returns:
             Complete comparison results
         """
-        print(f"Extracting features from {track1_title}...")
-        features1 = self.load_and_extract_features(audio_path1)
+        # The two extractions are independent and mostly run in numpy/scipy
+        # code that releases the GIL, so total time is roughly the slower one
+        def extract(audio_path: str, title: str) -> Dict:
+            print(f"Extracting features from {title}...")
+            features = self.load_and_extract_features(audio_path)
+            print(f"Features extracted from {title}")
+            return features
+        
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            future1 = pool.submit(extract, audio_path1, track1_title)
+            future2 = pool.submit(extract, audio_path2, track2_title)
+            features1, features2 = future1.result(), future2.result()
+        
+        return self.compare_features(features1, features2, track1_title, track2_title,
+                                     include_segments=include_segments)
+    
+    @staticmethod
+    def _chroma_for_alignment(features: Dict, beat_sync: bool) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        Pick the chroma sequence to align: beat-synchronous when requested and
+        the track has enough beats, else None edges (use frame-rate chroma).
         
-        print(f"Extracting features from {track2_title}...")
-        features2 = self.load_and_extract_features(audio_path2)
+        Args:
+            features: Track features
+            beat_sync: Whether beat-synchronous chroma is wanted
+            
+        Returns:
+            Tuple of (chroma, time_edges) where time_edges holds each column's
+            start time plus the track end, or None when not beat-synced
+        """
+        beat_times = np.asarray(features.get('beat_times', []))
+        if not beat_sync or 'chroma_beat_sync' not in features or len(beat_times) < MIN_BEATS_FOR_SYNC:
+            return None, None
+        # librosa.util.sync pads with a segment before the first beat and
+        # after the last, so there is one more column than beats
+        edges = np.concatenate([[0.0], beat_times, [features['duration']]])
+        return np.asarray(features['chroma_beat_sync']), edges
+    
+    def compare_features(self, features1: Dict, features2: Dict,
+                         track1_title: str = "Track 1",
+                         track2_title: str = "Track 2",
+                         beat_sync: bool = True,
+                         include_segments: bool = True) -> Dict:
+        """
+        Compare two tracks from already extracted (or cached) features.
+        Harmony is aligned on beat-synchronous chroma by default: ~2 columns
+        per second instead of ~30 frames makes the DTW cost matrix hundreds
+        of times smaller, at the cost of sub-beat alignment detail (the usual
+        trade-off in cover song identification).
         
-        # Convert lists back to numpy arrays for processing
-        chroma1 = np.array(features1['chroma_cqt'])
-        chroma2 = np.array(features2['chroma_cqt'])
-        f0_1 = np.array(features1['f0_smoothed'])
-        f0_2 = np.array(features2['f0_smoothed'])
-        voiced_1 = np.array(features1['voiced_flag'])
-        voiced_2 = np.array(features2['voiced_flag'])
+        Args:
+            features1: Features of first track
+            features2: Features of second track
+            track1_title: Title of first track
+            track2_title: Title of second track
+            beat_sync: Align beat-synchronous chroma (falls back to frames
+                when a track has too few beats)
+            include_segments: Return every similar segment; False converts
+                and returns only the ones the summary lists (the count is
+                still reported)
+            
+        Returns:
+            Complete comparison results
+        """
+        # Features are ndarrays already; asarray also accepts list-based input
+        chroma1, edges1 = self._chroma_for_alignment(features1, beat_sync)
+        chroma2, edges2 = self._chroma_for_alignment(features2, beat_sync)
+        synced = edges1 is not None and edges2 is not None
+        if not synced:
+            chroma1 = np.asarray(features1['chroma_cqt'])
+            chroma2 = np.asarray(features2['chroma_cqt'])
+            edges1 = edges2 = None
+        f0_1 = np.asarray(features1['f0_smoothed'])
+        f0_2 = np.asarray(features2['f0_smoothed'])
+        voiced_1 = np.asarray(features1['voiced_flag'])
+        voiced_2 = np.asarray(features2['voiced_flag'])
         
         print("Comparing chroma features with transposition search...")
         chroma_result = self.compare_chroma_with_transposition(chroma1, chroma2)
@@ -272,13 +434,17 @@ class SimilarityComparator:
         melody_result = self.compare_melody_contours(f0_1, f0_2, voiced_1, voiced_2)
         
         print("Finding similar segments...")
-        similar_segments = self.find_similar_segments(
-            np.array(chroma_result['cost_matrix']),
-            self.analyzer.hop_length,
-            self.sample_rate,
-            window_frames=50,
+        similar_regions = self._similar_regions(
+            chroma_result['cost_matrix'],
+            window_frames=SEGMENT_WINDOW_BEATS if synced else SEGMENT_WINDOW_FRAMES,
             threshold=0.65
         )
+        segment_count = len(similar_regions)
+        if not include_segments:
+            similar_regions = similar_regions[:SUMMARY_SEGMENTS]
+        similar_segments = self._add_segment_times(
+            similar_regions, self.analyzer.hop_length, self.sample_rate, edges1, edges2
+        )
         
         # Compute tempo ratio
         tempo_ratio = features1['tempo'] / features2['tempo'] if features2['tempo'] > 0 else 1.0
@@ -293,7 +459,7 @@ class SimilarityComparator:
         # Generate human-readable summary
         summary_text = self._generate_summary(
             track1_title, track2_title, overall_result, 
-            chroma_result, features1, features2, similar_segments
+            chroma_result, features1, features2, similar_segments, segment_count
         )
         
         return {
@@ -318,6 +484,7 @@ class SimilarityComparator:
                 'dtw_distance': melody_result['melody_dtw_distance']
             },
             'similar_segments': similar_segments,
+            'similar_segment_count': segment_count,
             'tempo_analysis': {
                 'track1_tempo': features1['tempo'],
                 'track2_tempo': features2['tempo'],
@@ -325,10 +492,11 @@ class SimilarityComparator:
             },
             'summary': summary_text,
             'raw_data': {
+                # Row/column start times of the cost matrix when beat-synced
+                'chroma_time_edges1': edges1,
+                'chroma_time_edges2': edges2,
                 'chroma_cost_matrix': chroma_result['cost_matrix'],
                 'chroma_dtw_path': chroma_result['dtw_path'],
-                'melody_cost_matrix': melody_result['melody_cost_matrix'],
-                'melody_dtw_path': melody_result['melody_dtw_path'],
                 'features1': features1,
                 'features2': features2
             }
@@ -337,7 +505,8 @@ class SimilarityComparator:
     def _generate_summary(self, track1_title: str, track2_title: str,
                          overall_result: Dict, chroma_result: Dict,
                          features1: Dict, features2: Dict,
-                         similar_segments: List[Dict]) -> str:
+                         similar_segments: List[Dict],
+                         segment_count: Optional[int] = None) -> str:
         """
         Generate human-readable summary of comparison.
         
@@ -348,7 +517,10 @@ class SimilarityComparator:
             chroma_result: Chroma comparison results
             features1: Features of first track
             features2: Features of second track
-            similar_segments: List of similar segments
+            similar_segments: List of similar segments (at least the first
+                SUMMARY_SEGMENTS)
+            segment_count: Total number of similar segments (default:
+                len(similar_segments))
             
         Returns:
             Summary text
@@ -379,9 +551,11 @@ class SimilarityComparator:
         lines.append(f"Tempo: {features1['tempo']:.1f} BPM vs {features2['tempo']:.1f} BPM\n")
         
         # Similar segments
+        if segment_count is None:
+            segment_count = len(similar_segments)
         if similar_segments:
-            lines.append(f"Found {len(similar_segments)} similar segments:")
-            for i, seg in enumerate(similar_segments[:5], 1):  # Show top 5
+            lines.append(f"Found {segment_count} similar segments:")
+            for i, seg in enumerate(similar_segments[:SUMMARY_SEGMENTS], 1):
                 lines.append(
                     f"  {i}. {track1_title} [{seg['track1_start_time']:.1f}s - {seg['track1_end_time']:.1f}s] "
                     f"↔ {track2_title} [{seg['track2_start_time']:.1f}s - {seg['track2_end_time']:.1f}s] "
@@ -393,10 +567,32 @@ class SimilarityComparator:
         return "\n".join(lines)
 
 
+@functools.lru_cache(maxsize=8)
+def get_comparator(sample_rate: int = 22050, enable_melody: bool = True,
+                   cache_dir: Optional[str] = None) -> SimilarityComparator:
+    """
+    Shared SimilarityComparator per configuration. Comparators hold no
+    per-comparison state, so one instance (with its analyzer and feature
+    cache path memo) can serve every comparison and thread.
+    
+    Args:
+        sample_rate: Target sample rate
+        enable_melody: Whether to enable melody analysis
+        cache_dir: Optional feature cache directory
+        
+    Returns:
+        SimilarityComparator instance
+    """
+    return SimilarityComparator(sample_rate=sample_rate, enable_melody=enable_melody,
+                                cache_dir=cache_dir)
+
+
 def compare_audio_tracks(audio_path1: str, audio_path2: str,
                         track1_title: str = "Track 1",
                         track2_title: str = "Track 2",
-                        sample_rate: int = 22050) -> Dict:
+                        sample_rate: int = 22050,
+                        cache_dir: Optional[str] = None,
+                        include_segments: bool = True) -> Dict:
     """
     Convenience function to compare two audio tracks.
     
@@ -406,9 +602,12 @@ def compare_audio_tracks(audio_path1: str, audio_path2: str,
         track1_title: Title of first track
         track2_title: Title of second track
         sample_rate: Target sample rate
+        cache_dir: Optional feature cache directory
+        include_segments: Return every similar segment, not just the summary's
         
     Returns:
         Comparison results dictionary
     """
-    comparator = SimilarityComparator(sample_rate=sample_rate)
-    return comparator.compare_tracks(audio_path1, audio_path2, track1_title, track2_title)
+    comparator = get_comparator(sample_rate=sample_rate, cache_dir=cache_dir)
+    return comparator.compare_tracks(audio_path1, audio_path2, track1_title, track2_title,
+                                     include_segments=include_segments)
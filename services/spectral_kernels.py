@@ -0,0 +1,84 @@
+"""
+Spectral Kernels
+Spectral centroid, bandwidth and rolloff from one magnitude spectrogram in
+a single fused pass, instead of librosa's three separate reductions (its
+bandwidth also recomputes the centroid). Compiled with numba when
+available; otherwise the analyzer falls back to librosa's functions.
+"""
+from typing import Tuple
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # pragma: no cover - numba ships with librosa
+    njit = None
+
+# Frames per block; bins are walked row by row within a block so reads of
+# the (bins x frames) spectrogram stay contiguous
+FRAME_BLOCK = 256
+
+
+def _spectral_shape_loop(S, freqs, roll_percent):
+    n_bins, n_frames = S.shape
+    centroid = np.zeros(n_frames, dtype=np.float32)
+    bandwidth = np.zeros(n_frames, dtype=np.float32)
+    rolloff = np.zeros(n_frames, dtype=np.float32)
+    n_blocks = (n_frames + FRAME_BLOCK - 1) // FRAME_BLOCK
+    for b in range(n_blocks):
+        t0 = b * FRAME_BLOCK
+        width = min(FRAME_BLOCK, n_frames - t0)
+        # Zeroth, first and second frequency moments per frame
+        total = np.zeros(width)
+        first = np.zeros(width)
+        second = np.zeros(width)
+        for f in range(n_bins):
+            freq = freqs[f]
+            for t in range(width):
+                s = S[f, t0 + t]
+                total[t] += s
+                first[t] += freq * s
+                second[t] += freq * freq * s
+        # Rolloff: lowest bin whose cumulative energy reaches roll_percent
+        cumulative = np.zeros(width)
+        found = np.zeros(width, dtype=np.bool_)
+        for f in range(n_bins):
+            for t in range(width):
+                if not found[t]:
+                    cumulative[t] += S[f, t0 + t]
+                    if cumulative[t] >= roll_percent * total[t]:
+                        rolloff[t0 + t] = freqs[f]
+                        found[t] = True
+        for t in range(width):
+            if total[t] > 0:
+                mean = first[t] / total[t]
+                centroid[t0 + t] = mean
+                # sqrt(sum(p * (f - mean)^2)) with p the normalized spectrum
+                bandwidth[t0 + t] = np.sqrt(max(second[t] / total[t] - mean * mean, 0.0))
+    return centroid, bandwidth, rolloff
+
+
+# Serial on purpose: numba's parallel (OpenMP/TBB) runtime in the analyzing
+# process breaks workers forked from it (analyze_audio_batch); the per-frame
+# work is a few multiply-adds per bin
+_spectral_shape_jit = (njit(cache=True, fastmath=True)(_spectral_shape_loop)
+                       if njit else None)
+SPECTRAL_KERNELS_AVAILABLE = _spectral_shape_jit is not None
+
+
+def spectral_shape(S: np.ndarray, freqs: np.ndarray,
+                   roll_percent: float = 0.85) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Per-frame spectral centroid, bandwidth (p=2) and rolloff, matching
+    librosa.feature.spectral_centroid / spectral_bandwidth / spectral_rolloff
+    on the same magnitude spectrogram. Requires numba.
+
+    Args:
+        S: Magnitude spectrogram (1 + n_fft/2 x time_frames)
+        freqs: Center frequency of each bin (Hz)
+        roll_percent: Energy fraction below the rolloff frequency
+
+    Returns:
+        Tuple of (centroid, bandwidth, rolloff), one float32 value per frame
+    """
+    return _spectral_shape_jit(np.ascontiguousarray(S), freqs.astype(np.float64), roll_percent)
@@ -3,17 +3,199 @@ Visualization Generation Service
 Creates visualizations for music similarity analysis including heatmaps,
 DTW path plots, and melody contour comparisons.
 """
+import functools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 import matplotlib
 matplotlib.use('Agg')  # Use non-interactive backend for server
 import matplotlib.pyplot as plt
-import seaborn as sns
-import librosa
-import librosa.display
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, NamedTuple, Optional, Tuple
 import io
 import base64
-from matplotlib.patches import Rectangle
+from matplotlib.cm import ScalarMappable
+from matplotlib.collections import LineCollection, PatchCollection
+from matplotlib.colors import Normalize
+from matplotlib.patches import Rectangle, Wedge
+from PIL import Image, ImageDraw, ImageFont
+
+try:
+    from numba import njit
+except ImportError:  # pragma: no cover - numba ships with librosa
+    njit = None
+
+# Plot-rendering worker processes (at most one per plot of
+# generate_all_visualizations). Each holds its own matplotlib/numba
+# (~130 MB), so this is opt-in; 0 or 1 renders in the calling process
+RENDER_WORKERS = min(int(os.getenv("VIZ_RENDER_WORKERS", "0")), 5)
+_render_pool = None
+_render_pool_lock = threading.Lock()
+
+# Generators in a render worker process, by (dpi, figsize, png_level)
+_worker_generators: Dict[Tuple[int, Tuple[int, int], int], 'VisualizationGenerator'] = {}
+
+# zlib level 1 encodes PNGs several times faster than Pillow's default 6
+# for ~30% more bytes; the images are rendered per request, so latency wins
+PNG_COMPRESS_LEVEL = 1
+
+PITCH_CLASSES = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
+
+# DTW heatmap layout in pixels: plot area, then left/top/right/bottom
+# margins for ticks, labels and the colorbar
+HEATMAP_PLOT_SIZE = (960, 800)
+HEATMAP_MARGINS = (110, 70, 140, 80)
+
+
+@functools.lru_cache(maxsize=None)
+def _configure_style() -> None:
+    """
+    Apply the plot style once per process (rcParams are process-wide, so
+    repeating this per generator only rebuilds them). Style: seaborn's
+    whitegrid as bundled with matplotlib, without importing seaborn (and
+    pandas with it). Figure dpi is passed per figure instead.
+    """
+    plt.style.use('seaborn-v0_8-whitegrid')
+
+
+@functools.lru_cache(maxsize=None)
+def _colormap_lut(name: str) -> np.ndarray:
+    """
+    256-entry uint8 RGB lookup table for a matplotlib colormap, resolved
+    once per process and shared by every generator instance.
+    """
+    colors = matplotlib.colormaps[name](np.linspace(0.0, 1.0, 256))[:, :3]
+    return np.round(colors * 255).astype(np.uint8)
+
+
+@functools.lru_cache(maxsize=None)
+def _font(size: int, bold: bool = False) -> ImageFont.FreeTypeFont:
+    """DejaVu Sans (shipped with matplotlib) at the given pixel size."""
+    name = 'DejaVuSans-Bold.ttf' if bold else 'DejaVuSans.ttf'
+    return ImageFont.truetype(os.path.join(matplotlib.get_data_path(), 'fonts', 'ttf', name), size)
+
+
+def _downsample_time(M: np.ndarray, target_cols: int) -> Tuple[np.ndarray, int]:
+    """
+    Mean-pool the columns (time axis) of M by an integer factor so it has
+    about target_cols columns; trailing columns that don't fill a block
+    are dropped. Pixels are the limit of what a plot shows, so anything
+    finer is work for the rasterizer with no visible effect.
+    
+    Args:
+        M: Matrix to pool (rows x n_frames)
+        target_cols: Wanted number of columns (e.g. plot width in pixels)
+        
+    Returns:
+        Tuple of (pooled matrix, pooling factor)
+    """
+    k = max(1, M.shape[1] // target_cols)
+    if k == 1:
+        return M, 1
+    n_blocks = M.shape[1] // k
+    return M[:, :n_blocks * k].reshape(M.shape[0], n_blocks, k).mean(axis=2), k
+
+
+def _pooled_similarity_loop(C, k1, k2):
+    n1 = C.shape[0] // k1
+    n2 = C.shape[1] // k2
+    out = np.zeros((n2, n1), dtype=np.float32)
+    for b1 in range(n1):
+        for i in range(b1 * k1, (b1 + 1) * k1):
+            for b2 in range(n2):
+                acc = 0.0
+                for j in range(b2 * k2, (b2 + 1) * k2):
+                    acc += C[i, j]
+                out[b2, b1] += acc
+    scale = 1.0 / (k1 * k2)
+    for b2 in range(n2):
+        for b1 in range(n1):
+            out[b2, b1] = 1.0 / (1.0 + out[b2, b1] * scale)
+    return out
+
+
+# Serial on purpose: numba's parallel (OpenMP/TBB) runtime in the web
+# process breaks worker processes forked from it; one streaming read of C
+# is cheap next to drawing the figure
+_pooled_similarity_jit = njit(cache=True)(_pooled_similarity_loop) if njit else None
+
+
+def _pooled_similarity(C: np.ndarray, target_cols: int, target_rows: int) -> np.ndarray:
+    """
+    Block-mean pool a cost matrix to about target_cols x target_rows and
+    convert it to similarity 1 / (1 + cost), transposed so track 2 runs
+    down the rows. With numba this is one compiled pass over C instead of
+    two pooling copies and a transpose.
+    
+    Args:
+        C: Cost matrix (n_frames1 x n_frames2)
+        target_cols: Wanted output columns (track 1 axis)
+        target_rows: Wanted output rows (track 2 axis)
+        
+    Returns:
+        Similarity matrix (pooled n_frames2 x pooled n_frames1), float32
+    """
+    k1 = max(1, C.shape[0] // target_cols)
+    k2 = max(1, C.shape[1] // target_rows)
+    if _pooled_similarity_jit is not None:
+        return _pooled_similarity_jit(np.ascontiguousarray(C), k1, k2)
+    pooled, _ = _downsample_time(C, target_rows)
+    pooled, _ = _downsample_time(pooled.T, target_cols)
+    return 1.0 / (1.0 + pooled)
+
+
+class SegmentArrays(NamedTuple):
+    """Similar segments as parallel arrays (seconds; score 0-1)."""
+    starts1: np.ndarray
+    ends1: np.ndarray
+    starts2: np.ndarray
+    ends2: np.ndarray
+    scores: np.ndarray
+
+
+def _segment_arrays(segments: List[Dict]) -> SegmentArrays:
+    """Gather similar-segment dicts into SegmentArrays in one pass."""
+    values = np.array([[seg['track1_start_time'], seg['track1_end_time'],
+                        seg['track2_start_time'], seg['track2_end_time'],
+                        seg['similarity_score']] for seg in segments],
+                      dtype=np.float64).reshape(-1, 5)
+    return SegmentArrays(*values.T)
+
+
+def _f0_to_midi_voiced(f0: np.ndarray, voiced: np.ndarray) -> np.ndarray:
+    """
+    MIDI note numbers (as librosa.hz_to_midi) for voiced frames, NaN for
+    unvoiced ones. Every step runs in place on one float32 buffer.
+    """
+    midi = np.array(f0, dtype=np.float32)
+    np.maximum(midi, 1e-10, out=midi)
+    np.log2(midi, out=midi)
+    # 12 * log2(f / 440) + 69
+    midi *= 12.0
+    midi += 69.0 - 12.0 * np.log2(440.0)
+    np.copyto(midi, np.nan, where=~np.asarray(voiced, dtype=bool))
+    return midi
+
+
+def _voiced_runs(times: np.ndarray, voiced: np.ndarray) -> np.ndarray:
+    """
+    (start, width) in seconds of each run of voiced frames, spanning the
+    same times fill_between(where=voiced) shades, as one array for
+    broken_barh: one collection rather than a polygon per run.
+    """
+    edges = np.diff(np.asarray(voiced, dtype=np.int8), prepend=0, append=0)
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1) - 1
+    return np.column_stack([times[starts], times[ends] - times[starts]])
+
+
+def _rotated_text(text: str, font: ImageFont.FreeTypeFont) -> Image.Image:
+    """Text rendered on white and rotated to read bottom-to-top (y-axis labels)."""
+    left, top, right, bottom = font.getbbox(text)
+    img = Image.new('RGB', (right - left, bottom - top), 'white')
+    ImageDraw.Draw(img).text((-left, -top), text, fill='black', font=font)
+    return img.rotate(90, expand=True)
 
 
 class VisualizationGenerator:
@@ -21,26 +203,27 @@ class VisualizationGenerator:
     Generates visualizations for music similarity analysis.
     """
     
-    def __init__(self, dpi: int = 100, figsize: Tuple[int, int] = (12, 8)):
+    def __init__(self, dpi: int = 100, figsize: Tuple[int, int] = (12, 8),
+                 png_level: int = PNG_COMPRESS_LEVEL):
         """
         Initialize the VisualizationGenerator.
         
         Args:
             dpi: Resolution of output images
             figsize: Figure size in inches (width, height)
+            png_level: zlib compression level for PNG output (0-9)
         """
         self.dpi = dpi
         self.figsize = figsize
+        self.png_level = png_level
         
-        # Set style
-        sns.set_style("whitegrid")
-        plt.rcParams['figure.dpi'] = dpi
+        _configure_style()
         
     def plot_chroma_heatmap(self, chroma1: np.ndarray, chroma2: np.ndarray,
                            track1_title: str = "Track 1",
                            track2_title: str = "Track 2",
                            hop_length: int = 512,
-                           sample_rate: int = 22050) -> Tuple[bytes, str]:
+                           sample_rate: int = 22050) -> bytes:
         """
         Create side-by-side chroma heatmaps for two tracks.
         
@@ -53,55 +236,71 @@ class VisualizationGenerator:
             sample_rate: Sample rate
             
         Returns:
-            Tuple of (image_bytes, base64_string)
+            PNG image bytes
         """
-        fig, axes = plt.subplots(2, 1, figsize=(14, 8))
+        fig, axes = plt.subplots(2, 1, figsize=(14, 8), dpi=self.dpi)
+        
+        # Pool long tracks to about one column per pixel of width; each
+        # pooled column spans k frames
+        chroma1, k1 = _downsample_time(np.asarray(chroma1), 14 * self.dpi)
+        chroma2, k2 = _downsample_time(np.asarray(chroma2), 14 * self.dpi)
         
         # Plot first track
-        img1 = librosa.display.specshow(
-            chroma1,
-            y_axis='chroma',
-            x_axis='time',
-            hop_length=hop_length,
-            sr=sample_rate,
-            ax=axes[0],
-            cmap='coolwarm'
-        )
+        self._draw_chroma(fig, axes[0], chroma1, hop_length * k1 / sample_rate)
         axes[0].set_title(f'Chroma Features: {track1_title}', fontsize=14, fontweight='bold')
-        axes[0].set_ylabel('Pitch Class', fontsize=12)
-        fig.colorbar(img1, ax=axes[0], format='%0.2f')
         
         # Plot second track
-        img2 = librosa.display.specshow(
-            chroma2,
-            y_axis='chroma',
-            x_axis='time',
-            hop_length=hop_length,
-            sr=sample_rate,
-            ax=axes[1],
-            cmap='coolwarm'
-        )
+        self._draw_chroma(fig, axes[1], chroma2, hop_length * k2 / sample_rate)
         axes[1].set_title(f'Chroma Features: {track2_title}', fontsize=14, fontweight='bold')
-        axes[1].set_ylabel('Pitch Class', fontsize=12)
         axes[1].set_xlabel('Time (s)', fontsize=12)
-        fig.colorbar(img2, ax=axes[1], format='%0.2f')
         
         plt.tight_layout()
         
         # Convert to bytes
-        img_bytes, img_base64 = self._fig_to_bytes(fig)
+        img_bytes = self._fig_to_bytes(fig)
         plt.close(fig)
         
-        return img_bytes, img_base64
+        return img_bytes
+    
+    @staticmethod
+    def _draw_chroma(fig, ax, chroma: np.ndarray, column_seconds: float) -> None:
+        """
+        Draw a chroma matrix as a pre-colored RGB image (coolwarm LUT over
+        the matrix's own min-max range, as specshow would scale it) with
+        pitch-class ticks and a matching colorbar.
+        
+        Args:
+            fig: Matplotlib figure
+            ax: Axis to draw on
+            chroma: Chroma features (12 x n_columns)
+            column_seconds: Duration of one column in seconds
+        """
+        c_min = float(chroma.min())
+        c_max = float(chroma.max())
+        levels = (chroma - c_min) * (255.0 / max(c_max - c_min, 1e-12))
+        rgb = _colormap_lut('coolwarm')[levels.astype(np.uint8)]
+        ax.imshow(rgb, aspect='auto', origin='lower', interpolation='nearest',
+                  extent=[0, chroma.shape[1] * column_seconds, 0, chroma.shape[0]])
+        ax.set_yticks(np.arange(12) + 0.5)
+        ax.set_yticklabels(PITCH_CLASSES)
+        ax.set_ylabel('Pitch Class', fontsize=12)
+        ax.grid(False)
+        mappable = ScalarMappable(norm=Normalize(c_min, c_max), cmap='coolwarm')
+        fig.colorbar(mappable, ax=ax, format='%0.2f')
     
     def plot_dtw_alignment_heatmap(self, cost_matrix: np.ndarray,
                                    dtw_path: np.ndarray,
                                    track1_title: str = "Track 1",
                                    track2_title: str = "Track 2",
                                    hop_length: int = 512,
-                                   sample_rate: int = 22050) -> Tuple[bytes, str]:
+                                   sample_rate: int = 22050,
+                                   time1: Optional[np.ndarray] = None,
+                                   time2: Optional[np.ndarray] = None) -> bytes:
         """
         Create DTW cost matrix heatmap with optimal path overlay.
+        Drawn directly with Pillow: the similarity matrix is mapped through
+        a colormap lookup table to an RGB array, so large matrices skip
+        matplotlib's figure, axes and tight-bbox rendering.
         
         Args:
             cost_matrix: DTW cost matrix
@@ -110,62 +309,100 @@ class VisualizationGenerator:
             track2_title: Title of second track
             hop_length: Hop length used in feature extraction
             sample_rate: Sample rate
+            time1: Start time of each row (e.g. beat times); frame times if None
+            time2: Start time of each column; frame times if None
             
         Returns:
-            Tuple of (image_bytes, base64_string)
+            PNG image bytes
         """
-        fig, ax = plt.subplots(figsize=(12, 10))
-        
-        # Convert cost to similarity for better visualization
-        similarity_matrix = 1.0 / (1.0 + cost_matrix)
-        
-        # Plot heatmap
-        im = ax.imshow(
-            similarity_matrix.T,
-            aspect='auto',
-            origin='lower',
-            cmap='YlOrRd',
-            interpolation='nearest'
-        )
-        
-        # Plot DTW path
-        path = np.array(dtw_path)
-        ax.plot(path[:, 0], path[:, 1], 'b-', linewidth=2, label='DTW Alignment Path', alpha=0.7)
-        ax.plot(path[:, 0], path[:, 1], 'b.', markersize=3)
+        plot_w, plot_h = HEATMAP_PLOT_SIZE
+        left, top, right, bottom = HEATMAP_MARGINS
         
-        # Convert frame indices to time
+        # Pool the cost matrix to about one cell per pixel before coloring
+        # it (frame-level matrices run to 10k x 10k cells). Ticks and the
+        # path stay in frame coordinates of the full matrix
+        cost_matrix = np.asarray(cost_matrix, dtype=np.float32)
         n_frames1, n_frames2 = cost_matrix.shape
-        time1 = librosa.frames_to_time(np.arange(n_frames1), sr=sample_rate, hop_length=hop_length)
-        time2 = librosa.frames_to_time(np.arange(n_frames2), sr=sample_rate, hop_length=hop_length)
         
-        # Set tick labels
-        n_ticks = 10
-        tick_indices_x = np.linspace(0, n_frames1-1, n_ticks, dtype=int)
-        tick_indices_y = np.linspace(0, n_frames2-1, n_ticks, dtype=int)
-        ax.set_xticks(tick_indices_x)
-        ax.set_xticklabels([f'{time1[i]:.1f}' for i in tick_indices_x])
-        ax.set_yticks(tick_indices_y)
-        ax.set_yticklabels([f'{time2[i]:.1f}' for i in tick_indices_y])
-        
-        ax.set_xlabel(f'{track1_title} (time in seconds)', fontsize=12)
-        ax.set_ylabel(f'{track2_title} (time in seconds)', fontsize=12)
-        ax.set_title('Cross-Similarity Matrix with DTW Alignment Path\n(Brighter = More Similar)', 
-                    fontsize=14, fontweight='bold')
+        # Convert cost to similarity for better visualization (rows are
+        # track 2, columns track 1)
+        similarity_matrix = _pooled_similarity(cost_matrix, plot_w, plot_h)
+        s_min = float(similarity_matrix.min())
+        s_max = float(similarity_matrix.max())
+        s_range = max(s_max - s_min, 1e-12)
+        
+        # Heatmap as one lookup-table index: track 1 along x, track 2 up
+        # the y axis (first row of the image is the end of track 2)
+        lut = _colormap_lut('YlOrRd')
+        levels = similarity_matrix - s_min
+        levels *= 255.0 / s_range
+        rgb = lut[levels[::-1].astype(np.uint8)]
+        
+        canvas = Image.new('RGB', (left + plot_w + right, top + plot_h + bottom), 'white')
+        canvas.paste(Image.fromarray(rgb).resize((plot_w, plot_h), Image.Resampling.NEAREST),
+                     (left, top))
+        draw = ImageDraw.Draw(canvas)
+        draw.rectangle([left - 1, top - 1, left + plot_w, top + plot_h], outline='black')
+        
+        # Cell centers in canvas pixels
+        def x_pixel(i):
+            return left + (i + 0.5) * plot_w / n_frames1
+        
+        def y_pixel(j):
+            return top + plot_h - (j + 0.5) * plot_h / n_frames2
         
-        # Add colorbar
-        cbar = fig.colorbar(im, ax=ax)
-        cbar.set_label('Similarity Score', fontsize=11)
+        # Plot DTW path
+        path = np.asarray(dtw_path)
+        if len(path) > 1:
+            points = list(zip(x_pixel(path[:, 0]).tolist(), y_pixel(path[:, 1]).tolist()))
+            draw.line(points, fill=(0, 0, 255), width=2)
         
-        # Add legend
-        ax.legend(loc='upper left', fontsize=10)
+        # Tick marks and labels; frame times are only needed at the ticks
+        n_ticks = 10
+        tick_font = _font(12)
+        frame_seconds = hop_length / sample_rate
+        ticks1 = np.linspace(0, n_frames1 - 1, n_ticks, dtype=int)
+        ticks2 = np.linspace(0, n_frames2 - 1, n_ticks, dtype=int)
+        tick_times1 = ticks1 * frame_seconds if time1 is None else np.asarray(time1)[ticks1]
+        tick_times2 = ticks2 * frame_seconds if time2 is None else np.asarray(time2)[ticks2]
+        for i, t in zip(ticks1, tick_times1):
+            x = x_pixel(i)
+            draw.line([(x, top + plot_h), (x, top + plot_h + 5)], fill='black')
+            draw.text((x, top + plot_h + 8), f'{t:.1f}', fill='black', font=tick_font, anchor='mt')
+        for j, t in zip(ticks2, tick_times2):
+            y = y_pixel(j)
+            draw.line([(left - 5, y), (left, y)], fill='black')
+            draw.text((left - 8, y), f'{t:.1f}', fill='black', font=tick_font, anchor='rm')
+        
+        label_font = _font(14)
+        draw.text((left + plot_w / 2, top + plot_h + 40), f'{track1_title} (time in seconds)',
+                  fill='black', font=label_font, anchor='mt')
+        y_label = _rotated_text(f'{track2_title} (time in seconds)', label_font)
+        canvas.paste(y_label, (20, top + (plot_h - y_label.height) // 2))
+        draw.multiline_text((left + plot_w / 2, 12),
+                            'Cross-Similarity Matrix with DTW Alignment Path\n(Brighter = More Similar)',
+                            fill='black', font=_font(16, bold=True), anchor='ma', align='center')
+        
+        # Add colorbar: the LUT as a vertical strip, highest similarity on top
+        bar_left = left + plot_w + 25
+        gradient = lut[np.linspace(255, 0, plot_h).astype(np.uint8)]
+        strip = np.ascontiguousarray(np.broadcast_to(gradient[:, None, :], (plot_h, 20, 3)))
+        canvas.paste(Image.fromarray(strip), (bar_left, top))
+        draw.rectangle([bar_left - 1, top - 1, bar_left + 20, top + plot_h], outline='black')
+        for value in np.linspace(s_min, s_max, 5):
+            y = top + plot_h - 1 - (value - s_min) / s_range * (plot_h - 1)
+            draw.line([(bar_left + 20, y), (bar_left + 25, y)], fill='black')
+            draw.text((bar_left + 28, y), f'{value:.2f}', fill='black', font=tick_font, anchor='lm')
+        bar_label = _rotated_text('Similarity Score', _font(13))
+        canvas.paste(bar_label, (bar_left + 75, top + (plot_h - bar_label.height) // 2))
         
-        plt.tight_layout()
+        # Add legend
+        draw.rectangle([left + 10, top + 10, left + 200, top + 36], fill='white', outline='gray')
+        draw.line([(left + 18, top + 23), (left + 48, top + 23)], fill=(0, 0, 255), width=2)
+        draw.text((left + 56, top + 23), 'DTW Alignment Path', fill='black', font=_font(12), anchor='lm')
         
         # Convert to bytes
-        img_bytes, img_base64 = self._fig_to_bytes(fig)
-        plt.close(fig)
-        
-        return img_bytes, img_base64
+        return self._image_to_bytes(canvas)
     
     def plot_melody_contours(self, f0_1: np.ndarray, f0_2: np.ndarray,
                             voiced_1: np.ndarray, voiced_2: np.ndarray,
@@ -173,7 +410,7 @@ class VisualizationGenerator:
                             track2_title: str = "Track 2",
                             hop_length: int = 512,
                             sample_rate: int = 22050,
-                            dtw_path: Optional[np.ndarray] = None) -> Tuple[bytes, str]:
+                            dtw_path: Optional[np.ndarray] = None) -> bytes:
         """
         Create melody contour comparison plot.
         
@@ -189,25 +426,24 @@ class VisualizationGenerator:
             dtw_path: Optional DTW alignment path
             
         Returns:
-            Tuple of (image_bytes, base64_string)
+            PNG image bytes
         """
-        fig, axes = plt.subplots(2, 1, figsize=(14, 8), sharex=False)
+        fig, axes = plt.subplots(2, 1, figsize=(14, 8), sharex=False, dpi=self.dpi)
         
-        # Convert to time and MIDI
-        time1 = librosa.frames_to_time(np.arange(len(f0_1)), sr=sample_rate, hop_length=hop_length)
-        time2 = librosa.frames_to_time(np.arange(len(f0_2)), sr=sample_rate, hop_length=hop_length)
+        # Convert to time (frame * hop / sr, as librosa.frames_to_time) and MIDI
+        frame_seconds = np.float32(hop_length / sample_rate)
+        time1 = np.arange(len(f0_1), dtype=np.float32) * frame_seconds
+        time2 = np.arange(len(f0_2), dtype=np.float32) * frame_seconds
         
-        # Convert Hz to MIDI notes for better visualization
-        midi_1 = librosa.hz_to_midi(np.maximum(f0_1, 1e-10))
-        midi_2 = librosa.hz_to_midi(np.maximum(f0_2, 1e-10))
-        
-        # Set unvoiced to NaN for gaps in plot
-        midi_1[~voiced_1] = np.nan
-        midi_2[~voiced_2] = np.nan
+        # Convert Hz to MIDI notes for better visualization, unvoiced as
+        # NaN for gaps in plot
+        midi_1 = _f0_to_midi_voiced(f0_1, voiced_1)
+        midi_2 = _f0_to_midi_voiced(f0_2, voiced_2)
         
         # Plot first track
         axes[0].plot(time1, midi_1, 'b-', linewidth=1.5, label='Melody Contour')
-        axes[0].fill_between(time1, 0, 127, where=voiced_1, alpha=0.1, color='blue', label='Voiced Regions')
+        axes[0].broken_barh(_voiced_runs(time1, voiced_1), (0, 127), alpha=0.1, color='blue',
+                            label='Voiced Regions')
         axes[0].set_ylabel('MIDI Note Number', fontsize=12)
         axes[0].set_title(f'Melody Contour: {track1_title}', fontsize=14, fontweight='bold')
         axes[0].set_ylim([40, 90])
@@ -222,7 +458,8 @@ class VisualizationGenerator:
         
         # Plot second track
         axes[1].plot(time2, midi_2, 'r-', linewidth=1.5, label='Melody Contour')
-        axes[1].fill_between(time2, 0, 127, where=voiced_2, alpha=0.1, color='red', label='Voiced Regions')
+        axes[1].broken_barh(_voiced_runs(time2, voiced_2), (0, 127), alpha=0.1, color='red',
+                            label='Voiced Regions')
         axes[1].set_ylabel('MIDI Note Number', fontsize=12)
         axes[1].set_xlabel('Time (seconds)', fontsize=12)
         axes[1].set_title(f'Melody Contour: {track2_title}', fontsize=14, fontweight='bold')
@@ -236,15 +473,15 @@ class VisualizationGenerator:
         plt.tight_layout()
         
         # Convert to bytes
-        img_bytes, img_base64 = self._fig_to_bytes(fig)
+        img_bytes = self._fig_to_bytes(fig)
         plt.close(fig)
         
-        return img_bytes, img_base64
+        return img_bytes
     
     def plot_similarity_segments(self, similar_segments: list,
                                 duration1: float, duration2: float,
                                 track1_title: str = "Track 1",
-                                track2_title: str = "Track 2") -> Tuple[bytes, str]:
+                                track2_title: str = "Track 2") -> bytes:
         """
         Visualize similar segments between two tracks.
         
@@ -256,9 +493,9 @@ class VisualizationGenerator:
             track2_title: Title of second track
             
         Returns:
-            Tuple of (image_bytes, base64_string)
+            PNG image bytes
         """
-        fig, ax = plt.subplots(figsize=(14, 6))
+        fig, ax = plt.subplots(figsize=(14, 6), dpi=self.dpi)
         
         # Draw timeline bars
         bar_height = 0.8
@@ -272,37 +509,46 @@ class VisualizationGenerator:
                 edgecolor='black', linewidth=2, label=track2_title)
         
         # Draw similar segments
-        colors = plt.cm.viridis(np.linspace(0.2, 0.9, len(similar_segments)))
-        
-        for i, seg in enumerate(similar_segments[:10]):  # Show top 10
-            # Segment on track 1
-            start1 = seg['track1_start_time']
-            width1 = seg['track1_end_time'] - start1
-            rect1 = Rectangle((start1, track1_y - bar_height/2), width1, bar_height,
-                             facecolor=colors[i], edgecolor='darkgreen', 
-                             linewidth=2, alpha=0.7)
-            ax.add_patch(rect1)
+        # Same spread as viridis(linspace(0.2, 0.9)), from the cached LUT
+        lut_indices = np.linspace(0.2 * 255, 0.9 * 255, len(similar_segments)).astype(int)
+        colors = _colormap_lut('viridis')[lut_indices] / 255.0
+        
+        shown = similar_segments[:10]  # Show top 10
+        if shown:
+            # Segment times as arrays; all rectangles go in one collection
+            # and all connectors in another instead of an artist per shape
+            segs = _segment_arrays(shown)
+            starts1, widths1 = segs.starts1, segs.ends1 - segs.starts1
+            starts2, widths2 = segs.starts2, segs.ends2 - segs.starts2
             
-            # Segment on track 2
-            start2 = seg['track2_start_time']
-            width2 = seg['track2_end_time'] - start2
-            rect2 = Rectangle((start2, track2_y - bar_height/2), width2, bar_height,
-                             facecolor=colors[i], edgecolor='darkgreen', 
-                             linewidth=2, alpha=0.7)
-            ax.add_patch(rect2)
+            # Segments on track 1, then on track 2
+            rects = [Rectangle((start, track1_y - bar_height/2), width, bar_height)
+                     for start, width in zip(starts1, widths1)]
+            rects += [Rectangle((start, track2_y - bar_height/2), width, bar_height)
+                      for start, width in zip(starts2, widths2)]
+            seg_colors = colors[:len(shown)]
+            ax.add_collection(PatchCollection(
+                rects, facecolors=np.vstack([seg_colors, seg_colors]),
+                edgecolors='darkgreen', linewidths=2, alpha=0.7
+            ))
             
-            # Draw connection line
-            mid1_x = start1 + width1/2
-            mid2_x = start2 + width2/2
-            ax.plot([mid1_x, mid2_x], [track1_y - bar_height/2, track2_y + bar_height/2],
-                   'g--', linewidth=1.5, alpha=0.5)
+            # Draw connection lines
+            mid1_x = starts1 + widths1/2
+            mid2_x = starts2 + widths2/2
+            connectors = np.stack([
+                np.column_stack([mid1_x, np.full(len(shown), track1_y - bar_height/2)]),
+                np.column_stack([mid2_x, np.full(len(shown), track2_y + bar_height/2)])
+            ], axis=1)
+            ax.add_collection(LineCollection(connectors, colors='g', linestyles='--',
+                                             linewidths=1.5, alpha=0.5))
             
-            # Add similarity label
+            # Add similarity labels
             mid_y = (track1_y + track2_y) / 2
-            ax.text(max(mid1_x, mid2_x) + 1, mid_y, 
-                   f'{seg["similarity_score"]*100:.0f}%',
-                   fontsize=9, ha='left', va='center',
-                   bbox=dict(boxstyle='round,pad=0.3', facecolor='yellow', alpha=0.7))
+            for score, label_x in zip(segs.scores, np.maximum(mid1_x, mid2_x) + 1):
+                ax.text(label_x, mid_y,
+                       f'{score*100:.0f}%',
+                       fontsize=9, ha='left', va='center',
+                       bbox=dict(boxstyle='round,pad=0.3', facecolor='yellow', alpha=0.7))
         
         # Formatting
         ax.set_ylim([0.5, 2.5])
@@ -317,12 +563,12 @@ class VisualizationGenerator:
         plt.tight_layout()
         
         # Convert to bytes
-        img_bytes, img_base64 = self._fig_to_bytes(fig)
+        img_bytes = self._fig_to_bytes(fig)
         plt.close(fig)
         
-        return img_bytes, img_base64
+        return img_bytes
     
-    def plot_similarity_summary(self, comparison_result: Dict) -> Tuple[bytes, str]:
+    def plot_similarity_summary(self, comparison_result: Dict) -> bytes:
         """
         Create a summary visualization with multiple metrics.
         
@@ -330,9 +576,9 @@ class VisualizationGenerator:
             comparison_result: Complete comparison result dictionary
             
         Returns:
-            Tuple of (image_bytes, base64_string)
+            PNG image bytes
         """
-        fig = plt.figure(figsize=(14, 10))
+        fig = plt.figure(figsize=(14, 10), dpi=self.dpi)
         gs = fig.add_gridspec(3, 2, hspace=0.3, wspace=0.3)
         
         overall = comparison_result['overall_similarity']
@@ -392,12 +638,15 @@ class VisualizationGenerator:
         
         if similar_segs:
             ax4.axis('off')
-            seg_text = [f"Found {len(similar_segs)} similar segments:\n"]
-            for i, seg in enumerate(similar_segs[:5], 1):
+            # The list may hold only the summary's segments; the count covers all
+            segment_count = comparison_result.get('similar_segment_count', len(similar_segs))
+            seg_text = [f"Found {segment_count} similar segments:\n"]
+            segs = _segment_arrays(similar_segs[:5])
+            for i, (start1, end1, start2, end2, score) in enumerate(zip(*segs), 1):
                 seg_text.append(
-                    f"{i}. [{seg['track1_start_time']:.1f}s - {seg['track1_end_time']:.1f}s] "
-                    f"↔ [{seg['track2_start_time']:.1f}s - {seg['track2_end_time']:.1f}s] "
-                    f"({seg['similarity_score']*100:.0f}% match)"
+                    f"{i}. [{start1:.1f}s - {end1:.1f}s] "
+                    f"↔ [{start2:.1f}s - {end2:.1f}s] "
+                    f"({score*100:.0f}% match)"
                 )
             ax4.text(0.05, 0.95, '\n'.join(seg_text), transform=ax4.transAxes,
                     fontsize=10, verticalalignment='top', family='monospace',
@@ -408,10 +657,10 @@ class VisualizationGenerator:
                     fontsize=12, style='italic', color='gray')
         
         # Convert to bytes
-        img_bytes, img_base64 = self._fig_to_bytes(fig)
+        img_bytes = self._fig_to_bytes(fig)
         plt.close(fig)
         
-        return img_bytes, img_base64
+        return img_bytes
     
     def _plot_similarity_gauge(self, ax, percentage: float):
         """
@@ -438,16 +687,18 @@ class VisualizationGenerator:
             color = '#90EE90'
             label = 'Very Low Similarity'
         
-        # Create gauge
-        theta = np.linspace(0, np.pi, 100)
+        # Create gauge: arcs as annular wedges centered on radius 1, one
+        # patch each instead of thick 100-vertex lines
         r = 1
+        band = 0.08
         
         # Background arc
-        ax.plot(r * np.cos(theta), r * np.sin(theta), 'lightgray', linewidth=20, solid_capstyle='round')
+        ax.add_patch(Wedge((0, 0), r + band / 2, 0, 180, width=band, facecolor='lightgray'))
         
         # Colored arc based on percentage
-        theta_filled = np.linspace(0, np.pi * (percentage / 100), 100)
-        ax.plot(r * np.cos(theta_filled), r * np.sin(theta_filled), color, linewidth=20, solid_capstyle='round')
+        if percentage > 0:
+            ax.add_patch(Wedge((0, 0), r + band / 2, 0, 180 * (percentage / 100), width=band,
+                               facecolor=color))
         
         # Center text
         ax.text(0, -0.2, f'{percentage:.1f}%', ha='center', va='center',
@@ -460,51 +711,76 @@ class VisualizationGenerator:
         ax.axis('off')
         ax.set_title('Overall Similarity Score', fontsize=16, fontweight='bold', pad=20)
     
-    def _fig_to_bytes(self, fig) -> Tuple[bytes, str]:
+    def _image_to_bytes(self, img: Image.Image) -> bytes:
         """
-        Convert matplotlib figure to bytes and base64 string.
+        Encode a Pillow image as PNG bytes.
         
         Args:
-            fig: Matplotlib figure
+            img: Pillow image
             
         Returns:
-            Tuple of (image_bytes, base64_string)
+            PNG image bytes
         """
         buf = io.BytesIO()
-        fig.savefig(buf, format='png', dpi=self.dpi, bbox_inches='tight')
-        buf.seek(0)
-        img_bytes = buf.read()
-        img_base64 = base64.b64encode(img_bytes).decode('utf-8')
+        img.save(buf, format='PNG', optimize=False, compress_level=self.png_level)
+        img_bytes = buf.getvalue()
         buf.close()
-        return img_bytes, img_base64
+        return img_bytes
+    
+    def _fig_to_bytes(self, fig) -> bytes:
+        """
+        Convert matplotlib figure to PNG bytes.
+        
+        Args:
+            fig: Matplotlib figure
+            
+        Returns:
+            PNG image bytes
+        """
+        # Render once on the Agg canvas and encode its pixel buffer
+        # directly; no bbox_inches='tight' (which draws the figure once
+        # just to measure it), layout comes from tight_layout (or the
+        # summary's gridspec) instead
+        if fig.dpi != self.dpi:
+            fig.set_dpi(self.dpi)
+        fig.canvas.draw()
+        # The figure background is opaque, so alpha carries nothing
+        rgba = np.asarray(fig.canvas.buffer_rgba())
+        return self._image_to_bytes(Image.fromarray(rgba[..., :3]))
     
     def generate_all_visualizations(self, comparison_result: Dict,
-                                   output_dir: Optional[str] = None) -> Dict[str, Dict]:
+                                   output_dir: Optional[str] = None,
+                                   include_base64: bool = True) -> Dict[str, Dict]:
         """
         Generate all visualizations for a comparison result.
         
         Args:
             comparison_result: Complete comparison result from SimilarityComparator
             output_dir: Optional directory to save images to disk
+            include_base64: Also return each image base64-encoded (encoded
+                here, once); callers that only store or serve the bytes skip it
             
         Returns:
             Dictionary mapping visualization names to {bytes, base64, path}
+            (base64 only when include_base64)
         """
-        visualizations = {}
-        
         # Extract data
         raw_data = comparison_result['raw_data']
         features1 = raw_data['features1']
         features2 = raw_data['features2']
         
-        chroma1 = np.array(features1['chroma_cqt'])
-        chroma2 = np.array(features2['chroma_cqt'])
-        cost_matrix = np.array(raw_data['chroma_cost_matrix'])
-        dtw_path = np.array(raw_data['chroma_dtw_path'])
-        f0_1 = np.array(features1['f0_smoothed'])
-        f0_2 = np.array(features2['f0_smoothed'])
-        voiced_1 = np.array(features1['voiced_flag'])
-        voiced_2 = np.array(features2['voiced_flag'])
+        # Arrays are converted here once rather than in every worker.
+        # asarray passes ndarrays of the right dtype through uncopied (the
+        # comparator's features and cost matrix already are float32);
+        # float32 halves what list or float64 input costs to pickle and plot
+        chroma1 = np.asarray(features1['chroma_cqt'], dtype=np.float32)
+        chroma2 = np.asarray(features2['chroma_cqt'], dtype=np.float32)
+        cost_matrix = np.asarray(raw_data['chroma_cost_matrix'], dtype=np.float32)
+        dtw_path = np.asarray(raw_data['chroma_dtw_path'])
+        f0_1 = np.asarray(features1['f0_smoothed'], dtype=np.float32)
+        f0_2 = np.asarray(features2['f0_smoothed'], dtype=np.float32)
+        voiced_1 = np.asarray(features1['voiced_flag'], dtype=np.bool_)
+        voiced_2 = np.asarray(features2['voiced_flag'], dtype=np.bool_)
         
         track1_title = comparison_result['track1']['title']
         track2_title = comparison_result['track2']['title']
@@ -512,67 +788,72 @@ class VisualizationGenerator:
         hop_length = features1['hop_length']
         sample_rate = features1['sample_rate']
         
-        # 1. Chroma heatmaps
-        print("Generating chroma heatmap...")
-        img_bytes, img_base64 = self.plot_chroma_heatmap(
-            chroma1, chroma2, track1_title, track2_title, hop_length, sample_rate
-        )
-        visualizations['chroma_heatmap'] = {
-            'bytes': img_bytes,
-            'base64': img_base64,
-            'filename': 'chroma_comparison.png'
+        # name -> (progress message, plot method, args, kwargs, filename)
+        tasks = {
+            'chroma_heatmap': (
+                "Generating chroma heatmap...", 'plot_chroma_heatmap',
+                (chroma1, chroma2, track1_title, track2_title, hop_length, sample_rate), {},
+                'chroma_comparison.png'
+            ),
+            # Beat-synced cost matrices carry their own row/column times
+            'dtw_heatmap': (
+                "Generating DTW alignment heatmap...", 'plot_dtw_alignment_heatmap',
+                (cost_matrix, dtw_path, track1_title, track2_title, hop_length, sample_rate),
+                {'time1': raw_data.get('chroma_time_edges1'),
+                 'time2': raw_data.get('chroma_time_edges2')},
+                'dtw_alignment.png'
+            ),
+            'melody_contours': (
+                "Generating melody contour plot...", 'plot_melody_contours',
+                (f0_1, f0_2, voiced_1, voiced_2, track1_title, track2_title,
+                 hop_length, sample_rate), {},
+                'melody_contours.png'
+            ),
         }
-        
-        # 2. DTW alignment heatmap
-        print("Generating DTW alignment heatmap...")
-        img_bytes, img_base64 = self.plot_dtw_alignment_heatmap(
-            cost_matrix, dtw_path, track1_title, track2_title, hop_length, sample_rate
+        if comparison_result.get('similar_segments'):
+            tasks['segments_timeline'] = (
+                "Generating similar segments timeline...", 'plot_similarity_segments',
+                (comparison_result['similar_segments'],
+                 comparison_result['track1']['duration'],
+                 comparison_result['track2']['duration'],
+                 track1_title, track2_title), {},
+                'similar_segments.png'
+            )
+        # The dashboard reads only the scores; raw_data stays out of the pickle
+        summary_input = {k: v for k, v in comparison_result.items() if k != 'raw_data'}
+        tasks['summary_dashboard'] = (
+            "Generating summary dashboard...", 'plot_similarity_summary',
+            (summary_input,), {},
+            'summary_dashboard.png'
         )
-        visualizations['dtw_heatmap'] = {
-            'bytes': img_bytes,
-            'base64': img_base64,
-            'filename': 'dtw_alignment.png'
-        }
         
-        # 3. Melody contours
-        print("Generating melody contour plot...")
-        img_bytes, img_base64 = self.plot_melody_contours(
-            f0_1, f0_2, voiced_1, voiced_2, track1_title, track2_title,
-            hop_length, sample_rate
-        )
-        visualizations['melody_contours'] = {
-            'bytes': img_bytes,
-            'base64': img_base64,
-            'filename': 'melody_contours.png'
-        }
+        # Each figure renders independently and the Agg rasterizer holds the
+        # GIL, so the plots run in separate processes when cores allow
+        pool = _get_render_pool()
+        if pool is None:
+            rendered = {}
+            for name, (message, method, args, kwargs, _) in tasks.items():
+                print(message)
+                rendered[name] = getattr(self, method)(*args, **kwargs)
+        else:
+            settings = (self.dpi, self.figsize, self.png_level)
+            futures = {}
+            for name, (message, method, args, kwargs, _) in tasks.items():
+                print(message)
+                futures[name] = pool.submit(_render_in_worker, settings, method, args, kwargs)
+            rendered = {name: future.result() for name, future in futures.items()}
         
-        # 4. Similar segments timeline
-        if comparison_result.get('similar_segments'):
-            print("Generating similar segments timeline...")
-            img_bytes, img_base64 = self.plot_similarity_segments(
-                comparison_result['similar_segments'],
-                comparison_result['track1']['duration'],
-                comparison_result['track2']['duration'],
-                track1_title, track2_title
-            )
-            visualizations['segments_timeline'] = {
-                'bytes': img_bytes,
-                'base64': img_base64,
-                'filename': 'similar_segments.png'
+        visualizations = {}
+        for name, (_, _, _, _, filename) in tasks.items():
+            visualizations[name] = {
+                'bytes': rendered[name],
+                'filename': filename
             }
-        
-        # 5. Summary dashboard
-        print("Generating summary dashboard...")
-        img_bytes, img_base64 = self.plot_similarity_summary(comparison_result)
-        visualizations['summary_dashboard'] = {
-            'bytes': img_bytes,
-            'base64': img_base64,
-            'filename': 'summary_dashboard.png'
-        }
+            if include_base64:
+                visualizations[name]['base64'] = base64.b64encode(rendered[name]).decode('utf-8')
         
         # Save to disk if output_dir provided
         if output_dir:
-            import os
             os.makedirs(output_dir, exist_ok=True)
             for name, viz in visualizations.items():
                 filepath = os.path.join(output_dir, viz['filename'])
@@ -581,3 +862,38 @@ class VisualizationGenerator:
                 viz['path'] = filepath
         
         return visualizations
+
+
+def _get_render_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    Return the shared plot-rendering process pool, or None unless
+    VIZ_RENDER_WORKERS asks for two or more workers (and the cores exist).
+    The pool lives for the whole process, so workers keep their imports,
+    generators, colormap LUTs and fonts between comparisons.
+    """
+    global _render_pool
+    workers = min(RENDER_WORKERS, os.cpu_count() or 1)
+    if workers < 2:
+        return None
+    with _render_pool_lock:
+        if _render_pool is None:
+            # Spawned, not forked: the web worker is threaded (gevent) and
+            # may already run OpenMP/numba threads, which don't survive fork
+            _render_pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+    return _render_pool
+
+
+def _render_in_worker(settings: Tuple[int, Tuple[int, int], int], method: str,
+                      args: tuple, kwargs: Dict) -> bytes:
+    """
+    Run one VisualizationGenerator plot method in a worker process and
+    return its PNG bytes (the caller encodes base64 if it wants it).
+    """
+    generator = _worker_generators.get(settings)
+    if generator is None:
+        dpi, figsize, png_level = settings
+        generator = VisualizationGenerator(dpi=dpi, figsize=figsize, png_level=png_level)
+        _worker_generators[settings] = generator
+    return getattr(generator, method)(*args, **kwargs)
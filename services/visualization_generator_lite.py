@@ -3,37 +3,62 @@ Lightweight Visualization Generation Service
 Creates simple visualizations without matplotlib/seaborn to reduce image size.
 Uses Pillow for basic image generation.
 """
+import functools
 import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 from typing import Dict, Optional, Tuple
 import io
 import base64
 
+# Fast zlib level: several times quicker to encode than Pillow's default 6
+PNG_COMPRESS_LEVEL = 1
+
+
+@functools.lru_cache(maxsize=None)
+def _load_fonts():
+    """
+    Title and body fonts, loaded once per process (a truetype load is
+    several ms; app.py builds a new generator for every comparison).
+    """
+    # Try to load a font, fallback to default
+    try:
+        title_font = ImageFont.truetype("arial.ttf", 24)
+        text_font = ImageFont.truetype("arial.ttf", 16)
+    except:
+        title_font = ImageFont.load_default()
+        text_font = ImageFont.load_default()
+    return title_font, text_font
+
 
 class VisualizationGenerator:
     """
     Lightweight visualization generator using Pillow instead of matplotlib.
     """
     
-    def __init__(self, dpi: int = 100, figsize: Tuple[int, int] = (12, 8)):
+    def __init__(self, dpi: int = 100, figsize: Tuple[int, int] = (12, 8),
+                 png_level: int = PNG_COMPRESS_LEVEL):
         """
         Initialize the VisualizationGenerator.
         
         Args:
             dpi: Resolution of output images (unused, kept for compatibility)
             figsize: Figure size in inches (width, height)
+            png_level: zlib compression level for PNG output (0-9)
         """
         self.width = figsize[0] * 100  # Convert to pixels
         self.height = figsize[1] * 100
+        self.png_level = png_level
         
     def generate_all_visualizations(self, comparison_result: Dict,
-                                   output_dir: Optional[str] = None) -> Dict[str, Dict]:
+                                   output_dir: Optional[str] = None,
+                                   include_base64: bool = True) -> Dict[str, Dict]:
         """
         Generate simplified visualizations for a comparison result.
         
         Args:
             comparison_result: Dictionary containing comparison results
             output_dir: Optional directory to save images (not used)
+            include_base64: Accepted for compatibility; no base64 is produced
             
         Returns:
             Dictionary mapping visualization names to their data
@@ -60,13 +85,7 @@ class VisualizationGenerator:
         img = Image.new('RGB', (800, 600), color='white')
         draw = ImageDraw.Draw(img)
         
-        # Try to load a font, fallback to default
-        try:
-            title_font = ImageFont.truetype("arial.ttf", 24)
-            text_font = ImageFont.truetype("arial.ttf", 16)
-        except:
-            title_font = ImageFont.load_default()
-            text_font = ImageFont.load_default()
+        title_font, text_font = _load_fonts()
         
         # Draw title
         title = "Music Similarity Analysis"
@@ -112,7 +131,7 @@ class VisualizationGenerator:
         
         # Convert to bytes
         buffer = io.BytesIO()
-        img.save(buffer, format='PNG')
+        img.save(buffer, format='PNG', compress_level=self.png_level)
         img_bytes = buffer.getvalue()
         buffer.close()
         
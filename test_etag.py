@@ -0,0 +1,53 @@
+"""
+Conditional requests against responses Flask-Compress has compressed.
+Flask-Compress rewrites the ETag to "<tag>:gzip", and that is the value
+clients send back in If-None-Match.
+
+Usage:
+    python -m pytest test_etag.py
+"""
+from flask import Flask, jsonify
+from flask_compress import Compress
+
+from conditional_requests import etag_matches
+
+ETAG = "abc123"
+
+app = Flask(__name__)
+Compress(app)
+
+
+@app.get("/etag")
+def _etag_view():
+    if etag_matches(ETAG):
+        return app.response_class(status=304, headers={"ETag": f'"{ETAG}"'})
+    # Large enough to pass Flask-Compress's minimum size
+    response = jsonify({"values": list(range(500))})
+    response.set_etag(ETAG)
+    return response
+
+
+def test_compressed_etag_is_sent_back_as_not_modified():
+    client = app.test_client()
+    first = client.get("/etag", headers={"Accept-Encoding": "gzip"})
+    assert first.status_code == 200
+    assert first.headers["Content-Encoding"] == "gzip"
+    assert first.headers["ETag"] == f'"{ETAG}:gzip"'
+    
+    second = client.get("/etag", headers={
+        "Accept-Encoding": "gzip",
+        "If-None-Match": first.headers["ETag"],
+    })
+    assert second.status_code == 304
+
+
+def test_etag_matches_plain_and_suffixed_tags():
+    for header, expected in [
+        (f'"{ETAG}"', True),
+        (f'"{ETAG}:br"', True),
+        (f'W/"{ETAG}:deflate"', True),
+        ('"other:gzip"', False),
+        ("*", True),
+    ]:
+        with app.test_request_context(headers={"If-None-Match": header}):
+            assert etag_matches(ETAG) is expected, header
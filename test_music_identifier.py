@@ -5,38 +5,47 @@ Tests the acoustid music identification functionality.
 Usage:
     python test_music_identifier.py path/to/audio.mp3
 """
+import io
 import sys
 import json
 from services.music_identifier import identify_music
+from services.fingerprint_cache import DEFAULT_FINGERPRINT_CACHE
 
 def test_identifier(audio_path: str):
     """Test the music identifier with a file."""
-    print(f"Identifying music: {audio_path}\n")
-    print("=" * 70)
+    # Output is collected and written once; finally flushes it on every path
+    out = io.StringIO()
+    print(f"Identifying music: {audio_path}\n", file=out)
+    print("=" * 70, file=out)
     
     try:
-        # Perform identification
-        result = identify_music(audio_path, max_results=5)
+        # Perform identification; reruns on an unchanged file reuse its fingerprint
+        result = identify_music(audio_path, max_results=5,
+                                fingerprint_cache=DEFAULT_FINGERPRINT_CACHE)
         
         if result["success"]:
-            print("✅ IDENTIFICATION SUCCESSFUL\n")
-            print(f"Found {len(result['matches'])} match(es):\n")
+            print("✅ IDENTIFICATION SUCCESSFUL\n", file=out)
+            print(f"Found {len(result['matches'])} match(es):\n", file=out)
             
-            for i, match in enumerate(result["matches"], 1):
-                print(f"{i}. {match['artist']} - {match['title']}")
-                print(f"   Score: {match['score']}%")
-                print(f"   MusicBrainz: {match['musicbrainz_url']}")
-                print()
+            print("\n".join(
+                f"{i}. {match['artist']} - {match['title']}\n"
+                f"   Score: {match['score']}%\n"
+                f"   MusicBrainz: {match['musicbrainz_url']}\n"
+                for i, match in enumerate(result["matches"], 1)
+            ), file=out)
             
             return result
         else:
-            print("❌ IDENTIFICATION FAILED")
-            print(f"Error: {result['error']}\n")
+            print("❌ IDENTIFICATION FAILED", file=out)
+            print(f"Error: {result['error']}\n", file=out)
             return None
             
     except Exception as e:
-        print(f"❌ EXCEPTION: {str(e)}\n")
+        print(f"❌ EXCEPTION: {str(e)}\n", file=out)
         return None
+    finally:
+        sys.stdout.write(out.getvalue())
+        sys.stdout.flush()
 
 
 if __name__ == "__main__":
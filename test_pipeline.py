@@ -0,0 +1,31 @@
+"""
+Test script for the analysis and identification pipeline
+Runs AudioAnalyzer and the music identifier on the same file side by side.
+
+Usage:
+    python test_pipeline.py path/to/audio.mp3
+"""
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from test_analyzer import test_analyzer
+from test_music_identifier import test_identifier
+
+def test_pipeline(audio_path: str):
+    """Test analysis and identification of a file concurrently."""
+    # Identification is mostly waiting on fpcalc (a subprocess) and the
+    # AcoustID web service, so it overlaps with the analyzer's numpy work;
+    # each test buffers its own output, so the two reports don't interleave
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        identification = pool.submit(test_identifier, audio_path)
+        analysis = pool.submit(test_analyzer, audio_path)
+        return analysis.result(), identification.result()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python test_pipeline.py <audio_file_path>")
+        print("Example: python test_pipeline.py pyacoustid/a.mp3")
+        sys.exit(1)
+
+    audio_path = sys.argv[1]
+    test_pipeline(audio_path)
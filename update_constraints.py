@@ -2,56 +2,169 @@
 Update database constraints to support new analysis methods and statuses.
 Run this script to update the database without losing data.
 """
-from sqlalchemy import text
+import re
+from typing import Dict, List, Set, Tuple
+
+from sqlalchemy import CheckConstraint, text
 from database import engine
+from models import Analysis, Artifact
+
+# Value-list checks kept in sync with the database; their expressions come
+# from models.py, so the script can never lag behind (or narrow) the schema
+CONSTRAINT_NAMES = [
+    (Analysis, "analyses_method_check"),
+    (Analysis, "analyses_status_check"),
+    (Artifact, "artifacts_type_check"),
+]
+
+
+def _model_constraints() -> List[Tuple[str, str, str]]:
+    """(table, constraint name, check expression) for each of CONSTRAINT_NAMES."""
+    constraints = []
+    for model, name in CONSTRAINT_NAMES:
+        table = model.__table__
+        check = next(c for c in table.constraints
+                     if isinstance(c, CheckConstraint) and c.name == name)
+        constraints.append((table.name, name, str(check.sqltext)))
+    return constraints
+
+
+CONSTRAINTS = _model_constraints()
+
+
+def _allowed_values(check: str) -> Set[str]:
+    """
+    Quoted literals of a check expression. Postgres stores IN (...) as
+    = ANY (ARRAY[...]) with casts, so definitions are compared by the
+    values they allow rather than as text.
+    """
+    return set(re.findall(r"'([^']*)'", check))
+
+
+def _current_constraints(conn) -> Dict[str, Tuple[str, bool]]:
+    """Definition and validation state of each existing constraint, by name."""
+    rows = conn.execute(text(
+        "SELECT conname, pg_get_constraintdef(oid), convalidated "
+        "FROM pg_constraint WHERE conname = ANY(:names)"
+    ), {"names": [name for _, name, _ in CONSTRAINTS]})
+    return {name: (definition, validated) for name, definition, validated in rows}
+
+
+def _replace_constraints_sql(constraints: List[Tuple[str, str, str]]) -> str:
+    """
+    One ALTER TABLE per table that drops its old constraints and adds the
+    new ones as NOT VALID, so each table is locked once and not scanned.
+    """
+    drops, adds = {}, {}
+    for table, name, check in constraints:
+        drops.setdefault(table, []).append(f"DROP CONSTRAINT IF EXISTS {name}")
+        adds.setdefault(table, []).append(f"ADD CONSTRAINT {name} CHECK ({check}) NOT VALID")
+    return ";\n".join(
+        f"ALTER TABLE {table} " + ", ".join(drops[table] + adds[table])
+        for table in drops
+    )
+
+
+def _restore_constraints_sql(constraints: List[Tuple[str, str, str]],
+                             current: Dict[str, Tuple[str, bool]]) -> str:
+    """
+    Put replaced constraints back as they were before this run: the old
+    definition where there was one, otherwise no constraint at all.
+    """
+    statements = []
+    for table, name, _ in constraints:
+        action = f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {name}"
+        if name in current:
+            action += f", ADD CONSTRAINT {name} {current[name][0]}"
+        statements.append(action)
+    return ";\n".join(statements)
+
 
 def update_constraints():
     """Drop and recreate check constraints with updated values."""
     
     print("Updating database constraints...")
     
-    with engine.begin() as conn:
+    try:
+        # Preflight against the values models.py allows: constraints that
+        # already match are left alone, so a re-run on a migrated database
+        # takes no locks and scans no tables
+        with engine.connect() as conn:
+            current = _current_constraints(conn)
+        to_replace, to_validate = [], []
+        for constraint in CONSTRAINTS:
+            table, name, check = constraint
+            definition, validated = current.get(name, (None, False))
+            if definition is None:
+                print(f"   {table}.{name} missing, will be added")
+                to_replace.append(constraint)
+                to_validate.append(constraint)
+            elif _allowed_values(definition) != _allowed_values(check):
+                added = sorted(_allowed_values(check) - _allowed_values(definition))
+                removed = sorted(_allowed_values(definition) - _allowed_values(check))
+                print(f"   {table}.{name} differs: adding {added or 'nothing'}, "
+                      f"removing {removed or 'nothing'}")
+                to_replace.append(constraint)
+                to_validate.append(constraint)
+            elif not validated:
+                # Left NOT VALID by an interrupted run
+                to_validate.append(constraint)
+            else:
+                print(f"   {table}.{name} already current, skipping")
+        
+        if not to_validate:
+            print("✅ Database constraints already up to date")
+            return
+        
+        # Drops and NOT VALID adds in one script and one transaction; these
+        # only hold the exclusive lock briefly, since no rows are checked
+        if to_replace:
+            print(f"1. Replacing {', '.join(name for _, name, _ in to_replace)} (NOT VALID)...")
+            with engine.begin() as conn:
+                conn.exec_driver_sql(_replace_constraints_sql(to_replace))
+        
+        # Validation scans the existing rows under SHARE UPDATE EXCLUSIVE,
+        # which leaves the tables readable and writable meanwhile; all of
+        # them go to the server as one script, one round trip
+        print("2. Validating existing rows...")
         try:
-            # Drop old constraints
-            print("1. Dropping old analyses.method constraint...")
-            conn.execute(text(
-                "ALTER TABLE analyses DROP CONSTRAINT IF EXISTS analyses_method_check"
-            ))
-            
-            print("2. Dropping old analyses.status constraint...")
-            conn.execute(text(
-                "ALTER TABLE analyses DROP CONSTRAINT IF EXISTS analyses_status_check"
-            ))
-            
-            print("3. Dropping old artifacts.artifact_type constraint...")
-            conn.execute(text(
-                "ALTER TABLE artifacts DROP CONSTRAINT IF EXISTS artifacts_type_check"
-            ))
-            
-            # Add new constraints with updated values
-            print("4. Adding updated analyses.method constraint...")
-            conn.execute(text(
-                "ALTER TABLE analyses ADD CONSTRAINT analyses_method_check "
-                "CHECK (method IN ('chromaprint','hpcp','dtw','lyrics','music_identification','similarity_detection','other'))"
-            ))
-            
-            print("5. Adding updated analyses.status constraint...")
-            conn.execute(text(
-                "ALTER TABLE analyses ADD CONSTRAINT analyses_status_check "
-                "CHECK (status IN ('pending','processing','running','completed','succeeded','failed'))"
-            ))
-            
-            print("6. Adding updated artifacts.artifact_type constraint...")
-            conn.execute(text(
-                "ALTER TABLE artifacts ADD CONSTRAINT artifacts_type_check "
-                "CHECK (artifact_type IN ('chromaprint','hpcp','dtw_matrix','dtw_path','plot_image','feature_json','music_matches','other'))"
-            ))
-            
-            print("✅ Database constraints updated successfully!")
-            
+            with engine.begin() as conn:
+                conn.exec_driver_sql(";\n".join(
+                    f"ALTER TABLE {table} VALIDATE CONSTRAINT {name}"
+                    for table, name, _ in to_validate
+                ))
         except Exception as e:
-            print(f"❌ Error updating constraints: {e}")
+            # A NOT VALID constraint still applies to new rows, so one that
+            # existing data violates must not be left behind
+            print(f"❌ Validation failed: {e}")
+            if to_replace:
+                try:
+                    with engine.begin() as conn:
+                        conn.exec_driver_sql(_restore_constraints_sql(to_replace, current))
+                    print("   Restored the previous constraint definitions")
+                except Exception as restore_error:
+                    print(f"❌ Could not restore the previous definitions: {restore_error}")
+                    for table, name, _ in to_replace:
+                        print(f"   {table}.{name} is left NOT VALID and still checks new rows")
+            for constraint in to_validate:
+                if constraint not in to_replace:
+                    print(f"   {constraint[0]}.{constraint[1]} stays NOT VALID, as it was before this run")
             raise
+        for table, name, _ in to_validate:
+            print(f"   {table}.{name} validated")
+        
+        print("✅ Database constraints updated successfully!")
+        
+        # Refresh planner statistics after the validation scans, outside any
+        # transaction block
+        tables = sorted({table for table, _, _ in to_validate})
+        print(f"Analyzing {', '.join(tables)}...")
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.exec_driver_sql(";\n".join(f"ANALYZE {table}" for table in tables))
+        
+    except Exception as e:
+        print(f"❌ Error updating constraints: {e}")
+        raise
 
 if __name__ == "__main__":
     update_constraints()
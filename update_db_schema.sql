@@ -0,0 +1,43 @@
+-- Schema additions for existing databases (create_all only creates missing tables)
+-- Applied by `python database.py` on every deploy (or by hand with psql -f); every
+-- statement is idempotent. Check constraints are synced by update_constraints.py
+
+-- Dedup probe columns: upload size and short hash of the first 64 KiB
+ALTER TABLE tracks ADD COLUMN IF NOT EXISTS content_length BIGINT;
+ALTER TABLE tracks ADD COLUMN IF NOT EXISTS prefix_sha256 TEXT;
+-- Cover checksum_sha256 in the dedup probe index so create_track never touches the heap
+-- (the UNIQUE constraint on checksum_sha256 stays as the backstop against duplicates).
+-- An existing index is left alone; one built without INCLUDE still serves the probe,
+-- and can be upgraded off-peak with DROP INDEX CONCURRENTLY before re-running this file
+CREATE INDEX IF NOT EXISTS idx_tracks_size_prefix ON tracks (content_length, prefix_sha256) INCLUDE (checksum_sha256);
+
+-- Backfill existing rows so they are found by the probe
+UPDATE tracks
+SET content_length = octet_length(audio_blob),
+    prefix_sha256 = left(encode(sha256(substring(audio_blob FROM 1 FOR 65536)), 'hex'), 16)
+WHERE audio_blob IS NOT NULL AND content_length IS NULL;
+
+-- Listing index for ORDER BY uploaded_at DESC; checksum_sha256 is already UNIQUE
+CREATE INDEX IF NOT EXISTS idx_tracks_uploaded_at ON tracks (uploaded_at);
+
+-- Media lookup by the UUID embedded in audio_url instead of LIKE '%<id>%'
+ALTER TABLE tracks ADD COLUMN IF NOT EXISTS file_id UUID;
+UPDATE tracks
+SET file_id = substring(audio_url FROM '/media/([0-9a-fA-F-]{36})')::uuid
+WHERE file_id IS NULL AND audio_url ~ '/media/[0-9a-fA-F-]{36}';
+CREATE UNIQUE INDEX IF NOT EXISTS idx_tracks_file_id ON tracks (file_id);
+
+-- Keep audio uncompressed in TOAST so substr() range reads only fetch the chunks they need
+-- (audio is already compressed; this only affects rows written afterwards). Skipped once
+-- set, so a deploy doesn't queue for the table lock behind running queries
+DO $$
+BEGIN
+    IF (SELECT attstorage FROM pg_attribute
+        WHERE attrelid = 'tracks'::regclass AND attname = 'audio_blob') <> 'e' THEN
+        ALTER TABLE tracks ALTER COLUMN audio_blob SET STORAGE EXTERNAL;
+    END IF;
+END $$;
+
+-- Object key for audio stored in S3-compatible storage (AUDIO_S3_BUCKET)
+ALTER TABLE tracks ADD COLUMN IF NOT EXISTS storage_key TEXT;
+